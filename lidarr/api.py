@@ -1,9 +1,16 @@
 from os import environ
 from pprint import pprint
-from requests import request, Response
-from typing import Generator, Tuple, Literal, Dict, Any, Optional, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Deque, Generator, Tuple, TypeVar, Literal, Dict, Any, Optional, List
 from models.release import Release
 from models.album import Album
+from models.lazy import LazyAlbum
+from models.track import Track, WantedTrack
+from stream import iter_page_stream
 from math import ceil
 
 # Define supported HTTP methods. Extend this tuple if needed.
@@ -11,6 +18,8 @@ HTTPMethod = Literal['GET'] | Literal['POST'] | Literal['PATCH'] | Literal['DELE
 # Define a type alias for an HTTP request, which is a tuple of (method, url_template)
 HttpRequest = Tuple[HTTPMethod, str]
 
+T = TypeVar('T')
+
 class Api:
     # Define an endpoint using our HttpRequest type alias.
     ENDPOINT_WANTED_ALBUMS_MISSING: HttpRequest = (
@@ -18,11 +27,84 @@ class Api:
         '{schema}://{host}:{port}/api/v1/wanted/missing?page={page_num}&pageSize={page_size}&includeArtist={bool_include_artist}&monitored={bool_monitored}'
     )
 
-    def __init__(self, host: str, port: int, api_key: str, ssl: bool = False):
+    ENDPOINT_ALBUM_TRACKS: HttpRequest = (
+        'GET',
+        '{schema}://{host}:{port}/api/v1/track?albumId={album_id}'
+    )
+
+    ENDPOINT_ALBUMS_BY_ID: HttpRequest = (
+        'GET',
+        '{schema}://{host}:{port}/api/v1/album?albumIds={album_ids}'
+    )
+    ENDPOINT_ARTIST_ALBUMS: HttpRequest = (
+        'GET',
+        '{schema}://{host}:{port}/api/v1/album?artistId={artist_id}'
+    )
+    ENDPOINT_COMMAND: HttpRequest = (
+        'POST',
+        '{schema}://{host}:{port}/api/v1/command'
+    )
+    ENDPOINT_COMMAND_STATUS: HttpRequest = (
+        'GET',
+        '{schema}://{host}:{port}/api/v1/command/{command_id}'
+    )
+
+    # Status codes worth retrying; Lidarr returns 503 while it is still starting up.
+    RETRY_STATUS_CODES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def __init__(self, host: str, port: int, api_key: str, ssl: bool = False,
+                 page_size: int = 50, workers: int = 4, max_retries: int = 3,
+                 backoff_factor: float = 0.5, timeout: float = 30.0, lazy_models: bool = False,
+                 stream_pages: bool = False):
         self.host = host
         self.port = port
         self.api_key = api_key
         self.ssl = ssl  # Determines whether to use 'https' or 'http'
+        self.page_size = page_size
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        # Lazy models keep the raw record and only decode the nested objects that are actually read.
+        self.album_model = LazyAlbum if lazy_models else Album
+        # Streaming decodes records one by one from the response body and interns repeated artists.
+        self.stream_pages = stream_pages
+        self.artist_cache: Dict[int, Any] = {}
+        # Album id -> (trackFileCount when fetched, tracks); refreshed once the album gains files.
+        self.track_cache: Dict[int, Tuple[int, List[Track]]] = {}
+        self.session = self._build_session(max_retries=max_retries, backoff_factor=backoff_factor)
+
+    def _build_session(self, max_retries: int, backoff_factor: float) -> Session:
+        """
+        Build a keep-alive session whose connection pool is large enough for every page worker.
+
+        :param max_retries: Number of retries for connection errors and retryable status codes.
+        :param backoff_factor: Exponential backoff factor between retries (in seconds).
+        :return: The configured session.
+        """
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        # Page workers and track workers can run at the same time, so size the pool for both.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers * 2, max_retries=retry)
+        session = Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'Api':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def do_request(self, _request: HttpRequest, params: Optional[Dict[str, Any]] = None, **kwargs) -> Response:
         """
@@ -30,7 +112,7 @@ class Api:
         
         :param request: A tuple containing the HTTP method and a URL template.
         :param params: A dictionary of parameters to format into the URL template.
-        :param kwargs: Additional keyword arguments to pass to requests.request.
+        :param kwargs: Additional keyword arguments to pass to Session.request.
         :return: The HTTP response.
         """
         method, url_template = _request
@@ -43,56 +125,259 @@ class Api:
         # Set up headers (e.g., add the API key for authentication)
         headers = kwargs.pop('headers', {})
         headers['X-Api-Key'] = self.api_key
+        kwargs.setdefault('timeout', self.timeout)
         
-        # Make the request using the provided method and URL.
-        response = request(method, url, headers=headers, **kwargs,)
+        # Make the request over the pooled session so the connection is reused.
+        response = self.session.request(method, url, headers=headers, **kwargs,)
         response.raise_for_status()  # Optionally raise an exception for HTTP errors.
         return response
 
-    def get_releases_page(self, page_num: int = 1, page_size: int = 50, include_artist:bool = True, monitored_only: bool = True, unique_tracks: bool = True) -> Generator[Release, None, None] | Generator[Tuple[int, ...], None, None]:
+    @staticmethod
+    def album_releases(album: Album | LazyAlbum, unique_tracks: bool = True) -> Generator[Release, None, None]:
+        """
+        Yield the releases of an album, stopping at the first repeated title when unique_tracks is set.
+        """
+        track_title: Optional[str] = None
+        for song in album.releases:
+            if unique_tracks and song.title != track_title:
+                yield song
+                track_title = song.title
+            elif unique_tracks and song.title == track_title:
+                # Already have had the same song 
+                break
+            else:
+                yield song
+
+    @staticmethod
+    def _wanted_params(page_num: int, page_size: int, include_artist: bool, monitored_only: bool) -> Dict[str, Any]:
         # Example parameters for the endpoint URL.
-        params = {
+        return {
             'page_num': page_num,
             'page_size': page_size,
             'bool_include_artist': 'true' if include_artist else 'false',  # Ensure booleans are formatted as expected.
             'bool_monitored': 'true' if monitored_only else 'false',
         }
+
+    def get_wanted_page(self, page_num: int = 1, page_size: int = 50, include_artist: bool = True, monitored_only: bool = True) -> Dict[str, Any]:
+        """
+        Fetch one page of the wanted/missing list as the raw decoded JSON payload.
+        """
+        params = self._wanted_params(page_num, page_size, include_artist, monitored_only)
         response = self.do_request(self.ENDPOINT_WANTED_ALBUMS_MISSING, params=params)
         # Assuming the response is JSON containing album data:
-        albums: Dict = response.json()
+        return response.json()
+
+    def get_releases_page(self, page_num: int = 1, page_size: int = 50, include_artist:bool = True, monitored_only: bool = True, unique_tracks: bool = True, stream: Optional[bool] = None) -> Generator[Release, None, None] | Generator[Tuple[int, ...], None, None]:
+        if self.stream_pages if stream is None else stream:
+            yield from self._stream_releases_page(page_num=page_num, page_size=page_size, include_artist=include_artist, monitored_only=monitored_only, unique_tracks=unique_tracks)
+            return
+        albums: Dict = self.get_wanted_page(page_num=page_num, page_size=page_size, include_artist=include_artist, monitored_only=monitored_only)
         page = page_num
         total_records = albums['totalRecords']
         total_pages = ceil(total_records / page_size)
         result = albums['records']
         yield page, total_pages
         for item in result:
-            album_dataobject = Album.from_dict(item)
-            track_title: Optional[str] = None
-            for song in album_dataobject.releases:
-                if unique_tracks and song.title != track_title:
-                    yield song
-                    track_title = song.title
-                elif unique_tracks and song.title == track_title:
-                    # Already have had the same song 
-                    break
-                else:
-                    yield song
-            
-
-    def iter_all_release_pages(self) -> Generator[Release, None, None]:
-        page_num: int = 1
-        page_size: int = 50 
+            album_dataobject = self.album_model.from_dict(item)
+            yield from self.album_releases(album_dataobject, unique_tracks=unique_tracks)
+
+    def _stream_releases_page(self, page_num: int, page_size: int, include_artist: bool, monitored_only: bool, unique_tracks: bool) -> Generator[Release, None, None] | Generator[Tuple[int, ...], None, None]:
+        """
+        Same as get_releases_page, but records are decoded from the response stream and turned into albums
+        as they arrive instead of decoding the whole page first.
+        """
+        params = self._wanted_params(page_num, page_size, include_artist, monitored_only)
+        with self.do_request(self.ENDPOINT_WANTED_ALBUMS_MISSING, params=params, stream=True) as response:
+            for key, value in iter_page_stream(response.iter_content(chunk_size=65536)):
+                if key == 'totalRecords':
+                    yield page_num, ceil(value / page_size)
+                elif key == 'records':
+                    album_dataobject = self.album_model.from_dict(value, artists=self.artist_cache)
+                    yield from self.album_releases(album_dataobject, unique_tracks=unique_tracks)
+
+    def fetch_releases_page(self, page_num: int, page_size: int, unique_tracks: bool = True) -> List[Release]:
+        """
+        Fetch a single page and return only its releases; used by the page workers.
+        """
+        return [
+            _release for _release in self.get_releases_page(
+                page_num=page_num, page_size=page_size,
+                include_artist=True, monitored_only=True, unique_tracks=unique_tracks)
+            if not isinstance(_release, tuple)
+        ]
+
+    def iter_all_release_pages(self, page_size: Optional[int] = None, workers: Optional[int] = None) -> Generator[Release, None, None]:
+        """
+        Iterate over every wanted release. Page 1 is fetched first to learn `totalRecords`,
+        the remaining pages are fetched concurrently and yielded strictly in page order.
+
+        :param page_size: Records per page, defaults to the value given to the constructor.
+        :param workers: Number of concurrent page requests, defaults to the value given to the constructor.
+        """
+        page_size = page_size or self.page_size
+        workers = max(1, workers or self.workers)
+        # Artists interned by streamed pages are only shared within one full iteration.
+        self.artist_cache.clear()
         max_page: int = 1
-        current_page: int = 0
-        while (current_page < max_page) or current_page == 0:
-            for _release in self.get_releases_page(
-                    page_num=page_num, page_size=page_size,
-                    include_artist=True, monitored_only=True, unique_tracks=True):
-                if isinstance(_release, tuple):
-                    current_page, max_page = _release
-                    page_num = current_page + 1
-                elif isinstance(_release, Release):
-                    yield _release
+        first_page: List[Release] = []
+        for _release in self.get_releases_page(
+                page_num=1, page_size=page_size,
+                include_artist=True, monitored_only=True, unique_tracks=True):
+            if isinstance(_release, tuple):
+                _, max_page = _release
+            else:
+                first_page.append(_release)
+
+        yield from self._iter_pages_in_order(
+            lambda page_num: self.fetch_releases_page(page_num, page_size),
+            first_page, max_page, workers)
+
+    def iter_all_album_records(self, page_size: Optional[int] = None, workers: Optional[int] = None) -> Generator[Dict[str, Any], None, None]:
+        """
+        Iterate over the raw album records of the wanted list in page order, without parsing them into models.
+
+        :param page_size: Records per page, defaults to the value given to the constructor.
+        :param workers: Number of concurrent page requests, defaults to the value given to the constructor.
+        """
+        page_size = page_size or self.page_size
+        workers = max(1, workers or self.workers)
+        first = self.get_wanted_page(page_num=1, page_size=page_size)
+        max_page = ceil(first['totalRecords'] / page_size)
+        yield from self._iter_pages_in_order(
+            lambda page_num: self.get_wanted_page(page_num=page_num, page_size=page_size)['records'],
+            first['records'], max_page, workers)
+
+    @staticmethod
+    def _iter_pages_in_order(fetch_page: Callable[[int], List[T]], first_page: List[T], max_page: int, workers: int) -> Generator[T, None, None]:
+        """
+        Yield the items of page 1 and then of pages 2..max_page, fetching those pages on a thread pool.
+
+        :param fetch_page: Callable returning the items of the given page number.
+        :param first_page: Items of the already fetched first page.
+        :param max_page: Total number of pages.
+        :param workers: Number of concurrent page requests.
+        """
+        if max_page <= 1:
+            yield from first_page
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lidarr-page') as executor:
+            pending: Deque[Future] = deque()
+            next_page: int = 2
+            # Keep a bounded window of pages in flight so memory does not grow with the wanted list.
+            while next_page <= max_page and len(pending) < workers * 2:
+                pending.append(executor.submit(fetch_page, next_page))
+                next_page += 1
+
+            yield from first_page
+
+            while pending:
+                items = pending.popleft().result()
+                if next_page <= max_page:
+                    pending.append(executor.submit(fetch_page, next_page))
+                    next_page += 1
+                yield from items
+
+    def get_album_tracks(self, album_id: int) -> List[Track]:
+        """
+        Fetch the tracks of the monitored release of an album.
+        """
+        response = self.do_request(self.ENDPOINT_ALBUM_TRACKS, params={'album_id': album_id})
+        return [Track.from_dict(item) for item in response.json()]
+
+    def _cached_album_tracks(self, album_id: int, track_file_count: int) -> List[Track]:
+        cached = self.track_cache.get(album_id)
+        if cached is not None and cached[0] == track_file_count:
+            return cached[1]
+        tracks = self.get_album_tracks(album_id)
+        self.track_cache[album_id] = (track_file_count, tracks)
+        return tracks
+
+    def iter_missing_tracks(self, page_size: Optional[int] = None, workers: Optional[int] = None, batch_size: int = 50) -> Generator[WantedTrack, None, None]:
+        """
+        Iterate over the individual missing tracks of every wanted album, in wanted-list order.
+
+        Albums are resolved in batches: the track requests of one batch run concurrently on the page
+        workers, and albums whose trackFileCount did not change since the last call are served from cache.
+
+        :param page_size: Records per wanted page, defaults to the value given to the constructor.
+        :param workers: Number of concurrent requests, defaults to the value given to the constructor.
+        :param batch_size: Number of albums resolved per batch.
+        """
+        workers = max(1, workers or self.workers)
+        self.artist_cache.clear()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lidarr-tracks') as executor:
+            batch: List[Any] = []
+            for record in self.iter_all_album_records(page_size=page_size, workers=workers):
+                batch.append(self.album_model.from_dict(record, artists=self.artist_cache))
+                if len(batch) >= batch_size:
+                    yield from self._resolve_missing_tracks(executor, batch)
+                    batch = []
+            if batch:
+                yield from self._resolve_missing_tracks(executor, batch)
+
+    def _resolve_missing_tracks(self, executor: ThreadPoolExecutor, albums: List[Any]) -> Generator[WantedTrack, None, None]:
+        track_lists = executor.map(
+            lambda album: self._cached_album_tracks(album.id, album.statistics.trackFileCount), albums)
+        for album, tracks in zip(albums, track_lists):
+            yield from self.album_missing_tracks(album, tracks)
+
+    @staticmethod
+    def album_missing_tracks(album: Album | LazyAlbum, tracks: List[Track]) -> Generator[WantedTrack, None, None]:
+        """
+        Yield a WantedTrack for every track of the album that has no file yet.
+        """
+        for track in tracks:
+            if track.hasFile:
+                continue
+            yield WantedTrack(
+                title=track.title,
+                artist=album.artist.artistName,
+                album=album.title,
+                duration=track.duration,
+                track_id=track.id,
+                album_id=album.id,
+                artist_id=album.artistId,
+                track_number=track.trackNumber,
+                foreign_recording_id=track.foreignRecordingId or None,
+            )
+
+    def get_albums(self, album_ids: List[int]) -> List[Album | LazyAlbum]:
+        """
+        Fetch albums by id, including their releases and statistics.
+        """
+        if not album_ids:
+            return []
+        # albumIds binds to a List<int> only when repeated per id; a comma-joined value is not split.
+        response = self.do_request(self.ENDPOINT_ALBUMS_BY_ID, params={'album_ids': '&albumIds='.join(str(_id) for _id in album_ids)})
+        # Artists are shared within one response only; artist_cache belongs to the full iterations.
+        artists: Dict[int, Any] = {}
+        return [self.album_model.from_dict(item, artists=artists) for item in response.json()]
+
+    def get_artist_albums(self, artist_id: int) -> List[Album | LazyAlbum]:
+        response = self.do_request(self.ENDPOINT_ARTIST_ALBUMS, params={'artist_id': artist_id})
+        artists: Dict[int, Any] = {}
+        return [self.album_model.from_dict(item, artists=artists) for item in response.json()]
+
+    @staticmethod
+    def is_missing(album: Album | LazyAlbum, monitored_only: bool = True) -> bool:
+        """
+        Whether an album would be listed by wanted/missing: monitored (if required) and lacking track files.
+        """
+        if monitored_only and not album.monitored:
+            return False
+        return album.statistics.trackFileCount < album.statistics.trackCount
+
+    def post_command(self, name: str, **body: Any) -> Dict[str, Any]:
+        """
+        Queue a Lidarr command (e.g. RescanFolders) and return the command resource, including its id.
+        """
+        response = self.do_request(self.ENDPOINT_COMMAND, json={'name': name, **body})
+        return response.json()
+
+    def get_command(self, command_id: int) -> Dict[str, Any]:
+        response = self.do_request(self.ENDPOINT_COMMAND_STATUS, params={'command_id': command_id})
+        return response.json()
 
     def get_all_release_pages(self) -> List[Release]:
         return list(self.iter_all_release_pages())
@@ -101,5 +386,8 @@ class Api:
 if __name__ == '__main__':
     import dotenv
     dotenv.load_dotenv('../.env')
-    api = Api(host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']))
+    api = Api(
+        host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']),
+        page_size=int(environ.get('LIDARR_PAGE_SIZE', 50)), workers=int(environ.get('LIDARR_WORKERS', 4)),
+    )
     pprint(api.get_all_release_pages())
@@ -0,0 +1,178 @@
+import asyncio
+import httpx
+from os import environ
+from pprint import pprint
+from collections import deque
+from math import ceil
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+from models.release import Release
+from models.album import Album
+from models.lazy import LazyAlbum
+from api import Api, HttpRequest
+
+T = TypeVar('T')
+
+
+class AsyncApi:
+    """
+    asyncio-native counterpart of Api. It exposes the same endpoints and yields the same models,
+    so one event loop can interleave Lidarr paging with searches and downloads.
+    """
+    ENDPOINT_WANTED_ALBUMS_MISSING: HttpRequest = Api.ENDPOINT_WANTED_ALBUMS_MISSING
+    RETRY_STATUS_CODES: Tuple[int, ...] = Api.RETRY_STATUS_CODES
+
+    def __init__(self, host: str, port: int, api_key: str, ssl: bool = False,
+                 page_size: int = 50, max_in_flight: int = 4, max_retries: int = 3,
+                 backoff_factor: float = 0.5, timeout: float = 30.0, lazy_models: bool = False):
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.ssl = ssl  # Determines whether to use 'https' or 'http'
+        self.page_size = page_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.album_model = LazyAlbum if lazy_models else Album
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+            # Transport level retries only cover connection failures; status codes are retried in do_request.
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncApi':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def do_request(self, _request: HttpRequest, params: Optional[Dict[str, Any]] = None, **kwargs) -> httpx.Response:
+        """
+        Perform an HTTP request based on the given HttpRequest tuple.
+
+        :param request: A tuple containing the HTTP method and a URL template.
+        :param params: A dictionary of parameters to format into the URL template.
+        :param kwargs: Additional keyword arguments to pass to httpx.AsyncClient.request.
+        :return: The HTTP response.
+        """
+        method, url_template = _request
+        schema = 'https' if self.ssl else 'http'
+        if params is None:
+            params = {}
+        url = url_template.format(schema=schema, host=self.host, port=self.port, **params)
+
+        headers = kwargs.pop('headers', {})
+        headers['X-Api-Key'] = self.api_key
+
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                response = await self.client.request(method, url, headers=headers, **kwargs)
+            if response.status_code not in self.RETRY_STATUS_CODES or attempt >= self.max_retries:
+                break
+            # Same exponential backoff as urllib3's Retry used by the blocking client.
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+            attempt += 1
+        response.raise_for_status()
+        return response
+
+    async def get_wanted_page(self, page_num: int = 1, page_size: int = 50, include_artist: bool = True, monitored_only: bool = True) -> Dict[str, Any]:
+        params = Api._wanted_params(page_num, page_size, include_artist, monitored_only)
+        response = await self.do_request(self.ENDPOINT_WANTED_ALBUMS_MISSING, params=params)
+        return response.json()
+
+    async def get_releases_page(self, page_num: int = 1, page_size: int = 50, include_artist: bool = True, monitored_only: bool = True, unique_tracks: bool = True) -> AsyncGenerator[Release | Tuple[int, ...], None]:
+        albums = await self.get_wanted_page(page_num=page_num, page_size=page_size, include_artist=include_artist, monitored_only=monitored_only)
+        yield page_num, ceil(albums['totalRecords'] / page_size)
+        for item in albums['records']:
+            for release in Api.album_releases(self.album_model.from_dict(item), unique_tracks=unique_tracks):
+                yield release
+
+    async def fetch_releases_page(self, page_num: int, page_size: int, unique_tracks: bool = True) -> List[Release]:
+        return [
+            _release async for _release in self.get_releases_page(
+                page_num=page_num, page_size=page_size,
+                include_artist=True, monitored_only=True, unique_tracks=unique_tracks)
+            if not isinstance(_release, tuple)
+        ]
+
+    async def iter_all_release_pages(self, page_size: Optional[int] = None, max_in_flight: Optional[int] = None) -> AsyncGenerator[Release, None]:
+        """
+        Iterate over every wanted release. Page 1 is awaited first to learn `totalRecords`,
+        the remaining pages are requested concurrently and yielded strictly in page order.
+
+        :param page_size: Records per page, defaults to the value given to the constructor.
+        :param max_in_flight: Number of pages requested at once, defaults to the value given to the constructor.
+        """
+        page_size = page_size or self.page_size
+        max_page: int = 1
+        first_page: List[Release] = []
+        async for _release in self.get_releases_page(page_num=1, page_size=page_size):
+            if isinstance(_release, tuple):
+                _, max_page = _release
+            else:
+                first_page.append(_release)
+
+        async for _release in self._iter_pages_in_order(
+                lambda page_num: self.fetch_releases_page(page_num, page_size),
+                first_page, max_page, max_in_flight or self.max_in_flight):
+            yield _release
+
+    async def iter_all_album_records(self, page_size: Optional[int] = None, max_in_flight: Optional[int] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        page_size = page_size or self.page_size
+        first = await self.get_wanted_page(page_num=1, page_size=page_size)
+
+        async def fetch_records(page_num: int) -> List[Dict[str, Any]]:
+            return (await self.get_wanted_page(page_num=page_num, page_size=page_size))['records']
+
+        async for record in self._iter_pages_in_order(
+                fetch_records, first['records'], ceil(first['totalRecords'] / page_size),
+                max_in_flight or self.max_in_flight):
+            yield record
+
+    @staticmethod
+    async def _iter_pages_in_order(fetch_page: Callable[[int], Awaitable[List[T]]], first_page: List[T], max_page: int, max_in_flight: int) -> AsyncGenerator[T, None]:
+        """
+        Yield the items of page 1 and then of pages 2..max_page, keeping at most max_in_flight page tasks alive.
+        """
+        pending: Deque[asyncio.Task] = deque()
+        next_page: int = 2
+        while next_page <= max_page and len(pending) < max_in_flight:
+            pending.append(asyncio.ensure_future(fetch_page(next_page)))
+            next_page += 1
+        try:
+            for item in first_page:
+                yield item
+            while pending:
+                items = await pending.popleft()
+                if next_page <= max_page:
+                    pending.append(asyncio.ensure_future(fetch_page(next_page)))
+                    next_page += 1
+                for item in items:
+                    yield item
+        finally:
+            # The consumer may stop early; do not leave page requests running in the background.
+            for task in pending:
+                task.cancel()
+
+    async def get_all_release_pages(self) -> List[Release]:
+        return [_release async for _release in self.iter_all_release_pages()]
+
+
+# Example usage:
+if __name__ == '__main__':
+    import dotenv
+    dotenv.load_dotenv('../.env')
+
+    async def main() -> None:
+        async with AsyncApi(
+            host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']),
+            page_size=int(environ.get('LIDARR_PAGE_SIZE', 50)), max_in_flight=int(environ.get('LIDARR_WORKERS', 4)),
+        ) as api:
+            pprint(await api.get_all_release_pages())
+
+    asyncio.run(main())
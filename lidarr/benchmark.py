@@ -0,0 +1,119 @@
+import argparse
+import json
+import time
+import tracemalloc
+from os import environ
+from typing import Any, Callable, Dict, List, Tuple
+from models.album import Album
+from models.lazy import LazyAlbum
+
+
+def synthetic_records(count: int, releases_per_album: int = 6) -> List[Dict[str, Any]]:
+    """
+    Build wanted/missing records shaped like Lidarr's, including the embedded artist, for when no
+    recorded response is available.
+    """
+    def image(kind: str) -> Dict[str, Any]:
+        return {'coverType': kind, 'extension': '.jpg', 'remoteUrl': f'https://img.example/{kind}.jpg', 'url': f'/MediaCover/{kind}.jpg'}
+
+    records = []
+    for i in range(count):
+        artist_id = i // 8
+        records.append({
+            'albumType': 'Album', 'anyReleaseOk': True, 'artistId': artist_id, 'disambiguation': '',
+            'duration': 2400000, 'foreignAlbumId': f'album-{i:08d}', 'genres': ['Rock', 'Metal'], 'id': i,
+            'images': [image('cover'), image('disc')],
+            'links': [{'name': 'discogs', 'url': f'https://discogs.example/{i}'}, {'name': 'wikipedia', 'url': f'https://wiki.example/{i}'}],
+            'media': [{'mediumFormat': 'CD', 'mediumName': '', 'mediumNumber': 1}],
+            'mediumCount': 1, 'monitored': True, 'overview': 'An album. ' * 40, 'profileId': 1,
+            'ratings': {'value': 8.4, 'votes': 120}, 'releaseDate': '2017-05-26T00:00:00Z',
+            'releases': [{
+                'albumId': i, 'country': ['United Kingdom'], 'disambiguation': '', 'duration': 2400000,
+                'foreignReleaseId': f'release-{i:08d}-{r}', 'format': 'CD', 'id': i * 100 + r, 'label': ['Epitaph'],
+                'media': [{'mediumFormat': 'CD', 'mediumName': '', 'mediumNumber': 1}], 'mediumCount': 1,
+                'monitored': r == 0, 'status': 'Official', 'title': f'Album {i}', 'trackCount': 11,
+            } for r in range(releases_per_album)],
+            'secondaryTypes': [], 'title': f'Album {i}',
+            'statistics': {'percentOfTracks': 0.0, 'sizeOnDisk': 0, 'totalTrackCount': 11, 'trackCount': 11, 'trackFileCount': 0},
+            'artist': {
+                'added': '2021-01-01T10:00:00Z', 'artistName': f'Artist {artist_id}', 'artistType': 'Group',
+                'cleanName': f'artist{artist_id}', 'disambiguation': '', 'discogsId': artist_id, 'ended': False,
+                'foreignArtistId': f'artist-{artist_id:08d}', 'genres': ['Rock'], 'id': artist_id,
+                'images': [image('poster'), image('banner'), image('fanart')],
+                'links': [{'name': 'discogs', 'url': f'https://discogs.example/a{artist_id}'}],
+                'metadataProfileId': 1, 'monitorNewItems': 'all', 'monitored': True, 'overview': 'A band. ' * 80,
+                'path': f'/music/Artist {artist_id}', 'qualityProfileId': 1, 'ratings': {'value': 9.0, 'votes': 50},
+                'sortName': f'artist {artist_id}', 'status': 'continuing', 'tadbId': 0, 'tags': [],
+            },
+        })
+    return records
+
+
+def touch_used_fields(albums: List[Any]) -> int:
+    """Read the handful of fields the downloader actually uses."""
+    total = 0
+    for album in albums:
+        total += album.id + album.statistics.trackFileCount
+        total += len(album.title) + len(album.artist.artistName)
+        for release in album.releases:
+            total += len(release.title)
+    return total
+
+
+def measure(model: Callable[[dict], Any], records: List[Dict[str, Any]]) -> Dict[str, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    albums = [model(record) for record in records]
+    parse_seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    touch_used_fields(albums)
+    access_seconds = time.perf_counter() - start
+    return {
+        'parse_seconds': parse_seconds,
+        'access_seconds': access_seconds,
+        'retained_bytes': retained,
+        'peak_bytes': peak,
+    }
+
+
+def run(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    # Records are decoded JSON owned by the caller in both modes, so only the model overhead is measured.
+    models: List[Tuple[str, Callable[[dict], Any]]] = [('eager', Album.from_dict), ('lazy', LazyAlbum.from_dict)]
+    return {name: measure(model, records) for name, model in models}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare eager and lazy Lidarr model parsing")
+    parser.add_argument("--fixture", help="Recorded /api/v1/wanted/missing response (JSON) to parse")
+    parser.add_argument("--records", type=int, default=20000, help="Number of synthetic records when no fixture is given")
+    parser.add_argument("--record", metavar="PATH", help="Record a live response from the configured Lidarr to PATH and exit")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    if args.record:
+        import dotenv
+        from api import Api
+        dotenv.load_dotenv('../.env')
+        api = Api(host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']))
+        with open(args.record, 'w', encoding='utf-8') as fp:
+            json.dump({'records': list(api.iter_all_album_records(page_size=500))}, fp)
+        raise SystemExit(0)
+
+    if args.fixture:
+        with open(args.fixture, encoding='utf-8') as fp:
+            records = json.load(fp)['records']
+    else:
+        records = synthetic_records(args.records)
+
+    results = run(records)
+    if args.json:
+        print(json.dumps({'records': len(records), 'results': results}, indent=2))
+    else:
+        print(f"{len(records)} records")
+        print(f"{'mode':<6} | {'parse (s)':>10} | {'access (s)':>10} | {'retained (MiB)':>14} | {'peak (MiB)':>10}")
+        for name, result in results.items():
+            print(f"{name:<6} | {result['parse_seconds']:>10.3f} | {result['access_seconds']:>10.3f} | "
+                  f"{result['retained_bytes'] / 2 ** 20:>14.1f} | {result['peak_bytes'] / 2 ** 20:>10.1f}")
@@ -0,0 +1,265 @@
+import json
+import logging
+import sqlite3
+from os import environ
+from enum import Enum
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+from models.album import Album
+from models.release import Release
+
+logger = logging.getLogger("lidarr.mirror")
+
+# Fields (dotted paths into the raw album record) that decide whether an album changed since the last sync.
+DEFAULT_COMPARE_FIELDS: Tuple[str, ...] = (
+    'monitored',
+    'anyReleaseOk',
+    'title',
+    'statistics.trackCount',
+    'statistics.totalTrackCount',
+    'statistics.trackFileCount',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS albums (
+    id INTEGER PRIMARY KEY,
+    artist_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    removed_at TEXT,
+    sync_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    added INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0,
+    removed INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS changes (
+    sync_id INTEGER NOT NULL,
+    album_id INTEGER NOT NULL,
+    change TEXT NOT NULL,
+    PRIMARY KEY (sync_id, album_id)
+);
+"""
+
+
+class ChangeType(str, Enum):
+    ADDED = 'added'
+    CHANGED = 'changed'
+    REMOVED = 'removed'
+
+
+@dataclass
+class AlbumChange:
+    change: ChangeType
+    album_id: int
+    album: Album
+
+    def __repr__(self) -> str:
+        return f"AlbumChange(change={self.change.value!r}, album_id={self.album_id}, title={self.album.title!r})"
+
+
+@dataclass
+class SyncResult:
+    sync_id: int
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _lookup(record: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted path such as 'statistics.trackFileCount' in a raw record."""
+    value: Any = record
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class WantedMirror:
+    """
+    A persistent SQLite mirror of the Lidarr wanted list, keyed by album id.
+
+    Every sync stores what was seen and when, and records which albums were added, changed
+    (based on `compare_fields`) or removed, so consumers only need to process that delta.
+    """
+
+    def __init__(self, db_path: str, compare_fields: Tuple[str, ...] = DEFAULT_COMPARE_FIELDS, logger: logging.Logger = logger):
+        self.db_path = db_path
+        self.compare_fields = compare_fields
+        self.logger = logger
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'WantedMirror':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def fingerprint(self, record: Dict[str, Any]) -> str:
+        return json.dumps([_lookup(record, field) for field in self.compare_fields], separators=(',', ':'))
+
+    def sync(self, records: Iterable[Dict[str, Any]], expected_total: Optional[int] = None,
+             still_wanted: Optional[Callable[[List[int]], Iterable[int]]] = None) -> SyncResult:
+        """
+        Compare a full iteration of raw album records (see Api.iter_all_album_records) with the mirror.
+
+        Removals are only recorded once the iteration has completed, so a failed sync is rolled back
+        as a whole and never marks unseen albums as removed. Paged iterations can also skip records
+        when the wanted list shifts while it is read; the two guards below keep such albums listed.
+
+        :param records: Raw album records of the complete wanted list.
+        :param expected_total: The server's totalRecords; when fewer or more albums were seen, no album is marked removed.
+        :param still_wanted: Called with the ids of the albums that were not seen; returns those that are still wanted,
+                             which are not marked removed (see Api.is_missing).
+        :return: Counts of the detected changes and the id of this sync.
+        """
+        now = _now()
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO syncs (started_at) VALUES (?)", (now,))
+            result = SyncResult(sync_id=int(cursor.lastrowid or 0))
+            known: Dict[int, Tuple[str, Optional[str]]] = {
+                row[0]: (row[1], row[2])
+                for row in self.connection.execute("SELECT id, fingerprint, removed_at FROM albums")
+            }
+
+            upserts: List[Tuple[Any, ...]] = []
+            touched: List[Tuple[Any, ...]] = []
+            changes: List[Tuple[int, int, str]] = []
+            seen = 0
+            for record in records:
+                seen += 1
+                album_id = record.get('id', 0)
+                fingerprint = self.fingerprint(record)
+                previous = known.get(album_id)
+                if previous is None or previous[1] is not None:
+                    change = ChangeType.ADDED
+                    result.added += 1
+                elif previous[0] != fingerprint:
+                    change = ChangeType.CHANGED
+                    result.changed += 1
+                else:
+                    touched.append((now, result.sync_id, album_id))
+                    result.unchanged += 1
+                    continue
+                upserts.append((
+                    album_id, record.get('artistId', 0), record.get('title', ''), fingerprint,
+                    json.dumps(record, separators=(',', ':')), now, now, now, result.sync_id,
+                ))
+                changes.append((result.sync_id, album_id, change.value))
+
+            self.connection.executemany(
+                """
+                INSERT INTO albums (id, artist_id, title, fingerprint, payload, first_seen, last_seen, changed_at, removed_at, sync_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    artist_id = excluded.artist_id, title = excluded.title, fingerprint = excluded.fingerprint,
+                    payload = excluded.payload, last_seen = excluded.last_seen, changed_at = excluded.changed_at,
+                    removed_at = NULL, sync_id = excluded.sync_id
+                """,
+                upserts,
+            )
+            self.connection.executemany("UPDATE albums SET last_seen = ?, sync_id = ? WHERE id = ?", touched)
+
+            removed = [
+                row[0] for row in self.connection.execute(
+                    "SELECT id FROM albums WHERE removed_at IS NULL AND sync_id != ?", (result.sync_id,))
+            ]
+            if removed and expected_total is not None and seen != expected_total:
+                self.logger.warning(f"Saw {seen} of {expected_total} wanted albums; not marking {len(removed)} unseen album(s) as removed")
+                removed = []
+            if removed and still_wanted is not None:
+                wanted = set(still_wanted(removed))
+                if wanted:
+                    self.logger.warning(f"{len(wanted)} unseen album(s) are still wanted; not marking them as removed")
+                removed = [album_id for album_id in removed if album_id not in wanted]
+            self.connection.executemany(
+                "UPDATE albums SET removed_at = ?, changed_at = ? WHERE id = ?",
+                [(now, now, album_id) for album_id in removed],
+            )
+            changes.extend((result.sync_id, album_id, ChangeType.REMOVED.value) for album_id in removed)
+            result.removed = len(removed)
+
+            self.connection.executemany("INSERT OR REPLACE INTO changes (sync_id, album_id, change) VALUES (?, ?, ?)", changes)
+            self.connection.execute(
+                "UPDATE syncs SET finished_at = ?, added = ?, changed = ?, removed = ?, unchanged = ? WHERE id = ?",
+                (_now(), result.added, result.changed, result.removed, result.unchanged, result.sync_id),
+            )
+        return result
+
+    def last_sync_id(self) -> Optional[int]:
+        row = self.connection.execute("SELECT MAX(id) FROM syncs WHERE finished_at IS NOT NULL").fetchone()
+        return row[0] if row else None
+
+    def iter_delta(self, sync_id: Optional[int] = None, changes: Iterable[ChangeType] = tuple(ChangeType)) -> Generator[AlbumChange, None, None]:
+        """
+        Iterate over the albums that changed in a sync; only these records are parsed into models.
+
+        :param sync_id: The sync to read, defaults to the most recent completed sync.
+        :param changes: The kinds of change to include.
+        """
+        sync_id = sync_id if sync_id is not None else self.last_sync_id()
+        if sync_id is None:
+            return
+        wanted = [change.value for change in changes]
+        query = (
+            "SELECT c.album_id, c.change, a.payload FROM changes c JOIN albums a ON a.id = c.album_id "
+            f"WHERE c.sync_id = ? AND c.change IN ({','.join('?' * len(wanted))}) ORDER BY c.rowid"
+        )
+        for album_id, change, payload in self.connection.execute(query, (sync_id, *wanted)):
+            yield AlbumChange(change=ChangeType(change), album_id=album_id, album=Album.from_dict(json.loads(payload)))
+
+    def iter_delta_releases(self, sync_id: Optional[int] = None, unique_tracks: bool = True) -> Generator[Release, None, None]:
+        """
+        Iterate over the releases of added and changed albums, matching Api.iter_all_release_pages.
+        """
+        from api import Api
+        for album_change in self.iter_delta(sync_id, changes=(ChangeType.ADDED, ChangeType.CHANGED)):
+            yield from Api.album_releases(album_change.album, unique_tracks=unique_tracks)
+
+
+# Example usage:
+if __name__ == '__main__':
+    import dotenv
+    from api import Api
+    from os import makedirs
+    from os.path import abspath, dirname, join
+    dotenv.load_dotenv('../.env')
+    api = Api(host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']))
+
+    def still_wanted(album_ids: List[int], batch_size: int = 50) -> List[int]:
+        # Re-read the unseen albums; deleted albums are not returned, obtained or unmonitored ones are no longer missing.
+        return [album.id for start in range(0, len(album_ids), batch_size)
+                for album in api.get_albums(album_ids[start:start + batch_size]) if api.is_missing(album)]
+
+    # Relative paths in .env are relative to the repository root, like LIDARR_WEBHOOK_JOBS.
+    db_path = join(dirname(dirname(abspath(__file__))), environ.get('LIDARR_MIRROR_DB', 'tmp/lidarr_mirror.sqlite3'))
+    makedirs(dirname(db_path), exist_ok=True)
+    with WantedMirror(db_path) as mirror:
+        sync = mirror.sync(api.iter_all_album_records(), still_wanted=still_wanted)
+        print(sync)
+        for album_change in mirror.iter_delta(sync.sync_id):
+            print(album_change)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 from models.artist import Artist
@@ -12,7 +12,7 @@ from models.statistics import Statistics
 
 from helper import parse_datetime
 
-@dataclass
+@dataclass(slots=True)
 class Album:
     albumType: str
     anyReleaseOk: bool
@@ -38,11 +38,20 @@ class Album:
     title: str
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Album':
+    def from_dict(cls, data: dict, artists: Optional[Dict[int, Artist]] = None) -> 'Album':
+        """
+        Build an Album from a raw record. When an `artists` cache is given, the embedded artist is
+        decoded once per artistId and shared by every album of that artist.
+        """
+        artist: Optional[Artist] = None
+        if artists is not None and 'artistId' in data:
+            artist = artists.get(data['artistId'])
+            if artist is None:
+                artist = artists[data['artistId']] = Artist.from_dict(data.get('artist', {}))
         return cls(
             albumType=data.get('albumType', ''),
             anyReleaseOk=data.get('anyReleaseOk', False),
-            artist=Artist.from_dict(data.get('artist', {})),
+            artist=artist or Artist.from_dict(data.get('artist', {})),
             artistId=data.get('artistId', 0),
             disambiguation=data.get('disambiguation', ''),
             duration=data.get('duration', 0),
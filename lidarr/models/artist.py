@@ -6,7 +6,7 @@ from models.link import Link
 from models.rating import Rating
 from helper import parse_datetime
 
-@dataclass
+@dataclass(slots=True)
 class Artist:
     added: Optional[datetime]
     artistName: str
@@ -0,0 +1,204 @@
+from typing import Any, Callable, Dict, List, Optional
+from models.album import Album
+from models.artist import Artist
+from models.image import Image
+from models.link import Link
+from models.media import Media
+from models.rating import Rating
+from models.release import Release
+from models.statistics import Statistics
+
+from helper import parse_datetime
+
+# Compact counterparts of Album, Artist and Release. They keep the raw record and only decode
+# nested objects (and dates) the first time such an attribute is read; the decoded value is cached
+# in a slot. Scalar attributes read straight from the raw record, so unused fields cost nothing.
+
+
+class _RawField:
+    """Attribute backed directly by a key of the raw record."""
+    __slots__ = ('key', 'default', 'factory')
+
+    def __init__(self, key: str, default: Any = None, factory: Optional[Callable[[], Any]] = None):
+        self.key = key
+        self.default = default
+        self.factory = factory
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        raw = instance._raw
+        if self.key in raw:
+            return raw[self.key]
+        return self.factory() if self.factory else self.default
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance._raw[self.key] = value
+
+
+class _DecodedField:
+    """Attribute decoded from the raw record on first access and cached in the slot '_<key>'."""
+    __slots__ = ('key', 'default', 'decode', 'slot')
+
+    def __init__(self, key: str, decode: Callable[[Any], Any], default: Any = None):
+        self.key = key
+        self.decode = decode
+        self.default = default
+        self.slot = f'_{key}'
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.decode(instance._raw.get(self.key, self.default))
+            setattr(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        setattr(instance, self.slot, value)
+
+
+def _list_of(from_dict: Callable[[dict], Any]) -> Callable[[Optional[List[dict]]], List[Any]]:
+    return lambda items: [from_dict(item) for item in items or []]
+
+
+class _LazyModel:
+    __slots__ = ('_raw',)
+
+    def __init__(self, data: dict):
+        self._raw = data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data)
+
+    def to_dict(self) -> dict:
+        return self._raw
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._raw == other._raw  # type: ignore[attr-defined]
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class LazyRelease(_LazyModel):
+    __slots__ = ('_media',)
+
+    albumId = _RawField('albumId', 0)
+    country = _RawField('country', factory=list)
+    disambiguation = _RawField('disambiguation', '')
+    duration = _RawField('duration', 0)
+    foreignReleaseId = _RawField('foreignReleaseId', '')
+    format = _RawField('format', '')
+    id = _RawField('id', 0)
+    label = _RawField('label', factory=list)
+    media = _DecodedField('media', _list_of(Media.from_dict))
+    mediumCount = _RawField('mediumCount', 0)
+    monitored = _RawField('monitored', False)
+    status = _RawField('status', '')
+    title = _RawField('title', '')
+    trackCount = _RawField('trackCount', 0)
+
+    def materialize(self) -> Release:
+        return Release.from_dict(self._raw)
+
+    def __repr__(self) -> str:
+        return (f"Release(id={self.id}, title={self.title!r}, "
+                f"format={self.format!r}, trackCount={self.trackCount})")
+
+
+class LazyArtist(_LazyModel):
+    __slots__ = ('_added', '_images', '_links', '_ratings')
+
+    added = _DecodedField('added', parse_datetime)
+    artistName = _RawField('artistName', '')
+    artistType = _RawField('artistType', '')
+    cleanName = _RawField('cleanName', '')
+    disambiguation = _RawField('disambiguation', '')
+    discogsId = _RawField('discogsId', 0)
+    ended = _RawField('ended', False)
+    foreignArtistId = _RawField('foreignArtistId', '')
+    genres = _RawField('genres', factory=list)
+    id = _RawField('id', 0)
+    images = _DecodedField('images', _list_of(Image.from_dict))
+    lastAlbum = _RawField('lastAlbum')
+    links = _DecodedField('links', _list_of(Link.from_dict))
+    metadataProfileId = _RawField('metadataProfileId', 0)
+    monitorNewItems = _RawField('monitorNewItems', '')
+    monitored = _RawField('monitored', False)
+    nextAlbum = _RawField('nextAlbum')
+    overview = _RawField('overview', '')
+    path = _RawField('path', '')
+    qualityProfileId = _RawField('qualityProfileId', 0)
+    ratings = _DecodedField('ratings', lambda data: Rating.from_dict(data or {}))
+    sortName = _RawField('sortName', '')
+    status = _RawField('status', '')
+    tadbId = _RawField('tadbId', 0)
+    tags = _RawField('tags', factory=list)
+
+    def materialize(self) -> Artist:
+        return Artist.from_dict(self._raw)
+
+    def __repr__(self) -> str:
+        return (f"Artist(id={self.id}, artistName={self.artistName!r}, "
+                f"discogsId={self.discogsId})")
+
+
+class LazyAlbum(_LazyModel):
+    __slots__ = ('_artist', '_images', '_links', '_media', '_ratings', '_releaseDate', '_releases', '_statistics')
+
+    albumType = _RawField('albumType', '')
+    anyReleaseOk = _RawField('anyReleaseOk', False)
+    artist = _DecodedField('artist', lambda data: LazyArtist(data or {}))
+    artistId = _RawField('artistId', 0)
+    disambiguation = _RawField('disambiguation', '')
+    duration = _RawField('duration', 0)
+    foreignAlbumId = _RawField('foreignAlbumId', '')
+    genres = _RawField('genres', factory=list)
+    id = _RawField('id', 0)
+    images = _DecodedField('images', _list_of(Image.from_dict))
+    links = _DecodedField('links', _list_of(Link.from_dict))
+    media = _DecodedField('media', _list_of(Media.from_dict))
+    mediumCount = _RawField('mediumCount', 0)
+    monitored = _RawField('monitored', False)
+    overview = _RawField('overview', '')
+    profileId = _RawField('profileId', 0)
+    ratings = _DecodedField('ratings', lambda data: Rating.from_dict(data or {}))
+    releaseDate = _DecodedField('releaseDate', parse_datetime)
+    releases = _DecodedField('releases', _list_of(LazyRelease))
+    secondaryTypes = _RawField('secondaryTypes', factory=list)
+    statistics = _DecodedField('statistics', lambda data: Statistics.from_dict(data or {}))
+    title = _RawField('title', '')
+
+    @classmethod
+    def from_dict(cls, data: dict, artists: Optional[Dict[int, LazyArtist]] = None) -> 'LazyAlbum':
+        """
+        Wrap a raw record. When an `artists` cache is given, the embedded artist payload is replaced by
+        the shared LazyArtist for its artistId and left out of the album's own copy of the record; the
+        caller's dict is not modified.
+        """
+        if artists is None or 'artistId' not in data:
+            return cls(data)
+        album = cls({key: value for key, value in data.items() if key != 'artist'})
+        artist = artists.get(data['artistId'])
+        if artist is None:
+            artist = artists[data['artistId']] = LazyArtist(data.get('artist') or {})
+        album._artist = artist
+        return album
+
+    def to_dict(self) -> dict:
+        if 'artist' in self._raw:
+            return self._raw
+        return {**self._raw, 'artist': self.artist.to_dict()}
+
+    def materialize(self) -> Album:
+        return Album.from_dict(self.to_dict())
+
+    def __repr__(self) -> str:
+        return (f"Album(id={self.id}, title={self.title!r}, "
+                f"artist={self.artist.artistName!r}, releaseDate={self.releaseDate}, "
+                f"foreignAlbumId={self.foreignAlbumId!r})")
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import List, TYPE_CHECKING
 from models.media import Media
 
-@dataclass
+@dataclass(slots=True)
 class Release:
     albumId: int
     country: List[str]
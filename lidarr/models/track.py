@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from models.rating import Rating
+
+@dataclass(slots=True)
+class Track:
+    absoluteTrackNumber: int
+    albumId: int
+    artistId: int
+    duration: int
+    explicit: bool
+    foreignRecordingId: str
+    foreignTrackId: str
+    hasFile: bool
+    id: int
+    mediumNumber: int
+    ratings: Rating
+    title: str
+    trackFileId: int
+    trackNumber: str
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Track':
+        return cls(
+            absoluteTrackNumber=data.get('absoluteTrackNumber', 0),
+            albumId=data.get('albumId', 0),
+            artistId=data.get('artistId', 0),
+            duration=data.get('duration', 0),
+            explicit=data.get('explicit', False),
+            foreignRecordingId=data.get('foreignRecordingId', ''),
+            foreignTrackId=data.get('foreignTrackId', ''),
+            hasFile=data.get('hasFile', False),
+            id=data.get('id', 0),
+            mediumNumber=data.get('mediumNumber', 0),
+            ratings=Rating.from_dict(data.get('ratings', {})),
+            title=data.get('title', ''),
+            trackFileId=data.get('trackFileId', 0),
+            trackNumber=data.get('trackNumber', '')
+        )
+
+    def __repr__(self) -> str:
+        return (f"Track(id={self.id}, title={self.title!r}, "
+                f"trackNumber={self.trackNumber!r}, duration={self.duration}, hasFile={self.hasFile})")
+
+
+@dataclass(slots=True)
+class WantedTrack:
+    """A single missing track, carrying everything needed to search for and tag it."""
+    title: str
+    artist: str
+    album: str
+    duration: int  # Expected duration in milliseconds, as reported by Lidarr.
+    track_id: int
+    album_id: int
+    artist_id: int
+    track_number: str = ''
+    foreign_recording_id: Optional[str] = None
+
+    @property
+    def duration_seconds(self) -> int:
+        return round(self.duration / 1000)
+
+    @property
+    def query(self) -> str:
+        """Search query in the same 'Title - Artist' form the CLI uses."""
+        return f"{self.title} - {self.artist}" if self.artist else self.title
+
+    def __repr__(self) -> str:
+        return (f"WantedTrack(track_id={self.track_id}, title={self.title!r}, "
+                f"artist={self.artist!r}, album={self.album!r}, duration={self.duration})")
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+from os import environ
+from os.path import dirname
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Literal, Optional, Set, Tuple
+from api import Api
+
+logger = logging.getLogger("lidarr.notify")
+
+# Command states after which Lidarr no longer changes a command.
+TERMINAL_STATUSES = ('completed', 'failed', 'aborted', 'cancelled', 'orphaned')
+
+
+@dataclass
+class RescanBatch:
+    command_id: int
+    folders: List[str]
+    status: str = 'queued'
+    queued_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.queued_at
+
+
+class RescanNotifier:
+    """
+    Collects files placed in the library and tells Lidarr about them with a single RescanFolders
+    command per batch, instead of one scan per file.
+
+    A batch is flushed when `max_batch` distinct folders are pending or `max_delay` seconds after the
+    first pending file, whichever comes first. Every batch is polled until Lidarr reports completion or
+    `command_timeout` passes. A batch that Lidarr could not be told about goes back to pending and is
+    retried after `max_delay`; close() retries it synchronously instead, so it is not lost on exit.
+
+    Wiring: `add` (or the notifier itself) has the post_move_hook signature of yt's VideoDownloader.
+    yt/ and lidarr/ use the same module names (models, helper), so they do not load into one
+    interpreter; a downloader process hands its paths to this module instead, either as arguments or
+    one per line on stdin (e.g. `post_move_hook=lambda path: print(path, flush=True)` piped into
+    `python notify.py`). Files from one pipe are batched like calls to `add`.
+    """
+
+    def __init__(self, api: Api, max_batch: int = 50, max_delay: float = 10.0, group_by: Literal['album', 'artist'] = 'album',
+                 path_map: Optional[Tuple[str, str]] = None, poll_interval: float = 2.0, command_timeout: Optional[float] = 1800.0,
+                 on_complete: Optional[Callable[[RescanBatch], None]] = None, logger: logging.Logger = logger):
+        """
+        :param api: Lidarr client used to queue and poll the commands.
+        :param max_batch: Number of distinct folders that triggers an immediate flush.
+        :param max_delay: Seconds after the first pending file before the batch is flushed.
+        :param group_by: Rescan the album folder of each file or its artist folder.
+        :param path_map: (local prefix, Lidarr prefix) when Lidarr sees the library under another path.
+        :param poll_interval: Seconds between command status checks.
+        :param command_timeout: Seconds a batch's command is polled before it is given up on; None polls until it finishes.
+        :param on_complete: Called with the batch once Lidarr finished the command.
+        """
+        self.api = api
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.group_by = group_by
+        self.path_map = path_map
+        self.poll_interval = poll_interval
+        self.command_timeout = command_timeout
+        self.on_complete = on_complete
+        self.logger = logger
+        self.pending: Set[str] = set()
+        self.batches: Dict[int, RescanBatch] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # Threads polling the queued commands; each removes itself when its command is done.
+        self._watchers: List[threading.Thread] = []
+        self._closing = False
+
+    def __enter__(self) -> 'RescanNotifier':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def folder_for(self, path: str) -> str:
+        folder = dirname(path)
+        if self.group_by == 'artist':
+            folder = dirname(folder)
+        if self.path_map and folder.startswith(self.path_map[0]):
+            folder = self.path_map[1] + folder[len(self.path_map[0]):]
+        return folder
+
+    def add(self, path: str) -> None:
+        """
+        Register a file that was placed in the library; can be used directly as the downloader's post-move hook.
+        """
+        flush_now = False
+        with self._lock:
+            self.pending.add(self.folder_for(path))
+            if len(self.pending) >= self.max_batch:
+                flush_now = True
+            else:
+                self._arm_timer()
+        if flush_now:
+            self.flush()
+
+    def _arm_timer(self) -> None:
+        """Schedule a flush `max_delay` seconds from now unless one is scheduled or closing; the lock must be held."""
+        if self._timer is None and not self._closing:
+            self._timer = threading.Timer(self.max_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    __call__ = add
+
+    def flush(self) -> Optional[RescanBatch]:
+        """
+        Send all pending folders to Lidarr as one RescanFolders command.
+
+        :return: The queued batch, or None when nothing was pending.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            folders = sorted(self.pending)
+            self.pending.clear()
+        if not folders:
+            return None
+
+        try:
+            command = self.api.post_command('RescanFolders', folders=folders)
+        except Exception as e:
+            self.logger.error(f"Could not queue rescan of {len(folders)} folder(s): {e}")
+            # Keep the folders and schedule the retry; nothing else may ever call flush again (close retries itself).
+            with self._lock:
+                self.pending.update(folders)
+                self._arm_timer()
+            return None
+
+        batch = RescanBatch(command_id=command['id'], folders=folders, status=command.get('status', 'queued'))
+        self.batches[batch.command_id] = batch
+        self.logger.info(f"Queued rescan command {batch.command_id} for {len(folders)} folder(s)")
+        watcher = threading.Thread(target=self._watch, args=(batch,), name=f"rescan-{batch.command_id}", daemon=True)
+        with self._lock:
+            self._watchers.append(watcher)
+        watcher.start()
+        return batch
+
+    def _watch(self, batch: RescanBatch) -> None:
+        try:
+            if self.wait(batch, self.command_timeout) not in TERMINAL_STATUSES:
+                self.logger.warning(f"Gave up on rescan command {batch.command_id} after {batch.elapsed:.0f}s (status {batch.status})")
+        finally:
+            with self._lock:
+                self._watchers.remove(threading.current_thread())
+
+    def wait(self, batch: RescanBatch, timeout: Optional[float] = None) -> str:
+        """
+        Poll the command of a batch until Lidarr reports a terminal status.
+
+        :return: The last known status of the command.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not batch.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+            try:
+                batch.status = self.api.get_command(batch.command_id).get('status', batch.status)
+            except Exception as e:
+                self.logger.warning(f"Could not poll rescan command {batch.command_id}: {e}")
+                continue
+            if batch.done:
+                batch.finished_at = time.monotonic()
+                log = self.logger.info if batch.status == 'completed' else self.logger.error
+                log(f"Rescan command {batch.command_id} {batch.status} after {batch.elapsed:.1f}s ({len(batch.folders)} folder(s))")
+                if self.on_complete is not None:
+                    self.on_complete(batch)
+        return batch.status
+
+    def close(self, timeout: Optional[float] = None, retries: int = 3) -> None:
+        """
+        Flush what is pending and wait for every queued command to finish.
+
+        The final flush runs on the calling thread: when Lidarr cannot be reached it is retried up to
+        `retries` times, `poll_interval` apart, and folders that still could not be sent are logged.
+
+        :param timeout: Seconds to wait for each queued command's watcher.
+        """
+        with self._lock:
+            self._closing = True
+        self.flush()
+        for _ in range(max(0, retries)):
+            if not self.pending:
+                break
+            time.sleep(self.poll_interval)
+            self.flush()
+        if self.pending:
+            self.logger.error(f"Could not queue the rescan of {len(self.pending)} folder(s) before closing: {sorted(self.pending)}")
+        with self._lock:
+            watchers = list(self._watchers)
+        for watcher in watchers:
+            watcher.join(timeout)
+
+
+# Example usage:
+if __name__ == '__main__':
+    import sys
+    import dotenv
+    dotenv.load_dotenv('../.env')
+    logging.basicConfig(level=logging.INFO, format="[%(name)s] | %(asctime)s.%(msecs)03d - %(levelname)s - %(message)s", datefmt='%H:%M:%S')
+    api = Api(host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']))
+    # Paths as arguments, or one per line on stdin, e.g. piped from a downloader's post_move_hook.
+    with RescanNotifier(api) as notifier:
+        for file_path in sys.argv[1:] or (line.strip() for line in sys.stdin):
+            if file_path:
+                notifier.add(file_path)
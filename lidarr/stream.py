@@ -0,0 +1,105 @@
+import codecs
+import json
+import re
+from typing import Any, Generator, Iterable, Iterator, Tuple
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DELIMITERS = ' \t\n\r,]}'
+
+
+class PageStreamDecoder:
+    """
+    Incrementally decodes a Lidarr paging response ({"page": .., "totalRecords": .., "records": [..]}).
+
+    Top-level fields are yielded as (key, value) once they are complete. The items of the `records`
+    array are yielded one at a time as ('records', record), so only one record is held in decoded form
+    and the consumed part of the body is dropped from the buffer as decoding progresses.
+    """
+    STREAMED_KEY = 'records'
+
+    def __init__(self, chunks: Iterable[bytes], streamed_key: str = STREAMED_KEY):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer: str = ''
+        self._pos: int = 0
+        self._eof: bool = False
+        self.streamed_key = streamed_key
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; returns False once the body is exhausted."""
+        if self._eof:
+            return False
+        # Drop everything that has been consumed before growing the buffer.
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._utf8.decode(chunk)
+                return True
+        self._buffer += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()  # type: ignore[union-attr]
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos} but found {found!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut off by the chunk boundary ("2." or "12e") still decodes as a shorter number,
+            # so scalars are only accepted once the next delimiter has been buffered.
+            if not self._eof and self._buffer[self._pos] not in '{["' and \
+                    (end == len(self._buffer) or self._buffer[end] not in DELIMITERS):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self) -> Generator[Tuple[str, Any], None, None]:
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.streamed_key and self._peek() == '[':
+                self._pos += 1
+                if self._peek() != ']':
+                    while True:
+                        yield key, self._value()
+                        if self._peek() == ',':
+                            self._pos += 1
+                            continue
+                        break
+                self._expect(']')
+            else:
+                yield key, self._value()
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect('}')
+            return
+
+
+def iter_page_stream(chunks: Iterable[bytes], streamed_key: str = PageStreamDecoder.STREAMED_KEY) -> Generator[Tuple[str, Any], None, None]:
+    yield from PageStreamDecoder(chunks, streamed_key=streamed_key)
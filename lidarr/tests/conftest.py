@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The lidarr modules import each other by their bare names (`from api import Api`), like when the
+# scripts are run from this directory. yt/ uses the same module names (models, helper, benchmark),
+# so the two suites run in separate processes: `python -m pytest lidarr/tests` and `python -m pytest yt/tests`.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'models' in sys.modules and not os.path.abspath(getattr(sys.modules['models'], '__file__', '') or '').startswith(ROOT):
+    raise RuntimeError("lidarr/tests and yt/tests must be run in separate pytest processes")
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
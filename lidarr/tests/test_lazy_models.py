@@ -0,0 +1,50 @@
+import copy
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES
+from models.album import Album
+from models.lazy import LazyAlbum, LazyArtist
+
+
+@pytest.fixture
+def records():
+    with open(os.path.join(FIXTURES, 'albums.json')) as fp:
+        return json.load(fp)
+
+
+def test_materialize_matches_eager_album(records):
+    for record in records:
+        assert LazyAlbum.from_dict(copy.deepcopy(record)).materialize() == Album.from_dict(record)
+
+
+def test_artist_cache_leaves_caller_record_intact(records):
+    original = copy.deepcopy(records)
+    artists = {}
+    albums = [LazyAlbum.from_dict(record, artists=artists) for record in records]
+
+    assert records == original
+    assert list(artists) == [12]
+    assert albums[0].artist is albums[1].artist
+    assert 'artist' not in albums[0]._raw
+
+
+def test_materialize_restores_cached_artist(records):
+    artists = {}
+    album = LazyAlbum.from_dict(records[0], artists=artists)
+
+    materialized = album.materialize()
+    assert materialized == Album.from_dict(records[0])
+    assert materialized.artist.artistName == 'Radiohead'
+    assert album.to_dict()['artist'] == records[0]['artist']
+
+
+def test_albums_of_one_artist_share_the_first_payload(records):
+    artists = {}
+    first, second = (LazyAlbum.from_dict(record, artists=artists) for record in records)
+
+    assert isinstance(second.artist, LazyArtist)
+    assert second.materialize().artist.path == '/music/Radiohead'
+    assert second.materialize().artist.discogsId == first.artist.discogsId == 3840
@@ -0,0 +1,90 @@
+import copy
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES
+from mirror import ChangeType, WantedMirror
+
+
+@pytest.fixture
+def records():
+    with open(os.path.join(FIXTURES, 'albums.json')) as fp:
+        return json.load(fp)
+
+
+@pytest.fixture
+def mirror():
+    with WantedMirror(':memory:') as mirror:
+        yield mirror
+
+
+def delta(mirror, sync_id):
+    return [(change.change, change.album_id) for change in mirror.iter_delta(sync_id)]
+
+
+def test_first_sync_adds_every_album(mirror, records):
+    sync = mirror.sync(records)
+
+    assert (sync.added, sync.changed, sync.removed, sync.unchanged) == (2, 0, 0, 0)
+    assert delta(mirror, sync.sync_id) == [(ChangeType.ADDED, 44), (ChangeType.ADDED, 45)]
+    assert [change.album.title for change in mirror.iter_delta(sync.sync_id)] == ['In Rainbows', 'OK Computer']
+
+
+def test_only_compared_fields_make_a_change(mirror, records):
+    mirror.sync(records)
+    updated = copy.deepcopy(records)
+    updated[0]['statistics']['trackFileCount'] += 1
+    updated[1]['overview'] = 'Not a compared field'
+    sync = mirror.sync(updated)
+
+    assert (sync.added, sync.changed, sync.removed, sync.unchanged) == (0, 1, 0, 1)
+    assert delta(mirror, sync.sync_id) == [(ChangeType.CHANGED, 44)]
+    assert next(mirror.iter_delta(sync.sync_id)).album.statistics.trackFileCount == 4
+
+
+def test_unseen_album_is_removed_and_added_again(mirror, records):
+    mirror.sync(records)
+    removal = mirror.sync(records[:1])
+    assert (removal.removed, removal.unchanged) == (1, 1)
+    assert delta(mirror, removal.sync_id) == [(ChangeType.REMOVED, 45)]
+    assert mirror.sync(records[:1]).has_changes is False
+
+    readded = mirror.sync(records)
+    assert delta(mirror, readded.sync_id) == [(ChangeType.ADDED, 45)]
+
+
+def test_no_removals_when_the_count_does_not_match_total_records(mirror, records):
+    mirror.sync(records)
+    # The wanted list shifted while it was paged, so album 45 was skipped although the server still counts it.
+    sync = mirror.sync(records[:1], expected_total=2)
+
+    assert (sync.removed, sync.unchanged) == (0, 1)
+    assert mirror.sync(records[:1], expected_total=1).removed == 1
+
+
+def test_unseen_albums_that_are_still_wanted_are_kept(mirror, records):
+    mirror.sync(records)
+    checked = []
+
+    def still_wanted(album_ids):
+        checked.extend(album_ids)
+        return [45]
+
+    sync = mirror.sync(records[:1], still_wanted=still_wanted)
+    assert (checked, sync.removed) == ([45], 0)
+    assert mirror.sync(records[:1], still_wanted=lambda album_ids: []).removed == 1
+
+
+def test_failed_iteration_rolls_back(mirror, records):
+    first = mirror.sync(records)
+
+    def broken():
+        yield records[0]
+        raise ConnectionError("page 2 failed")
+
+    with pytest.raises(ConnectionError):
+        mirror.sync(broken())
+    assert mirror.last_sync_id() == first.sync_id
+    assert mirror.sync(records).unchanged == 2
@@ -0,0 +1,83 @@
+import threading
+
+from notify import RescanNotifier
+
+
+class FlakyApi:
+    """Fails the first `failures` RescanFolders commands, then reports every command as completed."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.commands = []
+        self.queued = threading.Event()
+
+    def post_command(self, name, **body):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("lidarr unavailable")
+        self.commands.append((name, body))
+        self.queued.set()
+        return {'id': len(self.commands), 'status': 'queued'}
+
+    def get_command(self, command_id):
+        return {'id': command_id, 'status': 'completed'}
+
+
+def test_files_are_batched_per_album_folder():
+    api = FlakyApi()
+    notifier = RescanNotifier(api, max_batch=10, max_delay=60, poll_interval=0.01)
+    notifier.add('/music/Radiohead/In Rainbows/01 - 15 Step.mp3')
+    notifier.add('/music/Radiohead/In Rainbows/02 - Bodysnatchers.mp3')
+    notifier.add('/music/Radiohead/OK Computer/01 - Airbag.mp3')
+    notifier.close(timeout=5)
+
+    assert api.commands == [('RescanFolders', {'folders': ['/music/Radiohead/In Rainbows', '/music/Radiohead/OK Computer']})]
+    assert all(batch.status == 'completed' for batch in notifier.batches.values())
+
+
+def test_failed_flush_is_retried_by_the_timer():
+    api = FlakyApi(failures=1)
+    notifier = RescanNotifier(api, max_batch=1, max_delay=0.05, poll_interval=0.01)
+    # max_batch=1 flushes inline; that flush fails and must schedule its own retry.
+    notifier.add('/music/Radiohead/In Rainbows/01 - 15 Step.mp3')
+    assert notifier.pending == {'/music/Radiohead/In Rainbows'}
+
+    assert api.queued.wait(timeout=5)
+    assert api.commands == [('RescanFolders', {'folders': ['/music/Radiohead/In Rainbows']})]
+    assert not notifier.pending
+    notifier.close(timeout=5)
+
+
+def test_close_flushes_synchronously_after_a_failed_flush():
+    api = FlakyApi(failures=2)
+    # The timer would only fire after a minute; close must not leave the folder to it.
+    notifier = RescanNotifier(api, max_batch=1, max_delay=60, poll_interval=0.01)
+    notifier.add('/music/Radiohead/In Rainbows/01 - 15 Step.mp3')
+    notifier.close(timeout=5)
+
+    assert api.commands == [('RescanFolders', {'folders': ['/music/Radiohead/In Rainbows']})]
+    assert not notifier.pending and notifier._timer is None
+
+
+def test_finished_watchers_are_removed():
+    api = FlakyApi()
+    notifier = RescanNotifier(api, max_batch=1, max_delay=60, poll_interval=0.01)
+    for album in ('In Rainbows', 'OK Computer', 'Kid A'):
+        notifier.add(f'/music/Radiohead/{album}/01.mp3')
+    notifier.close(timeout=5)
+
+    assert len(notifier.batches) == 3 and notifier._watchers == []
+
+
+class StuckApi(FlakyApi):
+    def get_command(self, command_id):
+        return {'id': command_id, 'status': 'started'}
+
+
+def test_watchers_give_up_after_the_command_timeout():
+    notifier = RescanNotifier(StuckApi(), max_batch=1, max_delay=60, poll_interval=0.01, command_timeout=0.05)
+    notifier.add('/music/Radiohead/Kid A/01.mp3')
+    notifier.close(timeout=5)
+
+    assert [batch.status for batch in notifier.batches.values()] == ['started']
+    assert notifier._watchers == []
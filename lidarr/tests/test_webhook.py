@@ -0,0 +1,200 @@
+import json
+import os
+import queue
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from requests import Response
+
+from api import Api
+from conftest import FIXTURES
+from models.track import WantedTrack
+from webhook import WebhookIntake, create_app, forward, job_log
+
+
+def load(*parts):
+    with open(os.path.join(FIXTURES, *parts)) as fp:
+        return json.load(fp)
+
+
+class RecordedLidarr:
+    """Session stand-in that answers the album and track endpoints from the recorded fixtures."""
+
+    def __init__(self):
+        self.albums = {album['id']: album for album in load('albums.json')}
+        self.tracks = load('tracks.json')
+        self.urls = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.urls.append(url)
+        query = parse_qs(urlsplit(url).query)
+        path = urlsplit(url).path
+        if path == '/api/v1/album' and 'albumIds' in query:
+            body = [self.albums[int(_id)] for _id in query['albumIds'] if int(_id) in self.albums]
+        elif path == '/api/v1/album' and 'artistId' in query:
+            body = [album for album in self.albums.values() if album['artistId'] == int(query['artistId'][0])]
+        elif path == '/api/v1/track':
+            body = [track for track in self.tracks if track['albumId'] == int(query['albumId'][0])]
+        else:
+            body = {'message': 'NotFound'}
+        response = Response()
+        response.status_code = 404 if isinstance(body, dict) else 200
+        response._content = json.dumps(body).encode()
+        response.url = url
+        return response
+
+
+@pytest.fixture
+def lidarr():
+    return RecordedLidarr()
+
+
+@pytest.fixture
+def api(lidarr):
+    api = Api(host='lidarr.local', port=8686, api_key='key')
+    api.session = lidarr
+    return api
+
+
+def client_for(api, items='releases', username=None, password=None):
+    intake_queue = queue.Queue()
+    app = create_app(WebhookIntake(api, intake_queue, items=items), username, password)
+    return app.test_client(), intake_queue
+
+
+def drain(intake_queue):
+    items = []
+    while not intake_queue.empty():
+        items.append(intake_queue.get_nowait())
+    return items
+
+
+def test_get_albums_repeats_the_album_ids_parameter(api, lidarr):
+    albums = api.get_albums([44, 45])
+
+    assert parse_qs(urlsplit(lidarr.urls[-1]).query) == {'albumIds': ['44', '45']}
+    assert [album.id for album in albums] == [44, 45]
+
+
+def test_grab_enqueues_the_releases_of_missing_albums(api):
+    client, intake_queue = client_for(api)
+    response = client.post('/webhook', json=load('webhook', 'grab.json'))
+
+    assert response.status_code == 202
+    # OK Computer already has all its files, only In Rainbows is wanted.
+    assert response.get_json() == {'eventType': 'Grab', 'enqueued': 1}
+    assert [(release.albumId, release.title) for release in drain(intake_queue)] == [(44, 'In Rainbows')]
+
+
+def test_artist_add_enqueues_missing_tracks(api):
+    client, intake_queue = client_for(api, items='tracks')
+    response = client.post('/webhook', json=load('webhook', 'artist_add.json'))
+
+    assert response.status_code == 202
+    items = drain(intake_queue)
+    assert all(isinstance(item, WantedTrack) for item in items)
+    assert [(item.album, item.title) for item in items] == [('In Rainbows', 'Bodysnatchers'), ('In Rainbows', 'Nude')]
+    assert response.get_json()['enqueued'] == 2
+
+
+def test_album_add_enqueues_only_the_added_album(api, lidarr):
+    client, intake_queue = client_for(api, items='tracks')
+    response = client.post('/webhook', json=load('webhook', 'album_add.json'))
+
+    assert response.status_code == 202
+    assert [(item.album, item.title) for item in drain(intake_queue)] == [('In Rainbows', 'Bodysnatchers'), ('In Rainbows', 'Nude')]
+    assert not any('artistId' in url for url in lidarr.urls)
+
+
+# The downloader's read_jobs test parses this file, so both ends agree on the job format.
+DOWNLOAD_JOBS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'yt', 'tests', 'fixtures', 'webhook_jobs.jsonl')
+
+
+def test_serve_hands_wanted_tracks_to_the_downloader_as_jobs(api, tmp_path):
+    client, intake_queue = client_for(api, items='tracks')
+    jobs_path = tmp_path / 'jobs.jsonl'
+    stop = threading.Event()
+    forwarder = threading.Thread(target=forward, args=(intake_queue, job_log(str(jobs_path)), stop))
+    forwarder.start()
+    try:
+        assert client.post('/webhook', json=load('webhook', 'grab.json')).status_code == 202
+        intake_queue.join()
+    finally:
+        stop.set()
+        forwarder.join()
+
+    jobs = [json.loads(line) for line in jobs_path.read_text().splitlines()]
+    assert jobs[0] == {'title': 'Bodysnatchers - Radiohead', 'expected_duration': 242,
+                       'tags': {'title': 'Bodysnatchers', 'artist': 'Radiohead', 'album': 'In Rainbows'}}
+    assert jobs_path.read_text() == open(DOWNLOAD_JOBS).read()
+
+
+def test_forward_skips_items_the_sink_fails_on():
+    intake_queue = queue.Queue()
+    handed = []
+
+    def sink(item):
+        if item == 'bad':
+            raise ValueError(item)
+        handed.append(item)
+
+    for item in ('first', 'bad', 'last'):
+        intake_queue.put(item)
+    stop = threading.Event()
+    forwarder = threading.Thread(target=forward, args=(intake_queue, sink, stop))
+    forwarder.start()
+    intake_queue.join()
+    stop.set()
+    forwarder.join()
+    assert handed == ['first', 'last']
+
+
+def test_other_events_are_acknowledged_without_lookups(api, lidarr):
+    client, intake_queue = client_for(api)
+    response = client.post('/webhook', json=load('webhook', 'test.json'))
+
+    assert response.status_code == 202
+    assert response.get_json() == {'eventType': 'Test', 'enqueued': 0}
+    assert lidarr.urls == [] and intake_queue.empty()
+
+
+def test_body_must_be_a_json_object(api):
+    client, _ = client_for(api)
+
+    assert client.post('/webhook', data='not json', content_type='application/json').status_code == 400
+    assert client.post('/webhook', json=[1, 2]).status_code == 400
+
+
+def test_basic_auth_is_required_when_a_username_is_set(api):
+    client, intake_queue = client_for(api, username='lidarr', password='secret')
+    payload = load('webhook', 'grab.json')
+
+    missing = client.post('/webhook', json=payload)
+    assert missing.status_code == 401
+    assert 'Basic' in missing.headers['WWW-Authenticate']
+    assert client.post('/webhook', json=payload, auth=('lidarr', 'wrong')).status_code == 401
+    assert intake_queue.empty()
+    assert client.post('/webhook', json=payload, auth=('lidarr', 'secret')).status_code == 202
+
+
+def test_empty_username_disables_auth(api):
+    # sample.env ships LIDARR_WEBHOOK_USER="".
+    client, _ = client_for(api, username='', password='')
+
+    assert client.post('/webhook', json=load('webhook', 'grab.json')).status_code == 202
+
+
+class UnreachableLidarr:
+    def request(self, method, url, **kwargs):
+        raise ConnectionError('lidarr unavailable')
+
+
+def test_lookup_errors_are_reported_to_lidarr(api):
+    api.session = UnreachableLidarr()
+    client, _ = client_for(api)
+
+    response = client.post('/webhook', json=load('webhook', 'grab.json'))
+    assert response.status_code == 502
+    assert 'lidarr unavailable' in response.get_json()['error']
@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+from os import environ
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional
+from flask import Flask, Response, jsonify, request
+from api import Api
+from models.release import Release
+from models.track import WantedTrack
+
+logger = logging.getLogger("lidarr.webhook")
+
+# Lidarr webhook events that can introduce new wanted albums; every other event is acknowledged and ignored.
+INTAKE_EVENTS = ('Grab', 'AlbumAdd', 'ArtistAdd')
+
+IntakeItem = Release | WantedTrack
+
+
+class WebhookIntake:
+    """
+    Translates Lidarr webhook payloads into the same Release (or WantedTrack) items that
+    Api.iter_all_release_pages (or Api.iter_missing_tracks) produces, and puts them on a queue.
+
+    In tracks mode the queue can be handed to the downloader with forward and job_log, which is
+    what `python webhook.py serve` does.
+    """
+
+    def __init__(self, api: Api, intake_queue: "queue.Queue[IntakeItem]", items: Literal['releases', 'tracks'] = 'releases',
+                 events: Iterable[str] = INTAKE_EVENTS, logger: logging.Logger = logger):
+        self.api = api
+        self.queue = intake_queue
+        self.items = items
+        self.events = set(events)
+        self.logger = logger
+
+    def albums_for_event(self, payload: Dict[str, Any]) -> List[Any]:
+        """
+        Resolve the wanted albums an event refers to: the listed albums (Grab sends "albums", AlbumAdd a
+        single "album"), or every missing album of the artist.
+        """
+        albums_field = payload.get('albums') or ([payload['album']] if payload.get('album') else [])
+        album_ids = [album['id'] for album in albums_field if 'id' in album]
+        if album_ids:
+            albums = self.api.get_albums(album_ids)
+        elif (payload.get('artist') or {}).get('id'):
+            albums = self.api.get_artist_albums(payload['artist']['id'])
+        else:
+            return []
+        return [album for album in albums if self.api.is_missing(album)]
+
+    def items_for_event(self, payload: Dict[str, Any]) -> List[IntakeItem]:
+        items: List[IntakeItem] = []
+        for album in self.albums_for_event(payload):
+            if self.items == 'tracks':
+                items.extend(self.api.album_missing_tracks(album, self.api.get_album_tracks(album.id)))
+            else:
+                items.extend(self.api.album_releases(album, unique_tracks=True))
+        return items
+
+    def handle(self, payload: Dict[str, Any]) -> int:
+        """
+        Enqueue the items of one webhook payload.
+
+        :return: The number of items that were enqueued.
+        """
+        event_type = payload.get('eventType', '')
+        if event_type not in self.events:
+            self.logger.debug(f"Ignoring webhook event {event_type!r}")
+            return 0
+        items = self.items_for_event(payload)
+        for item in items:
+            self.queue.put(item)
+        self.logger.info(f"Webhook event {event_type!r} enqueued {len(items)} item(s)")
+        return len(items)
+
+
+def track_job(track: WantedTrack) -> Dict[str, Any]:
+    """
+    A wanted track as a download job for yt/downloader.py --jobs: the search query, the expected
+    duration in seconds and the tags to write into the file.
+    """
+    return {
+        'title': track.query,
+        'expected_duration': track.duration_seconds or None,
+        'tags': {'title': track.title, 'artist': track.artist, 'album': track.album},
+    }
+
+
+def job_log(path: str) -> Callable[[WantedTrack], None]:
+    """
+    A sink for forward that appends every track to `path` as one JSON download job per line; run
+    `python downloader.py --jobs <path>` on the file, or live on a FIFO.
+    """
+    lock = threading.Lock()
+
+    def write(track: WantedTrack) -> None:
+        with lock, open(path, 'a', encoding='utf-8') as fp:
+            fp.write(json.dumps(track_job(track)) + '\n')
+    return write
+
+
+def forward(intake_queue: "queue.Queue[IntakeItem]", sink: Callable[[Any], None], stop: Optional[threading.Event] = None,
+            logger: logging.Logger = logger) -> None:
+    """
+    Hand every queued item to `sink` until `stop` is set. An item the sink fails on is logged and skipped.
+    """
+    while stop is None or not stop.is_set():
+        try:
+            item = intake_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            sink(item)
+        except Exception as e:
+            logger.error(f"Failed to hand over {item!r}: {e}")
+        finally:
+            intake_queue.task_done()
+
+
+def create_app(intake: WebhookIntake, username: Optional[str] = None, password: Optional[str] = None, route: str = '/webhook') -> Flask:
+    """
+    Build a small Flask app that receives Lidarr webhooks on `route`.
+
+    When a non-empty username is given, requests must carry the matching basic auth credentials
+    configured on the Lidarr webhook connection.
+    """
+    app = Flask(__name__)
+
+    @app.post(route)
+    def receive_webhook():
+        if username:
+            auth = request.authorization
+            if auth is None or auth.username != username or auth.password != password:
+                return Response(status=401, headers={'WWW-Authenticate': 'Basic realm="lidarr-webhook"'})
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        try:
+            enqueued = intake.handle(payload)
+        except Exception as e:
+            intake.logger.error(f"Failed to handle webhook event {payload.get('eventType')!r}: {e}")
+            # Lidarr only logs failed deliveries, so answer with an error to make them visible there.
+            return jsonify({'error': str(e)}), 502
+        return jsonify({'eventType': payload.get('eventType'), 'enqueued': enqueued}), 202
+
+    return app
+
+
+def replay(url: str, payload_paths: Iterable[str], username: Optional[str] = None, password: Optional[str] = None) -> List[int]:
+    """
+    Local stand-in for Lidarr: post recorded webhook payloads to a running receiver.
+
+    :return: The HTTP status code of every delivery.
+    """
+    import requests
+    auth = (username, password or '') if username else None
+    statuses = []
+    for path in payload_paths:
+        with open(path, encoding='utf-8') as fp:
+            payload = json.load(fp)
+        response = requests.post(url, json=payload, auth=auth, timeout=30)
+        logger.info(f"Replayed {path} ({payload.get('eventType')}) -> {response.status_code} {response.text.strip()}")
+        statuses.append(response.status_code)
+    return statuses
+
+
+# Example usage:
+if __name__ == '__main__':
+    import dotenv
+    dotenv.load_dotenv('../.env')
+    logging.basicConfig(level=logging.INFO, format="[%(name)s] | %(asctime)s.%(msecs)03d - %(levelname)s - %(message)s", datefmt='%H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="Receive Lidarr webhooks and enqueue the wanted items")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Run the webhook receiver")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=int(environ.get('LIDARR_WEBHOOK_PORT', 5006)))
+    serve.add_argument("--jobs", default=environ.get('LIDARR_WEBHOOK_JOBS', 'tmp/webhook_jobs.jsonl'),
+                       help="File or FIFO the wanted tracks are appended to as download jobs, read by yt/downloader.py --jobs")
+    send = sub.add_parser("replay", help="Post recorded webhook payloads to a receiver")
+    send.add_argument("url", help="Receiver URL, e.g. http://127.0.0.1:5006/webhook")
+    send.add_argument("payloads", nargs="+", help="JSON files with recorded payloads")
+    args = parser.parse_args()
+
+    # sample.env leaves these empty, which means no auth.
+    username = environ.get('LIDARR_WEBHOOK_USER') or None
+    password = environ.get('LIDARR_WEBHOOK_PASSWORD') or None
+    if args.command == "replay":
+        replay(args.url, args.payloads, username, password)
+    else:
+        api = Api(host=environ['LIDARR_HOST'], port=int(environ['LIDARR_PORT']), api_key=environ['LIDARR_API'], ssl=bool(environ['LIDARR_SSL']))
+        intake_queue: "queue.Queue[IntakeItem]" = queue.Queue()
+        # Relative paths are resolved against the repository root, like the other tmp/ paths in sample.env.
+        jobs_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', args.jobs)
+        os.makedirs(os.path.dirname(os.path.abspath(jobs_path)), exist_ok=True)
+        logger.info(f"Handing wanted tracks to {os.path.realpath(jobs_path)}")
+        # Only tracks carry what a download needs (query, duration, tags), so the receiver runs in tracks mode.
+        threading.Thread(target=forward, args=(intake_queue, job_log(jobs_path)), daemon=True).start()
+        create_app(WebhookIntake(api, intake_queue, items='tracks'), username, password).run(host=args.host, port=args.port)
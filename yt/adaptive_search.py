@@ -0,0 +1,157 @@
+import logging
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Dict, Optional
+
+import helper
+from models.candidate import Candidate
+from models.video import VideoData
+from score import MatchResult, ScoringEngine
+from search import iter_search_pages
+from search_cache import SearchCache
+
+logger = logging.getLogger("adaptive_search")
+
+
+@dataclass
+class AdaptiveStats:
+    """
+    Counters of the adaptive lookups next to what the non-adaptive search would have cost: one
+    request for the first page and every one of its `page_size` results scored. Lookups that page
+    further cost more requests than that baseline, so saved_requests can be negative.
+    """
+    lookups: int = 0
+    requests: int = 0
+    candidates_fetched: int = 0
+    prefiltered: int = 0
+    scored: int = 0
+    early_exits: int = 0
+    extra_pages: int = 0
+    baseline_requests: int = 0
+    baseline_scored: int = 0
+
+    def merge(self, other: "AdaptiveStats") -> None:
+        """Add the counters of `other` (e.g. one lookup's) to these."""
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    @property
+    def saved_requests(self) -> int:
+        return self.baseline_requests - self.requests
+
+    @property
+    def saved_scoring_calls(self) -> int:
+        return self.baseline_scored - self.scored
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'saved_requests': self.saved_requests, 'saved_scoring_calls': self.saved_scoring_calls}
+
+    def summary(self) -> str:
+        return (f"{self.lookups} lookup(s): {self.requests} request(s) ({self.saved_requests} saved), "
+                f"{self.scored} candidate(s) scored ({self.saved_scoring_calls} saved, {self.prefiltered} prefiltered), "
+                f"{self.early_exits} early exit(s), {self.extra_pages} extra page(s)")
+
+
+class AdaptiveMatcher:
+    """
+    Selects the best video for a title while fetching and scoring as little as possible.
+
+    Candidates outside the ultra duration bounds are dropped before fuzzy matching. The first page is
+    scored in two slices, the top `first_slice` results and then the rest, and the lookup stops as soon
+    as the best score clears `confidence`. Further pages are only requested while the best score is
+    below `floor`, up to `max_pages`.
+    """
+
+    def __init__(self, engine: Optional[ScoringEngine] = None, first_slice: int = 5, confidence: float = 85.0, floor: float = 40.0,
+                 page_size: int = 20, max_pages: int = 3, cache: Optional[SearchCache] = None,
+                 pages: Callable[..., Any] = iter_search_pages, logger: logging.Logger = logger):
+        """
+        :param engine: Scoring engine, shared with the downloader.
+        :param first_slice: Results of the first page scored before the rest of it.
+        :param confidence: Best score at which the lookup stops immediately.
+        :param floor: Best score below which the next page is requested.
+        :param page_size: Results per page; YouTube returns about 20 per request regardless.
+        :param max_pages: Deepest page a hard lookup may reach.
+        :param pages: Page source with the signature of search.iter_search_pages.
+        """
+        self.engine = engine or ScoringEngine()
+        self.first_slice = max(1, first_slice)
+        self.confidence = confidence
+        self.floor = floor
+        self.page_size = page_size
+        self.max_pages = max(1, max_pages)
+        self.cache = cache
+        self.pages = pages
+        self.logger = logger
+        # Lookups run concurrently on the download pool; each counts into its own AdaptiveStats,
+        # which is merged into the totals under the lock when the lookup ends.
+        self.stats = AdaptiveStats()
+        self._stats_lock = threading.Lock()
+
+    def prefilter(self, video: Candidate) -> bool:
+        """Cheap check before fuzzy matching: the duration must be parseable and within the ultra bounds."""
+        w = self.engine.weights
+        try:
+            seconds = helper.to_seconds(video.duration)
+        except (AttributeError, IndexError, ValueError):
+            return False
+        return w.ultra_min_time <= seconds <= w.ultra_max_time
+
+    def find(self, title: str, bypass_cache: bool = False, expected_duration: Optional[float] = None,
+             before_request: Optional[Callable[[], Any]] = None) -> MatchResult:
+        """
+        :param expected_duration: Expected length in seconds; candidates too far from it are dropped with the prefilter.
+        :param before_request: Called before every live page request, e.g. the TokenBucket.acquire of the caller's SearchStage.
+        :return: MatchResult, like VideoDownloader.find_best_match.
+        """
+        stats = AdaptiveStats()
+        try:
+            return self._find(title, stats, bypass_cache, expected_duration, before_request)
+        finally:
+            with self._stats_lock:
+                self.stats.merge(stats)
+
+    def _find(self, title: str, stats: AdaptiveStats, bypass_cache: bool, expected_duration: Optional[float],
+              before_request: Optional[Callable[[], Any]]) -> MatchResult:
+        stats.lookups += 1
+        stats.baseline_requests += 1
+        stats.baseline_scored += self.page_size
+
+        best_video: Optional[Candidate] = None
+        best_score = 0.0
+        rejected = 0
+        pages = self.pages(title, page_size=self.page_size, max_pages=self.max_pages, cache=self.cache, bypass_cache=bypass_cache,
+                           before_request=before_request)
+        for page_index, (results, requests) in enumerate(pages):
+            stats.requests += requests
+            stats.candidates_fetched += len(results)
+            if page_index:
+                stats.extra_pages += 1
+            candidates = [video for video in (Candidate.from_result(result) for result in results) if self.prefilter(video)]
+            candidates, page_rejected = self.engine.reject_by_duration(candidates, expected_duration)
+            rejected += page_rejected
+            stats.prefiltered += len(results) - len(candidates)
+
+            slices = [candidates[:self.first_slice], candidates[self.first_slice:]] if page_index == 0 else [candidates]
+            for chunk in slices:
+                if not chunk:
+                    continue
+                video, score = self.engine.best_match(title, chunk, expected_duration=expected_duration)
+                stats.scored += len(chunk)
+                if video is not None and score > best_score:
+                    best_video, best_score = video, score
+                if best_score >= self.confidence:
+                    stats.early_exits += 1
+                    self.logger.debug("Confident match for %r after %s page(s): %.2f", title, page_index + 1, best_score)
+                    pages.close()
+                    return self._result(best_video, best_score, expected_duration, rejected)
+            if best_score >= self.floor:
+                break
+        pages.close()
+        return self._result(best_video, best_score, expected_duration, rejected)
+
+    @staticmethod
+    def _result(candidate: Optional[Candidate], score: float, expected_duration: Optional[float], rejected: int) -> MatchResult:
+        video: Optional[VideoData] = candidate.materialize() if candidate is not None else None
+        delta = helper.to_seconds(video.duration) - expected_duration if video is not None and expected_duration is not None else None
+        return MatchResult(video=video, score=score, duration_delta=delta, rejected=rejected)
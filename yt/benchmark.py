@@ -0,0 +1,543 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+from rapidfuzz import fuzz, process  # pyright: ignore[reportMissingImports]
+from legacy_score import legacy_compare_video
+from score import BATCH_MIN_CANDIDATES, KEYWORD_GROUPS, ScoringEngine
+from models.video import VideoData
+from models.candidate import Candidate
+from models.channel import Channel
+from models.viewcount import ViewCount
+
+# Candidate titles are built from these words so that every scoring step gets exercised.
+TITLE_WORDS: List[str] = [word for group in KEYWORD_GROUPS.values() for word in group] + [
+    "Official", "MUSIC", "Video", "Live-Stream", "(Official Video)", "(Official Audio)", "-", "|", "feat.",
+    "Architects", "Whiplash", "Gone", "With", "The", "Wind", "Behind", "the", "scenes", "Lyrics", "4K", "HD",
+    "Remastered", "2017", "Ep", "Topic", "É", "Ñ",
+]
+CHANNEL_NAMES: List[str] = ["Architects", "Epitaph Records", "Architects - Topic", "Reaction Central", "lyric vault"]
+PUBLISHED: List[Any] = [None, "", "2 weeks ago", "1 year ago", "7 years ago", "Streamed 3 years ago"]
+
+
+def synthetic_samples(count: int, seed: int = 1) -> List[Tuple[str, VideoData]]:
+    """
+    Build (query, candidate) pairs that cover every keyword group, the duration windows,
+    view counts, channel names and video ages.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        query = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 6)))
+        title = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 12)))
+        video = VideoData(
+            id=f"{rng.getrandbits(40):011x}",
+            title=title,
+            duration=f"{rng.randint(0, 25)}:{rng.randint(0, 59):02d}",
+            viewCount=ViewCount(short="", text=f"{rng.choice([0, 12, 999, 1001, 56789, 123456789]):,} views"),
+            channel=Channel(id="channel", link="", name=rng.choice(CHANNEL_NAMES), thumbnails=[]) if rng.random() < 0.9 else None,
+            publishedTime=rng.choice(PUBLISHED),
+        )
+        samples.append((query, video))
+    return samples
+
+
+def same_result(expected: Tuple[float, str, Any], actual: Tuple[float, str, Any], tolerance: float = 1e-9) -> bool:
+    """
+    Whether two (score, cleaned_title, steps) results agree: identical titles and step texts, and scores
+    (also the running score of every step) within `tolerance`, since the engine adds up in another order.
+    """
+    (score, title, steps), (other_score, other_title, other_steps) = expected, actual
+    if title != other_title or abs(score - other_score) > tolerance or len(steps) != len(other_steps):
+        return False
+    for step, other in zip(steps, other_steps):
+        if (step["step"], step["description"], step["change"]) != (other["step"], other["description"], other["change"]):
+            return False
+        if abs(step["score"] - other["score"]) > tolerance:
+            return False
+    return True
+
+
+def verify_engine_parity(samples: List[Tuple[str, VideoData]], engine: ScoringEngine, tolerance: float = 1e-9) -> List[Tuple[str, str]]:
+    """
+    Differential check of ScoringEngine.compare against the frozen pre-engine implementation
+    (legacy_score.legacy_compare_video), including the score steps.
+
+    :return: The (query, title) pairs that produced a different result.
+    """
+    mismatches = []
+    for query, video in samples:
+        if not same_result(legacy_compare_video(query, video, debug_output_object=True),
+                           engine.compare(query, video, debug_output_object=True), tolerance):
+            mismatches.append((query, video.title))
+    return mismatches
+
+
+def verify_batch_parity(samples: List[Tuple[str, VideoData]], engine: ScoringEngine, batch_size: int = 20,
+                        expected_duration: Optional[float] = None, tolerance: float = 1e-9) -> List[Tuple[str, str]]:
+    """
+    Differential check of ScoringEngine.score_batch, with each query scored against itself and the
+    following candidates (as time_batches does). The reference is legacy_compare_video; it has no
+    expected-duration rule, so with an `expected_duration` the batch is checked against compare instead.
+
+    :return: The (query, title) pairs whose batch score differs by more than `tolerance`.
+    """
+    if expected_duration is None:
+        reference: Callable[[str, VideoData], float] = lambda query, video: legacy_compare_video(query, video)[0]
+    else:
+        reference = lambda query, video: engine.compare(query, video, expected_duration=expected_duration)[0]
+    mismatches = []
+    for i in range(0, len(samples), batch_size):
+        queries = [query for query, _ in samples[i:i + batch_size]]
+        candidates = [video for _, video in samples[i:i + batch_size]]
+        scores = engine.score_batch(queries, candidates, expected_duration=expected_duration).scores
+        for q, query in enumerate(queries):
+            for c, video in enumerate(candidates):
+                if abs(scores[q, c] - reference(query, video)) > tolerance:
+                    mismatches.append((query, video.title))
+    return mismatches
+
+
+def time_scorer(scorer: Callable[[str, VideoData], Any], samples: List[Tuple[str, VideoData]], repeat: int) -> float:
+    """Best wall-clock time of `repeat` passes over the samples."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query, video in samples:
+            scorer(query, video)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_batches(engine: ScoringEngine, samples: List[Tuple[str, VideoData]], repeat: int, batch_size: int = 20,
+                 batched: bool = True) -> float:
+    """
+    Best time of scoring the samples per query and its `batch_size` candidates, as one score_batch
+    call or (batched=False) as one compare per candidate.
+    """
+    batches = [
+        (samples[i][0], [video for _, video in samples[i:i + batch_size]])
+        for i in range(0, len(samples), batch_size)
+    ]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query, candidates in batches:
+            if batched:
+                engine.score_batch(query, candidates)
+            else:
+                for video in candidates:
+                    engine.compare(query, video)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_candidate_counts(engine: ScoringEngine, samples: List[Tuple[str, VideoData]], repeat: int,
+                           counts: Iterable[int] = (8, 20, 32, BATCH_MIN_CANDIDATES, 128)) -> Dict[int, Dict[str, float]]:
+    """Queries per second of compare and score_batch by candidates per query; best_match switches at BATCH_MIN_CANDIDATES."""
+    by_count: Dict[int, Dict[str, float]] = {}
+    for count in counts:
+        queries = -(-len(samples) // count)
+        by_count[count] = {
+            "compare_queries_per_second": queries / time_batches(engine, samples, repeat, count, batched=False),
+            "batch_queries_per_second": queries / time_batches(engine, samples, repeat, count),
+        }
+    return by_count
+
+
+def bench_scoring(samples: List[Tuple[str, VideoData]], repeat: int = 5) -> Dict[str, Any]:
+    engine = ScoringEngine()
+    mismatches = verify_engine_parity(samples, engine)
+    batch_mismatches = verify_batch_parity(samples, engine) + verify_batch_parity(samples, engine, expected_duration=240)
+    legacy = time_scorer(lambda query, video: legacy_compare_video(query, video), samples, repeat)
+    compiled = time_scorer(lambda query, video: engine.compare(query, video), samples, repeat)
+    batched = time_batches(engine, samples, repeat)
+    return {
+        "samples": len(samples),
+        "mismatches": len(mismatches),
+        "batch_mismatches": len(batch_mismatches),
+        "legacy_per_second": len(samples) / legacy,
+        "engine_per_second": len(samples) / compiled,
+        "batch_per_second": len(samples) / batched,
+        "speedup": legacy / compiled,
+        "batch_speedup": legacy / batched,
+        "batch_min_candidates": BATCH_MIN_CANDIDATES,
+        "by_candidates": bench_candidate_counts(engine, samples, repeat),
+    }
+
+
+# Distractors that a search for "<artist> - <title>" typically returns next to the official upload.
+DISTRACTORS: List[Tuple[str, str, str]] = [
+    ("{title} (Live at Wembley)", "6:12", "{artist} Fans"),
+    ("{title} - {artist} (Cover)", "4:01", "Garage Covers"),
+    ("{artist} - {title} REACTION", "14:55", "Reaction Central"),
+    ("{title} (Extended Mix)", "9:48", "Mix Vault"),
+    ("{title} slowed + reverb", "5:20", "lofi edits"),
+    ("{artist} - {title} (Lyrics)", "4:05", "lyric vault"),
+    ("{artist} Full Album", "48:10", "{artist}"),
+]
+ARTISTS: List[str] = ["Architects", "Bring Me The Horizon", "Sleep Token", "Spiritbox", "Parkway Drive", "Polaris"]
+TITLES: List[str] = ["Whiplash", "Doomsday", "Kingslayer", "Vore", "Holy Roller", "Crushed", "Inferno", "Gone With The Wind"]
+
+
+def raw_result(video_id: str, title: str, duration: str, channel: str, views: int, published: str) -> Dict[str, Any]:
+    """A search result shaped like youtubesearchpython's VideosSearch output."""
+    return {
+        'type': 'video', 'id': video_id, 'title': title, 'publishedTime': published, 'duration': duration,
+        'viewCount': {'text': f"{views:,} views", 'short': ''},
+        'thumbnails': [{'url': f'https://i.ytimg.com/vi/{video_id}/hq720.jpg', 'width': 360, 'height': 202}],
+        'richThumbnail': None, 'descriptionSnippet': None,
+        'channel': {'name': channel, 'id': 'UC' + video_id, 'thumbnails': [], 'link': f'https://www.youtube.com/channel/UC{video_id}'},
+        'accessibility': {'title': title, 'duration': duration},
+        'link': f'https://www.youtube.com/watch?v={video_id}', 'shelfTitle': None,
+    }
+
+
+def synthetic_fixtures(count: int, seed: int = 1, results_per_query: int = 20) -> List[Dict[str, Any]]:
+    """
+    Generated cases in the fixture format: the official upload is placed at a random rank between
+    distractors and unrelated results. Useful for timing at scale, not for accuracy.
+    """
+    rng = random.Random(seed)
+    fixtures = []
+    for _ in range(count):
+        artist, title = rng.choice(ARTISTS), rng.choice(TITLES)
+        official_id = f"{rng.getrandbits(40):011x}"
+        results = [raw_result(official_id, f"{artist} - {title} (Official Audio)", f"{rng.randint(3, 4)}:{rng.randint(0, 59):02d}",
+                              f"{artist} - Topic" if rng.random() < 0.5 else artist, rng.randint(10_000, 50_000_000), "3 years ago")]
+        for template, duration, channel in rng.sample(DISTRACTORS, k=min(len(DISTRACTORS), results_per_query - 1)):
+            results.append(raw_result(f"{rng.getrandbits(40):011x}", template.format(artist=artist, title=title), duration,
+                                      channel.format(artist=artist), rng.randint(100, 5_000_000), rng.choice(PUBLISHED) or "1 year ago"))
+        while len(results) < results_per_query:
+            results.append(raw_result(f"{rng.getrandbits(40):011x}", f"{rng.choice(ARTISTS)} - {rng.choice(TITLES)}",
+                                      f"{rng.randint(2, 7)}:{rng.randint(0, 59):02d}", rng.choice(CHANNEL_NAMES), rng.randint(0, 1_000_000), "2 weeks ago"))
+        official = results.pop(0)
+        results.insert(rng.randrange(len(results) + 1), official)
+        fixtures.append({'query': f"{title} - {artist}", 'expected': [official_id], 'result': results})
+    return fixtures
+
+
+# Labeled search results the accuracy suite runs on by default.
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "accuracy.jsonl")
+
+
+def load_fixtures(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Read fixtures: JSONL files with one {"query", "expected": [video ids], "result": [raw search results]} per line,
+    and optionally "source": "recorded" (captured with record_fixtures) or "curated" (written by hand).
+    """
+    fixtures = []
+    for path in paths:
+        with open(path, encoding="utf-8") as fp:
+            fixtures.extend(json.loads(line) for line in fp if line.strip())
+    return fixtures
+
+
+def record_fixtures(labels_path: str, out_path: str, max_results: int = 20) -> int:
+    """
+    Search live for every labeled query ({"query", "expected"} per line) and store the payloads as fixtures.
+
+    :return: The number of recorded fixtures.
+    """
+    from search import search_youtube_unofficial
+    count = 0
+    with open(labels_path, encoding="utf-8") as labels, open(out_path, "a", encoding="utf-8") as out:
+        for line in labels:
+            if not line.strip():
+                continue
+            label = json.loads(line)
+            payload = search_youtube_unofficial(label["query"], max_results)
+            payload = json.loads(payload) if isinstance(payload, str) else payload
+            out.write(json.dumps({"query": label["query"], "expected": label["expected"], "source": "recorded",
+                                  "result": payload.get("result", [])}) + "\n")
+            count += 1
+    return count
+
+
+def rank_with(scorer: Callable[[str, List[VideoData]], List[float]], query: str, candidates: List[VideoData]) -> List[str]:
+    """Video ids ordered by descending score; ties keep the search order like find_best_match."""
+    scores = scorer(query, candidates)
+    order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+    return [candidates[i].id for i in order]
+
+
+def allocated_bytes(parse: Callable[[Dict[str, Any]], Any], fixtures: List[Dict[str, Any]]) -> int:
+    """Memory held by the parsed candidates of every fixture."""
+    tracemalloc.start()
+    parsed = [[parse(raw) for raw in fixture["result"]] for fixture in fixtures]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return allocated
+
+
+def bench_accuracy(fixtures: List[Dict[str, Any]], repeat: int = 3) -> Dict[str, Any]:
+    """
+    Speed and match quality of every scoring path on labeled fixtures.
+
+    Accuracy is top-1/top-3 over the cases; `per_step_seconds` splits the batch path into its stages
+    and is given per query.
+    """
+    engine = ScoringEngine()
+    start = time.perf_counter()
+    cases = [(fixture["query"], set(fixture["expected"]), [VideoData.parse_video_data(raw) for raw in fixture["result"]])
+             for fixture in fixtures]
+    parse_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for fixture in fixtures:
+        [Candidate.from_result(raw) for raw in fixture["result"]]
+    projection_seconds = time.perf_counter() - start
+
+    scorers: Dict[str, Callable[[str, List[VideoData]], List[float]]] = {
+        "legacy": lambda query, videos: [legacy_compare_video(query, video)[0] for video in videos],
+        "engine": lambda query, videos: [engine.compare(query, video)[0] for video in videos],
+        "batch": lambda query, videos: engine.score_batch(query, videos).scores[0].tolist() if videos else [],
+    }
+    results: Dict[str, Any] = {}
+    for name, scorer in scorers.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query, _, candidates in cases:
+                scorer(query, candidates)
+            best = min(best, time.perf_counter() - start)
+        top1 = top3 = 0
+        for query, expected, candidates in cases:
+            ranking = rank_with(scorer, query, candidates)
+            top1 += bool(ranking[:1] and ranking[0] in expected)
+            top3 += bool(expected.intersection(ranking[:3]))
+        results[name] = {
+            "queries_per_second": len(cases) / best if best else 0.0,
+            "top1": top1 / len(cases) if cases else 0.0,
+            "top3": top3 / len(cases) if cases else 0.0,
+        }
+
+    # Stage costs of the batch path; the stages mirror ScoringEngine.score_batch.
+    steps = {"features": 0.0, "fuzzy": 0.0}
+    for query, _, candidates in cases:
+        start = time.perf_counter()
+        features = [engine.candidate_features(video) for video in candidates]
+        steps["features"] += time.perf_counter() - start
+        start = time.perf_counter()
+        process.cdist([query.lower()], [f.cleaned_title for f in features], scorer=fuzz.ratio)
+        steps["fuzzy"] += time.perf_counter() - start
+    per_query = max(1, len(cases))
+    per_step = {"parse": parse_seconds / per_query, "parse_projection": projection_seconds / per_query, **{name: seconds / per_query for name, seconds in steps.items()},
+                "batch_total": 1 / results["batch"]["queries_per_second"] if results["batch"]["queries_per_second"] else 0.0}
+    return {
+        "cases": len(cases),
+        "candidates": sum(len(candidates) for _, _, candidates in cases),
+        "scorers": results,
+        "per_step_seconds": per_step,
+        "normalization_cache": engine.cache_stats(),
+        "allocated_bytes_per_query": {
+            "video_data": allocated_bytes(VideoData.parse_video_data, fixtures) / per_query,
+            "candidate": allocated_bytes(Candidate.from_result, fixtures) / per_query,
+        },
+    }
+
+
+@contextlib.contextmanager
+def serve_media(items: int, size: int, seed: int = 1) -> Generator[List[str], None, None]:
+    """Serve `items` random .mp3 files of `size` bytes over HTTP on localhost; yields their URLs."""
+    import functools
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args) -> None:
+            pass
+
+    class QuietServer(ThreadingHTTPServer):
+        def handle_error(self, request, client_address) -> None:
+            # yt-dlp's generic extractor closes its probe connection before the body is sent.
+            pass
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as media_dir:
+        for index in range(items):
+            with open(os.path.join(media_dir, f"track{index}.mp3"), "wb") as fp:
+                fp.write(rng.randbytes(size))
+        server = QuietServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=media_dir))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield [f"http://127.0.0.1:{server.server_address[1]}/track{index}.mp3" for index in range(items)]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def bench_sessions(items: int = 20, size: int = 256 * 1024, workers: int = 1) -> Dict[str, Any]:
+    """
+    Per-item cost of downloading locally served media with a new YoutubeDL per item (what download_audio
+    did) against the per-worker sessions of YoutubeDLSessions. Both download the same files; the
+    difference is the setup overhead that reuse saves.
+    """
+    import yt_dlp
+    from ytdl_session import YoutubeDLSessions
+
+    opts = {'quiet': True, 'no_warnings': True, 'noprogress': True, 'format': 'bestaudio/best'}
+
+    def fresh(url: str, outtmpl: str) -> None:
+        with yt_dlp.YoutubeDL({**opts, 'outtmpl': outtmpl}) as ydl:
+            ydl.download([url])
+
+    def run(download: Callable[[str, str], Any], urls: List[str], out_dir: str) -> float:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda item: download(item[1], os.path.join(out_dir, f"{item[0]}.%(ext)s")), enumerate(urls)))
+        return time.perf_counter() - start
+
+    with serve_media(items, size) as urls, tempfile.TemporaryDirectory() as out_dir:
+        fresh_seconds = run(fresh, urls, os.path.join(out_dir, "fresh"))
+        with YoutubeDLSessions(opts) as sessions:
+            session_seconds = run(sessions.download, urls, os.path.join(out_dir, "session"))
+            created = sessions.created
+        downloaded = len(os.listdir(os.path.join(out_dir, "fresh"))) + len(os.listdir(os.path.join(out_dir, "session")))
+
+    return {
+        "items": items,
+        "size": size,
+        "workers": workers,
+        "downloaded": downloaded,
+        "sessions_created": created,
+        "fresh_ms_per_item": fresh_seconds / items * 1000,
+        "session_ms_per_item": session_seconds / items * 1000,
+        "saved_ms_per_item": (fresh_seconds - session_seconds) / items * 1000,
+        "speedup": fresh_seconds / session_seconds if session_seconds else float("inf"),
+    }
+
+
+def bench_finalize(sizes: Iterable[int], repeat: int = 3, base_dir: Optional[str] = None, cross_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Milliseconds per file to move a finished download into the library with safe_copy (chunked copy,
+    CRC re-read) and with finalize_file: a rename on the same filesystem, and the kernel-side copy path
+    (with and without verification) that a move across filesystems takes.
+
+    :param base_dir: Directory for the source and library files, a temporary one by default.
+    :param cross_dir: Library directory on another filesystem (e.g. /dev/shm) to time a real cross-device move.
+    """
+    import helper
+
+    def timed(move: Callable[[str, str], Any], size: int, src_dir: str, dest_dir: str) -> float:
+        payload = os.urandom(size)
+        total = 0.0
+        for index in range(repeat):
+            src = os.path.join(src_dir, f"src{index}.bin")
+            dest = os.path.join(dest_dir, f"dest{index}.bin")
+            with open(src, "wb") as fp:
+                fp.write(payload)
+            start = time.perf_counter()
+            move(src, dest)
+            total += time.perf_counter() - start
+            for path in (src, dest):
+                if os.path.exists(path):
+                    os.unlink(path)
+        return total / repeat * 1000
+
+    def copy_path(verify: bool) -> Callable[[str, str], None]:
+        def move(src: str, dest: str) -> None:
+            helper.copy_into_place(src, dest, verify=verify)
+            os.unlink(src)
+        return move
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(dir=base_dir) as work:
+        src_dir, dest_dir = os.path.join(work, "progress"), os.path.join(work, "ready")
+        os.makedirs(src_dir)
+        os.makedirs(dest_dir)
+        cross = None
+        if cross_dir is not None and os.stat(cross_dir).st_dev != os.stat(work).st_dev:
+            cross = tempfile.mkdtemp(dir=cross_dir)
+        try:
+            for size in sizes:
+                row = {
+                    "safe_copy": timed(helper.safe_copy, size, src_dir, dest_dir),
+                    "finalize_rename": timed(helper.finalize_file, size, src_dir, dest_dir),
+                    "kernel_copy": timed(copy_path(False), size, src_dir, dest_dir),
+                    "kernel_copy_verify": timed(copy_path(True), size, src_dir, dest_dir),
+                }
+                if cross is not None:
+                    row["safe_copy_cross_device"] = timed(helper.safe_copy, size, src_dir, cross)
+                    row["finalize_cross_device"] = timed(helper.finalize_file, size, src_dir, cross)
+                results[str(size)] = row
+        finally:
+            if cross is not None:
+                import shutil
+                shutil.rmtree(cross, ignore_errors=True)
+    return {"repeat": repeat, "ms_per_file": results}
+
+
+if __name__ == "__main__":
+    import logging
+    parser = argparse.ArgumentParser(description="Scoring benchmarks and accuracy suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    scoring = sub.add_parser("scoring", help="Differential check and microbenchmark of the legacy compare_video, ScoringEngine.compare and score_batch")
+    scoring.add_argument("--samples", type=int, default=5000)
+    scoring.add_argument("--repeat", type=int, default=5)
+    scoring.add_argument("--seed", type=int, default=1)
+    accuracy = sub.add_parser("accuracy", help="Speed and top-1/top-3 accuracy of every scoring path on labeled fixtures")
+    accuracy.add_argument("fixtures", nargs="*", default=[DEFAULT_FIXTURES], help="Fixture files (JSONL), default: fixtures/accuracy.jsonl")
+    accuracy.add_argument("--synthetic", action="store_true",
+                          help="Score generated cases instead; they follow the scorer's own assumptions, so only their speed is meaningful")
+    accuracy.add_argument("--cases", type=int, default=500, help="Number of synthetic cases")
+    accuracy.add_argument("--repeat", type=int, default=3)
+    accuracy.add_argument("--seed", type=int, default=1)
+    accuracy.add_argument("--json", action="store_true", help="Print machine-readable results")
+    record = sub.add_parser("record", help="Record live search payloads for labeled queries as fixtures")
+    record.add_argument("labels", help='JSONL with {"query": .., "expected": [video ids]} per line')
+    record.add_argument("out", help="Fixture file (JSONL) the recordings are appended to")
+    sessions = sub.add_parser("sessions", help="Per-item overhead of a new YoutubeDL per download vs reused sessions, on local media")
+    sessions.add_argument("--items", type=int, default=20)
+    sessions.add_argument("--size", type=int, default=256 * 1024, help="Bytes per served file")
+    sessions.add_argument("--workers", type=int, default=1)
+    finalize = sub.add_parser("finalize", help="Moving finished files into the library: safe_copy vs finalize_file, across file sizes")
+    finalize.add_argument("--sizes", default="1048576,8388608,67108864,268435456", help="Comma-separated file sizes in bytes")
+    finalize.add_argument("--repeat", type=int, default=3)
+    finalize.add_argument("--dir", default=None, help="Directory to benchmark in (default: system temp dir)")
+    finalize.add_argument("--cross-dir", default="/dev/shm", help="Directory on another filesystem for the cross-device case")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        print(f"Recorded {record_fixtures(args.labels, args.out)} fixture(s) to {args.out}")
+        raise SystemExit(0)
+
+    # legacy_compare_video logs every step at DEBUG; keep logging out of the measurement.
+    logging.disable(logging.CRITICAL)
+    if args.command == "scoring":
+        result = bench_scoring(synthetic_samples(args.samples, args.seed), args.repeat)
+        print(json.dumps(result, indent=2))
+        print(f"{'candidates':>10} | {'compare q/s':>11} | {'batch q/s':>11} | best_match uses")
+        for count, rates in result["by_candidates"].items():
+            print(f"{count:>10} | {rates['compare_queries_per_second']:>11.1f} | {rates['batch_queries_per_second']:>11.1f} | "
+                  f"{'score_batch' if count >= result['batch_min_candidates'] else 'compare'}")
+        if result["mismatches"] or result["batch_mismatches"]:
+            raise SystemExit(1)
+    elif args.command == "finalize":
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        cross_dir = args.cross_dir if args.cross_dir and os.path.isdir(args.cross_dir) else None
+        print(json.dumps(bench_finalize(sizes, args.repeat, args.dir, cross_dir), indent=2))
+    elif args.command == "sessions":
+        print(json.dumps(bench_sessions(args.items, args.size, args.workers), indent=2))
+    elif args.command == "accuracy":
+        fixtures = synthetic_fixtures(args.cases, args.seed) if args.synthetic else load_fixtures(args.fixtures)
+        result = bench_accuracy(fixtures, args.repeat)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"{result['cases']} cases, {result['candidates']} candidates")
+            print(f"{'scorer':<14} | {'queries/s':>10} | {'top-1':>6} | {'top-3':>6}")
+            for name, scores in result["scorers"].items():
+                print(f"{name:<14} | {scores['queries_per_second']:>10.1f} | {scores['top1']:>6.1%} | {scores['top3']:>6.1%}")
+            for name, seconds in result["per_step_seconds"].items():
+                print(f"{name:<16} | {seconds * 1e6:>10.1f} us/query")
+            for name, allocated in result["allocated_bytes_per_query"].items():
+                print(f"{name:<16} | {allocated:>10.0f} bytes/query")
@@ -5,6 +5,7 @@ import io
 import webbrowser
 import pathlib 
 import json
+from typing import List, Optional
 
 def format_debug_steps(debug_steps: list, as_html: bool = False) -> str:
     """
@@ -50,15 +51,16 @@ def format_debug_steps(debug_steps: list, as_html: bool = False) -> str:
 
 
 
-def write_debug_log(debug_entries: list, title: str, best_video_title: str, logger: logging.Logger) -> None:
+def render_debug_html(debug_entries: list, title: str) -> str:
     """
-    Write the debug information into an HTML file and open it in a browser.
+    Render the debug entries of one search as an HTML page.
 
     Args:
         debug_entries (list): List of debug data entries.
         title (str): The original search title.
-        best_video_title (str): Title of the best matching video.
-        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        str: The HTML document.
     """
     html_parts = []
     html_parts.append("<html><head><meta charset='UTF-8'><title>Debug Log</title></head><body>")
@@ -74,19 +76,84 @@ def write_debug_log(debug_entries: list, title: str, best_video_title: str, logg
         html_parts.append(format_debug_steps(entry['debug'], as_html=True))
     
     html_parts.append("</body></html>")
-    html_output = "\n".join(html_parts)
+    return "\n".join(html_parts)
+
+
+def write_debug_log(debug_entries: list, title: str, best_video_title: str, logger: logging.Logger,
+                    debug_dir: str = "/tmp/debug", open_browser: bool = True) -> pathlib.Path:
+    """
+    Write the debug information into an HTML file and open it in a browser.
+
+    Args:
+        debug_entries (list): List of debug data entries.
+        title (str): The original search title.
+        best_video_title (str): Title of the best matching video.
+        logger (logging.Logger): Logger instance for logging.
+        debug_dir (str): Directory the HTML file is written to.
+        open_browser (bool): Open the written file in a browser tab.
+
+    Returns:
+        pathlib.Path: Path of the written file.
+    """
+    html_output = render_debug_html(debug_entries, title)
     
     # Ensure the debug directory exists.
-    debug_dir = pathlib.Path("/tmp/debug")
-    debug_dir.mkdir(parents=True, exist_ok=True)
+    debug_path = pathlib.Path(debug_dir)
+    debug_path.mkdir(parents=True, exist_ok=True)
     
     # Create a safe file name based on the video title.
     file_name = f"{slugify.slugify(best_video_title or 'no-match-found', lowercase=True)}.html"
-    file_path = debug_dir / file_name
+    file_path = debug_path / file_name
     
     # Write and open the debug HTML file.
     with io.open(file_path, 'w+', encoding='utf-8') as fp:
         fp.write(html_output)
     
-    webbrowser.open_new_tab(file_path.as_uri())
-    logger.info(f"Wrote debug log at {file_path}")
+    if open_browser:
+        webbrowser.open_new_tab(file_path.as_uri())
+    logger.info("Wrote debug log at %s", file_path)
+    return file_path
+
+
+def render_traces(trace_path: str, out_dir: str, logger: logging.Logger, query: Optional[str] = None) -> List[pathlib.Path]:
+    """
+    Offline rendering of a ScoreTracer JSONL file: one HTML page per traced search.
+
+    Args:
+        trace_path (str): JSONL file written by ScoreTracer.
+        out_dir (str): Directory the HTML files are written to.
+        logger (logging.Logger): Logger instance for logging.
+        query (Optional[str]): Only render traces of this query.
+
+    Returns:
+        List[pathlib.Path]: Paths of the written files.
+    """
+    from score_trace import read_traces
+    written = []
+    for trace in read_traces(trace_path):
+        if query is not None and trace["query"] != query:
+            continue
+        best = next((c for c in trace["candidates"] if c["video_id"] == trace["best_video_id"]), None)
+        best_title = best["video_data"].get("title") if best else None
+        written.append(write_debug_log(trace["candidates"], trace["query"], f"{best_title or 'no-match-found'}-{int(trace['ts'])}",
+                                       logger, debug_dir=out_dir, open_browser=False))
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="[%(name)s] | %(asctime)s.%(msecs)03d - %(levelname)s - %(message)s", datefmt='%H:%M:%S')
+    parser = argparse.ArgumentParser(description="Score trace tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    render = sub.add_parser("render", help="Render a score trace (JSONL) into HTML debug pages")
+    render.add_argument("trace", help="JSONL file written by ScoreTracer")
+    render.add_argument("--out", default="/tmp/debug", help="Output directory (default: /tmp/debug)")
+    render.add_argument("--query", help="Only render traces of this query")
+    render.add_argument("--open", action="store_true", help="Open the rendered pages in a browser")
+    args = parser.parse_args()
+
+    pages = render_traces(args.trace, args.out, logging.getLogger("debug"), query=args.query)
+    for page in pages:
+        print(page)
+        if args.open:
+            webbrowser.open_new_tab(page.as_uri())
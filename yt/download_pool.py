@@ -0,0 +1,135 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Generator, Iterable, Optional
+
+from models.video import VideoData
+from postprocess import TrackTags, resolve_audio_path
+
+logger = logging.getLogger("download_pool")
+
+
+@dataclass
+class DownloadJob:
+    """
+    One item of work for VideoDownloader.run_job: a title to search for, or a known video id.
+
+    Every job downloads into its own directory under the downloader's tmp_dir, so concurrent jobs
+    (even for the same video) never share a temp file.
+    """
+    title: Optional[str] = None
+    video_id: Optional[str] = None
+    dest_dir: Optional[str] = None
+    dest_name: Optional[str] = None
+    expected_duration: Optional[float] = None
+    bypass_cache: bool = False
+    debug: bool = False
+    # Known metadata (e.g. from Lidarr); wins over identification when the file is tagged.
+    tags: Optional[TrackTags] = None
+    work_dir: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def label(self) -> str:
+        return self.title or self.video_id or "<empty job>"
+
+    def prepare(self, tmp_root: str) -> str:
+        """Create the job's private directory under `tmp_root`."""
+        if self.work_dir is None:
+            os.makedirs(tmp_root, exist_ok=True)
+            self.work_dir = tempfile.mkdtemp(prefix="job-", dir=tmp_root)
+        return self.work_dir
+
+    @property
+    def tmp_file_path(self) -> str:
+        """Path of the download without extension; yt-dlp adds the extension of the output codec."""
+        if self.work_dir is None:
+            raise RuntimeError("DownloadJob.prepare() must be called before the job is downloaded")
+        return os.path.join(self.work_dir, "audio")
+
+    @property
+    def extensioned_filename(self) -> str:
+        """The downloaded file: .mp3, or .opus/.ogg/.m4a in passthrough mode."""
+        return resolve_audio_path(self.tmp_file_path)
+
+    def cleanup(self) -> None:
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+
+@dataclass
+class JobResult:
+    job: DownloadJob
+    path: Optional[str] = None
+    video: Optional[VideoData] = None
+    score: float = 0.0
+    stage: str = "done"
+    error: Optional[Exception] = None
+    seconds: float = 0.0
+    tags: Optional[TrackTags] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None and self.error is None
+
+
+class DownloadPool:
+    """
+    Runs download jobs (search, download, identify, move) on a pool of worker threads and yields
+    every result as soon as its job finishes.
+
+    Live searches still go through the downloader's search stage, so its rate limit holds however
+    many workers run. Searches and downloads overlap across jobs: while one worker waits on yt-dlp,
+    another is already searching.
+    """
+
+    def __init__(self, downloader: Any, workers: int = 4, search_stage: Optional[Any] = None, logger: logging.Logger = logger):
+        """
+        :param downloader: VideoDownloader whose run_job executes each job.
+        :param workers: Jobs running at once.
+        :param search_stage: SearchStage for the live searches, defaults to the downloader's own.
+        """
+        self.downloader = downloader
+        self.workers = max(1, workers)
+        self.search_stage = search_stage
+        self.logger = logger
+
+    def _run(self, job: DownloadJob) -> JobResult:
+        start = time.perf_counter()
+        try:
+            result = self.downloader.run_job(job, search_stage=self.search_stage)
+        except Exception as e:
+            self.logger.error(f"Job {job.label!r} failed: {e}")
+            job.cleanup()
+            result = JobResult(job=job, stage="error", error=e)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def run(self, jobs: Iterable[DownloadJob]) -> Generator[JobResult, None, None]:
+        """
+        Run every job, yielding results in completion order.
+
+        Jobs are pulled lazily, at most `workers * 2` ahead of the consumer.
+        """
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="download") as executor:
+            running: set[Future] = set()
+
+            def submit_next() -> bool:
+                for job in jobs:
+                    running.add(executor.submit(self._run, job))
+                    return True
+                return False
+
+            while len(running) < self.workers * 2 and submit_next():
+                pass
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    submit_next()
+                    yield future.result()
@@ -1,35 +1,33 @@
 import logging
 import os
 import argparse
-import subprocess
 import json
 import random
 from youtubesearchpython import Video
-import yt_dlp
 import helper 
 import dotenv
 from debug import write_debug_log
 from playlist import parse_playlist
 
 from os import environ
-from score import compare_video
+from score import MatchResult, ScoringEngine
 from models.video import VideoData
-from typing import Generator, Optional, Tuple, List
+from models.candidate import Candidate
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, Tuple, List
 from thumbnail import ThumbnailDownloader
 from os.path import join, realpath, dirname
-from identify import detect_and_update_tags
-from search import search_youtube_unofficial
+from identify import recognize_tags
+from postprocess import AUDIO_EXTENSIONS, TrackTags, audio_extension, read_tags, resolve_audio_path, write_tags
+from search import iter_search_pages, search_youtube_unofficial
+from search_cache import SearchCache
+from search_stage import SearchStage, query_variants
+from score_trace import ScoreTracer
+from adaptive_search import AdaptiveMatcher
+from download_pool import DownloadJob, DownloadPool, JobResult
+from ytdl_session import YoutubeDLSessions
+from providers import SearchProvider, provider_from_names
 from helper import parse_youtube_url_to_id
 
-# Monkey-patch httpx to remove the 'proxies' argument, fixing the error in youtubesearchpython.
-import httpx
-
-original_post = httpx.post
-def patched_post(*args, **kwargs):
-    kwargs.pop('proxies', None)
-    return original_post(*args, **kwargs)
-httpx.post = patched_post
-
 dotenv.load_dotenv(os.path.join(os.path.dirname(__file__), "../.env"))
 
 logging.basicConfig(
@@ -44,15 +42,34 @@ class VideoDownloader:
     A class to search for a video by title, download its audio using yt-dlp,
     and move the resulting file to a chosen destination.
     """
-    def __init__(self, tmp_dir='tmp/progress', dest_dir=None, bitrate:int=360, suffix: str=".mp3", try_identify: bool = True, logger: logging.Logger = logger):
+    def __init__(self, tmp_dir='tmp/progress', dest_dir=None, bitrate:int=360, suffix: str=".mp3", try_identify: bool = True, logger: logging.Logger = logger,
+                 post_move_hook: Optional[Callable[[str], None]] = None, search_cache: Optional[SearchCache] = None,
+                 tracer: Optional[ScoreTracer] = None, adaptive: Optional[AdaptiveMatcher] = None, fan_out: Optional[bool] = None,
+                 provider: Optional[SearchProvider] = None, ydl_sessions: Optional[YoutubeDLSessions] = None,
+                 output_format: Optional[str] = None):
         """
         Initializes the downloader with default properties.
         
         :param tmp_dir: Directory to download the audio (default: '/tmp').
         :param dest_dir: Final destination directory for the audio file.
+        :param post_move_hook: Called with the final path of every file moved into the library, e.g. to
+                               hand it to lidarr/notify.py, which batches Lidarr rescans (see --moved_log).
+        :param search_cache: Cache for search results; defaults to the file in YT_SEARCH_CACHE (tmp/search_cache.sqlite3).
+        :param tracer: Records the score steps of a sample of searches; defaults to YT_SCORE_TRACE
+                       sampled at YT_SCORE_TRACE_RATE, and is off when YT_SCORE_TRACE is unset.
+        :param adaptive: Fetches and scores results in stages and stops once a match is confident;
+                         enabled by default with YT_ADAPTIVE_SEARCH=1. Debug lookups always use the full search.
+        :param fan_out: Search several query variants of a title concurrently and score the merged candidates;
+                        defaults to YT_SEARCH_FANOUT=1.
+        :param provider: Search backend; defaults to the providers listed in YT_SEARCH_PROVIDERS, with failover
+                         (and hedging after YT_SEARCH_HEDGE_AFTER seconds) when more than one is listed.
+        :param ydl_sessions: Per-thread YoutubeDL instances reused for every download and playlist extraction.
+        :param output_format: "mp3" re-encodes every download to MP3; "native" keeps YouTube's audio stream
+                              (Opus in Ogg, AAC in M4A) and only remuxes it. Defaults to YT_OUTPUT_FORMAT, mp3.
         """
         self.tmp_dir = realpath(join(dirname(__file__), '..', tmp_dir))
         self.dest_dir = dest_dir
+        # Paths of the last download_audio call made without a job, kept for single-threaded callers.
         self.extensioned_filename: str 
         self.tmp_file_path: str = realpath(join(self.tmp_dir, str(random.randrange(11111111, 999999999))))
         self.tmp_file_path = realpath(self.tmp_file_path if self.tmp_file_path.endswith(".mp3") else self.tmp_file_path + ".mp3")
@@ -61,16 +78,90 @@ class VideoDownloader:
         self.source: str = "https://github.com/ScarlettSamantha/lidarrytdlsc"
         self.try_identify: bool = try_identify
         self.logger: logging.Logger = logger
-
-    def find_best_match(self, title, debug: bool = True):
+        self.post_move_hook: Optional[Callable[[str], None]] = post_move_hook
+        self.scorer: ScoringEngine = ScoringEngine()
+        if search_cache is None:
+            cache_path = realpath(join(dirname(__file__), '..', environ.get('YT_SEARCH_CACHE', 'tmp/search_cache.sqlite3')))
+            os.makedirs(dirname(cache_path), exist_ok=True)
+            search_cache = SearchCache(cache_path, ttl=float(environ.get('YT_SEARCH_CACHE_TTL', 7 * 24 * 3600)))
+        self.search_cache: SearchCache = search_cache
+        if tracer is None and environ.get('YT_SCORE_TRACE'):
+            tracer = ScoreTracer(environ['YT_SCORE_TRACE'], sample_rate=float(environ.get('YT_SCORE_TRACE_RATE', 0.01)))
+        self.tracer: Optional[ScoreTracer] = tracer
+        if provider is None:
+            hedge_after = environ.get('YT_SEARCH_HEDGE_AFTER')
+            provider = provider_from_names(environ.get('YT_SEARCH_PROVIDERS', 'youtubesearchpython'),
+                                           hedge_after=float(hedge_after) if hedge_after else None)
+        self.provider: SearchProvider = provider
+        if adaptive is None and environ.get('YT_ADAPTIVE_SEARCH', '0') == '1':
+            adaptive = AdaptiveMatcher(self.scorer, cache=self.search_cache, pages=self.search_pages, logger=self.logger.getChild("adaptive"))
+        self.adaptive: Optional[AdaptiveMatcher] = adaptive
+        self.fan_out: bool = fan_out if fan_out is not None else environ.get('YT_SEARCH_FANOUT', '0') == '1'
+        self.verify_moves: bool = environ.get('YT_VERIFY_MOVES', '0') == '1'
+        self.output_format: str = (output_format or environ.get('YT_OUTPUT_FORMAT', 'mp3')).strip().lower()
+        if self.output_format not in ('mp3', 'native'):
+            raise ValueError(f"Unknown output format {self.output_format!r}, expected 'mp3' or 'native'")
+        self.ydl_sessions: YoutubeDLSessions = ydl_sessions or YoutubeDLSessions({'format': 'bestaudio/best', 'quiet': False, 'noplaylist': True},
+                                                                                logger=self.logger.getChild("ytdl"))
+        self.search_stage: SearchStage = SearchStage(concurrency=4, rate=float(environ.get('YT_SEARCH_RATE', 5.0)), cache=self.search_cache,
+                                                     search=self.search, logger=self.logger.getChild("search"))
+
+    def close(self) -> None:
+        """Release the search threads (fan-out and the failover hedge pool) and every YoutubeDL session."""
+        self.search_stage.close()
+        self.provider.close()
+        self.ydl_sessions.close()
+
+    def find_best_match(self, title, debug: bool = False, bypass_cache: bool = False, expected_duration: Optional[float] = None,
+                        search_stage: Optional[SearchStage] = None) -> MatchResult:
         """
         Searches for videos matching the title and selects the best match based on a score.
         
         :param title: Title of the video to search.
-        :param debug: If True, generates a debug log file.
-        :return: Tuple (best_video, best_score)
+        :param debug: If True, writes an HTML debug log and opens it in a browser.
+        :param bypass_cache: If True, searches live even when a cached result exists.
+        :param expected_duration: Expected length in seconds (e.g. the Lidarr track duration). Candidates close
+                                  to it score higher and candidates far from it are never selected.
+        :param search_stage: Stage whose rate limit the adaptive and fan-out searches take their tokens from,
+                             defaults to the downloader's own.
+        :return: MatchResult, which unpacks as (best_video, best_score)
+        """
+        stage = search_stage or self.search_stage
+        if self.adaptive is not None and not debug:
+            match = self.adaptive.find(title, bypass_cache=bypass_cache, expected_duration=expected_duration,
+                                       before_request=stage.limiter.acquire)
+            self.log_best_match(match.video, match.score)
+            return match
+        if self.fan_out:
+            outcome = stage.fan_out(query_variants(title), bypass_cache=bypass_cache)
+            if not outcome.ok:
+                # Like a failing single search below.
+                raise outcome.error or RuntimeError(f"Search failed for {title!r}")
+            results = outcome.results or {'result': []}
+        else:
+            results = self.search(title, 20, cache=self.search_cache, bypass_cache=bypass_cache)
+        return self.select_best_match(title, results, debug=debug, expected_duration=expected_duration)
+
+    def search(self, query, max_results=20, cache: Optional[SearchCache] = None, bypass_cache: bool = False):
+        """search_youtube_unofficial through this downloader's provider."""
+        return search_youtube_unofficial(query, max_results, cache=cache, bypass_cache=bypass_cache, provider=self.provider)
+
+    def search_pages(self, query, page_size=20, max_pages=3, cache: Optional[SearchCache] = None, bypass_cache: bool = False,
+                     before_request: Optional[Callable[[], Any]] = None):
+        """iter_search_pages through this downloader's provider; the page source of the adaptive matcher."""
+        return iter_search_pages(query, page_size, max_pages, cache=cache, bypass_cache=bypass_cache,
+                                 before_request=before_request, provider=self.provider)
+
+    def select_best_match(self, title, results: str | Dict, debug: bool = False, expected_duration: Optional[float] = None) -> MatchResult:
+        """
+        Scores the search results for a title and selects the best match.
+
+        :param title: Title that was searched for.
+        :param results: Search result payload as returned by search_youtube_unofficial.
+        :param debug: If True, writes an HTML debug log and opens it in a browser.
+        :param expected_duration: Expected length in seconds, see find_best_match.
+        :return: MatchResult, which unpacks as (best_video, best_score)
         """
-        results = search_youtube_unofficial(title, 20)
         logger_child = self.logger.getChild("matcher")
         
         # If results is a JSON string, load it.
@@ -78,60 +169,56 @@ class VideoDownloader:
             results = json.loads(results)
         results = results.get('result', [])
         
-        best_video: Optional[VideoData] = None
+        best_video: Optional[Candidate] = None
         best_score: float = 0.0
         debug_entries: List = []  # List to collect debug data for each video
-
-        for vid in results:
-            video_data = VideoData.parse_video_data(vid)
-            score, cleaned_title, debug_steps = compare_video(
-                title, video_data, debug_output_object=True
+        # Candidates only carry the scoring fields; the full VideoData is parsed for the winner alone.
+        candidates, rejected = self.scorer.reject_by_duration([Candidate.from_result(vid) for vid in results], expected_duration)
+        if rejected:
+            logger_child.info("Rejected %s candidate(s) too far from the expected duration of %.0fs", rejected, expected_duration)
+        # Score steps are only collected for an explicit debug log or a sampled trace.
+        traced = self.tracer is not None and self.tracer.sample()
+        collect = debug or traced
+
+        if not collect:
+            # compare or one score_batch call, depending on the number of candidates; identical ranking to the loop below.
+            best_video, score = self.scorer.best_match(title, candidates, expected_duration=expected_duration)
+            best_score = score if best_video else 0.0
+
+        for video_data in candidates if collect else ():
+            score, cleaned_title, debug_steps = self.scorer.compare(
+                title, video_data, debug_output_object=True, expected_duration=expected_duration
             )
-            if debug:
-                debug_entries.append({
-                    "video_id": video_data.id,
-                    "score": score,
-                    "video_data": video_data.__todict__(),
-                    "debug": debug_steps
-                })
-            logger_child.debug(f"Video {cleaned_title}({video_data.id}) found with match score {score:.2f}")
+            debug_entries.append({
+                "video_id": video_data.id,
+                "score": score,
+                "video_data": video_data.__todict__(),
+                "debug": debug_steps
+            })
+            logger_child.debug("Video %s(%s) found with match score %.2f", cleaned_title, video_data.id, score)
             if score > best_score:
                 best_score = score
                 best_video = video_data
 
+        if traced and self.tracer is not None:
+            self.tracer.record(title, debug_entries, best_video.id if best_video else None, best_score)
         if debug:
             write_debug_log(debug_entries, title, best_video.title if best_video else "no-match-found", self.logger)
 
+        video = best_video.materialize() if best_video is not None else None
+        self.log_best_match(video, best_score)
+        return MatchResult(video=video, score=best_score, rejected=rejected,
+                           duration_delta=helper.to_seconds(video.duration) - expected_duration
+                           if video is not None and expected_duration is not None else None)
+
+    def log_best_match(self, best_video: Optional[VideoData], best_score: float) -> None:
         if best_video:
             self.logger.info(f"Best video found \"{best_video.title}\" with score {best_score:.2f} (ID: {best_video.id})")
         else:
             self.logger.warning(f"Could not find video that matched sufficiently (score {best_score:.2f})")
-        
-        return best_video, best_score
-
-    def inject_download_source(self, download_source) -> bool:
-        if not download_source:
-            return True
-
-        try:
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-i", self.extensioned_filename,
-                "-c", "copy",
-                "-metadata", f"comment=Download source: {download_source}",
-                self.tmp_file_path if self.tmp_file_path.endswith(".mp3") else self.tmp_file_path + ".mp3"
-            ]
-            self.logger.debug(f"Running command: {str(cmd)}")
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            os.replace(self.tmp_file_path, self.extensioned_filename)
-        except Exception as _:
-            self.logger.error("Error embedding metadata")
-            return False
 
-        return True
-
-    def download_audio(self, video, audio_quality='320', image_source=None, download_source=None) -> bool:
+    def download_audio(self, video, audio_quality='320', image_source=None, download_source=None, job: Optional[DownloadJob] = None,
+                       tag: bool = True) -> bool:
         """
         Downloads the audio of the given video using yt-dlp.
         
@@ -139,87 +226,81 @@ class VideoDownloader:
         :param audio_quality: Audio quality preset ('320', '192', or '128').
         :param image_source: Optional path to an image file to embed as cover art.
         :param download_source: Optional string representing the download source.
+        :param job: Job whose private directory receives the file (job.extensioned_filename). Without one,
+                    a job is created and its paths are also stored on the downloader (tmp_file_path,
+                    extensioned_filename), which is only safe when downloads run one at a time.
+        :param tag: Write the cover art and source comment right away. Pass False when more tags follow
+                    (see _download_job), so that everything is written in one save.
         :return: True if download succeeds, False otherwise.
         """
         logger_child = self.logger.getChild('download_audio')
         if not hasattr(video, 'id'):
             raise ValueError("The video object does not have an 'id' attribute.")
 
-        video_id = video.id
-        self.tmp_file_path = os.path.join(self.tmp_dir, video_id)
+        standalone = job is None
+        if job is None:
+            job = DownloadJob(video_id=video.id)
+        job.prepare(self.tmp_dir)
+        if standalone:
+            self.tmp_file_path = job.tmp_file_path
 
+        # 'best' makes FFmpegExtractAudio copy the stream into its natural container instead of encoding.
+        codec = 'best' if self.output_format == 'native' else 'mp3'
         ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': self.tmp_file_path,
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
+                'preferredcodec': codec,
                 'preferredquality': audio_quality,
             }],
-            'quiet': False,
-            'noplaylist': True,
         }
         
         logger_child.info("Downloading audio using yt-dlp...")
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                url = video.link if hasattr(video, 'link') else helper.to_youtube_url(video.id)
-                ydl.download([url])
+            url = video.link if hasattr(video, 'link') else helper.to_youtube_url(video.id)
+            # The postprocessor is bound to the session, so there is one session per codec and quality on each worker.
+            self.ydl_sessions.download(url, job.tmp_file_path + ".%(ext)s", key=f"audio-{codec}-{audio_quality}", opts=ydl_opts)
         except Exception as e:
             logger_child.debug(f"Error during download: {e}")
             return False
+        if not audio_extension(job.extensioned_filename) or not os.path.exists(job.extensioned_filename):
+            logger_child.warning(f"Download of {video.id} produced no audio file in {AUDIO_EXTENSIONS}")
+            return False
+        if standalone:
+            self.extensioned_filename = job.extensioned_filename
 
-        self.extensioned_filename = self.tmp_file_path if self.tmp_file_path.endswith('.mp3') else self.tmp_file_path + '.mp3'
-        
-        embedded_audio_with_thumbnail = None
-        try:
-            if environ.get('THUMBNAIL_RETRIVAL_ENABLE') is True:
-                thumbnailInstance = ThumbnailDownloader(self.tmp_dir)
-                embedded_audio_with_thumbnail = thumbnailInstance.download_thumbnail(video=video, output_path=self.extensioned_filename, image_source=image_source)
-                if embedded_audio_with_thumbnail is not None:
-                    os.replace(embedded_audio_with_thumbnail, self.extensioned_filename)
-        except Exception as e:
-            logger_child.warning(f"Error embedding thumbnail: {embedded_audio_with_thumbnail} -> {e}")
-            
-        if not self.inject_download_source(download_source=self.source):
-            logger_child.warning(f"Error embedding source into {self.extensioned_filename}")
+        if tag:
+            try:
+                write_tags(job.extensioned_filename, self.collect_tags(video, image_source, download_source))
+            except Exception as e:
+                logger_child.warning(f"Error writing tags into {job.extensioned_filename}: {e}")
 
         return True
 
+    def collect_tags(self, video, image_source=None, download_source=None) -> TrackTags:
+        """
+        Tags every download gets: the source comment and, with THUMBNAIL_RETRIVAL_ENABLE, the cover art.
+        Only gathered in memory; write_tags puts them into the file.
+        """
+        tags = TrackTags(comment=f"Download source: {download_source or self.source}")
+        if environ.get('THUMBNAIL_RETRIVAL_ENABLE', '').strip().lower() in ('1', 'true', 'yes'):
+            try:
+                tags.cover = ThumbnailDownloader(self.tmp_dir).cover_art(video, image_source=image_source)
+            except Exception as e:
+                self.logger.getChild('download_audio').warning(f"Error fetching cover art for {video.id}: {e}")
+        return tags
+
     def extract_metadata(self, src: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
-        Extracts metadata (artist, album, title) from an MP3 file.
+        Extracts metadata (artist, album, title) from an MP3, Ogg or M4A file.
         
         :param src: Path to the audio file.
         :return: Tuple containing (artist, album, title).
         """
-        from mutagen._file import File as MutagenFile
-        audio = MutagenFile(src)
-        artist, album, title = None, None, None
-
-        if audio and getattr(audio, "tags", None):
-            tags = audio.tags
-            if 'TPE1' in tags and tags['TPE1'].text:
-                artist = tags['TPE1'].text[0]
-            elif 'artist' in tags:
-                artist_val = tags.get('artist')
-                artist = artist_val[0] if isinstance(artist_val, list) else artist_val
-
-            if 'TALB' in tags and tags['TALB'].text:
-                album = tags['TALB'].text[0]
-            elif 'album' in tags:
-                album_val = tags.get('album')
-                album = album_val[0] if isinstance(album_val, list) else album_val
-
-            if 'TIT2' in tags and tags['TIT2'].text:
-                title = tags['TIT2'].text[0]
-            elif 'title' in tags:
-                title_val = tags.get('title')
-                title = title_val[0] if isinstance(title_val, list) else title_val
-
-        return artist, album, title
-
-    def move_audio(self, src: str, dest_dir: Optional[str] = None, dest_name: Optional[str] = None, folder_based: bool = False) -> str:
+        tags = read_tags(src)
+        return tags.artist, tags.album, tags.title
+
+    def move_audio(self, src: str, dest_dir: Optional[str] = None, dest_name: Optional[str] = None, folder_based: bool = False,
+                   tags: Optional[TrackTags] = None) -> str:
         """
         Moves the downloaded audio file to the destination directory.
         
@@ -227,15 +308,20 @@ class VideoDownloader:
         :param dest_dir: Destination directory.
         :param dest_name: New name for the file.
         :param folder_based: Organize files into an artist/album structure if True.
+        :param tags: Tags just written into the file; used for the folder structure instead of reading them back.
         :return: Final path of the moved audio file.
         """
-        src = src if src.endswith(".mp3") else f"{src}.mp3"
+        src = resolve_audio_path(src)
+        ext = audio_extension(src) or ".mp3"
         destination = dest_dir if dest_dir else self.dest_dir
         if not destination:
             raise ValueError("Destination directory is not specified.")
 
         if folder_based:
-            artist, album, title = self.extract_metadata(src)
+            if tags is not None and tags.artist and tags.title:
+                artist, album, title = tags.artist, tags.album, tags.title
+            else:
+                artist, album, title = self.extract_metadata(src)
             if artist and title:
                 from slugify import slugify
                 artist_folder = slugify(artist, separator="_", lowercase=False)
@@ -244,7 +330,6 @@ class VideoDownloader:
                     album_folder = slugify(album, separator="_", lowercase=False)
                     destination = os.path.join(destination, album_folder)
                 dest_name = slugify(title, separator="_", lowercase=False)
-                dest_name = dest_name if dest_name.endswith(".mp3") else f"{dest_name}.mp3"
             elif dest_name is None:
                 raise ValueError("Folder-based organization requested, but metadata is missing and no dest_name was provided.")
 
@@ -254,71 +339,156 @@ class VideoDownloader:
         if dest_name is None:
             raise ValueError("Destination file name (dest_name) cannot be None.")
 
-        dest_name = dest_name if dest_name.endswith(".mp3") else f"{dest_name}.mp3"
+        # The file keeps its container; a name given with another audio extension gets the right one.
+        if audio_extension(dest_name):
+            dest_name = os.path.splitext(dest_name)[0]
+        dest_name = f"{dest_name}{ext}"
         dest_path = os.path.abspath(os.path.join(destination, dest_name))
         self.logger.info("Moving file from %s to %s", src, dest_path)
-        helper.safe_copy(src, dest_path)
+        helper.finalize_file(src, dest_path, verify=self.verify_moves)
+        if self.post_move_hook is not None:
+            try:
+                self.post_move_hook(dest_path)
+            except Exception as e:
+                self.logger.warning(f"Post-move hook failed for {dest_path}: {e}")
         return dest_path
 
-    def process(self, title, dest_dir: Optional[str]=None):
+    def process(self, title, dest_dir: Optional[str]=None, expected_duration: Optional[float] = None):
         """
         Searches for the best matching video, downloads its audio, and moves it if needed.
         
         :param title: The title of the video to search for.
         :param dest_dir: Optional destination directory.
+        :param expected_duration: Expected length in seconds, e.g. WantedTrack.duration_seconds.
         :return: Final path of the audio file, or None if download fails.
         """
-        best_video, score = self.find_best_match(title)
-        if not best_video:
-            self.logger.error(f"No matching video found for title: {title}")
-            return None
+        best_video, score = self.find_best_match(title, expected_duration=expected_duration)
+        return self.download_match(title, best_video, score, dest_dir)
+
+    def process_many(self, titles: Iterable[str], dest_dir: Optional[str] = None, concurrency: int = 8, rate: float = 5.0,
+                     debug: bool = False, expected_durations: Optional[Dict[str, float]] = None) -> Generator[Tuple[str, Optional[str]], None, None]:
+        """
+        Processes a batch of titles on a pool of `concurrency` workers, each running search, download,
+        identify and move for one title. Live searches are capped at `rate` per second across workers.
+
+        :param titles: Titles of the videos to search for.
+        :param dest_dir: Optional destination directory.
+        :param concurrency: Number of titles processed at once.
+        :param rate: Live searches per second.
+        :param expected_durations: Expected length in seconds per title.
+        :return: Generator of (title, final path or None) in completion order.
+        """
+        stage = SearchStage(concurrency=concurrency, rate=rate, cache=self.search_cache, search=self.search, logger=self.logger.getChild("search"))
+        jobs = (DownloadJob(title=title, dest_dir=dest_dir, expected_duration=(expected_durations or {}).get(title), debug=debug)
+                for title in titles)
+        with stage:
+            for result in self.run_jobs(jobs, workers=concurrency, search_stage=stage):
+                yield result.job.label, result.path
+
+    def run_jobs(self, jobs: Iterable[DownloadJob], workers: Optional[int] = None,
+                 search_stage: Optional[SearchStage] = None) -> Generator[JobResult, None, None]:
+        """
+        Runs jobs on a DownloadPool of `workers` threads (default YT_DOWNLOAD_WORKERS, 4).
+
+        :return: Generator of JobResult in completion order.
+        """
+        workers = workers if workers is not None else int(environ.get('YT_DOWNLOAD_WORKERS', 4))
+        pool = DownloadPool(self, workers=workers, search_stage=search_stage, logger=self.logger.getChild("pool"))
+        try:
+            yield from pool.run(jobs)
+        finally:
+            # The pool's threads have exited; close the YoutubeDL sessions they created.
+            self.ydl_sessions.prune()
 
-        def print_best_video(video: VideoData, score: float) -> str:
-            return f"{video.title}@{video.duration} - {round(score, 3)}% match"
+    def run_job(self, job: DownloadJob, search_stage: Optional[SearchStage] = None) -> JobResult:
+        """
+        Runs one job end to end: search (unless the job names a video id), download, identify and move.
 
-        print_best_video(best_video, score)
+        All per-download state lives on the job, so several jobs can run on the same downloader at once.
 
-        downloaded_file = self.download_audio(best_video, audio_quality=str(self.bitrate))
-        if downloaded_file is False:
-            self.logger.warning("Download failed.")
-            return None
+        :param search_stage: Rate-limited stage for the live search, defaults to the downloader's own.
+        """
+        if job.video_id is not None:
+            video: Optional[VideoData] = VideoData(id=job.video_id, title=job.title or f"Video {job.video_id}",
+                                                   link=helper.to_youtube_url(job.video_id))
+            score = 0.0
         else:
-            self.logger.info("Download succeeded.")
-
+            title = job.label
+            if self.adaptive is not None and not job.debug:
+                match = self.find_best_match(title, debug=job.debug, bypass_cache=job.bypass_cache, expected_duration=job.expected_duration,
+                                             search_stage=search_stage)
+            else:
+                stage = search_stage or self.search_stage
+                if self.fan_out:
+                    outcome = stage.fan_out(query_variants(title), bypass_cache=job.bypass_cache)
+                else:
+                    outcome = stage.search_one(title, bypass_cache=job.bypass_cache)
+                if not outcome.ok or outcome.results is None:
+                    self.logger.error(f"Search failed for title: {title}")
+                    return JobResult(job=job, stage="search", error=outcome.error)
+                match = self.select_best_match(title, outcome.results, debug=job.debug, expected_duration=job.expected_duration)
+            video, score = match
+            if not video:
+                self.logger.error(f"No matching video found for title: {title}")
+                return JobResult(job=job, score=score, stage="match")
+        return self._download_job(job, video, score)
+
+    def _download_job(self, job: DownloadJob, video: VideoData, score: float) -> JobResult:
+        """Download, identify and move the selected video of a job."""
+        job.prepare(self.tmp_dir)
+        if not self.download_audio(video, audio_quality=str(self.bitrate), job=job, tag=False):
+            self.logger.warning(f"Download failed for {job.label}")
+            job.cleanup()
+            return JobResult(job=job, video=video, score=score, stage="download")
+        self.logger.info(f"Download succeeded for {job.label}")
+
+        # Identification only reads the file; its tags, the cover art, the source comment and the caller's
+        # tags are written together below. Later sources win: identification over the defaults, the job over both.
+        tags = self.collect_tags(video)
         if self.try_identify:
-            detect_and_update_tags(f"{self.tmp_file_path}")
+            tags = tags.merge(recognize_tags(job.extensioned_filename))
+        tags = tags.merge(job.tags)
+        try:
+            write_tags(job.extensioned_filename, tags)
+        except Exception as e:
+            self.logger.warning(f"Error writing tags into {job.extensioned_filename}: {e}")
 
-        if dest_dir or self.dest_dir:
-            if not title.endswith(".mp3"):
-                title = title + ".mp3"
-            final_path = self.move_audio(self.tmp_file_path, dest_dir, title, folder_based=True)
-            return final_path
-        else:
-            self.logger.warning(f"No destination directory specified. Audio file remains in temporary folder: {downloaded_file}")
-            return downloaded_file
-
-def download_video_by_id(_id: str) -> Generator[Tuple[bool, VideoData], None, None]:
-    from models.video import VideoData
-    video = VideoData(id=_id, title=f"Video {_id}", link=helper.to_youtube_url(_id))
-    success = downloader.download_audio(video, audio_quality=audio_quality)
-    if success:
-        if downloader.try_identify:
-            detect_and_update_tags(downloader.tmp_file_path)
-        if dest_dir or downloader.dest_dir:
-            final_name = video.title + ".mp3"
-            try:
-                final_path = downloader.move_audio(downloader.tmp_file_path, dest_dir, final_name, folder_based=True)
-                logger.info(f"Downloaded and moved: {final_path}")
-            except Exception as e:
-                logger.error(f"Failed to move audio file for video {video.title}: {e}")
-        else:
-            logger.info(f"Downloaded: {downloader.tmp_file_path}")
+        if not (job.dest_dir or self.dest_dir):
+            self.logger.warning(f"No destination directory specified. Audio file remains in temporary folder: {job.extensioned_filename}")
+            return JobResult(job=job, path=job.extensioned_filename, video=video, score=score, tags=tags)
+
+        dest_name = job.dest_name or (job.title if job.title is not None else video.title)
+        try:
+            final_path = self.move_audio(job.tmp_file_path, job.dest_dir, dest_name, folder_based=True, tags=tags)
+        except Exception as e:
+            # The download stays in the job directory so it can be moved by hand.
+            self.logger.error(f"Failed to move audio file for {job.label}: {e}")
+            return JobResult(job=job, video=video, score=score, stage="move", error=e, tags=tags)
+        job.cleanup()
+        return JobResult(job=job, path=final_path, video=video, score=score, tags=tags)
+
+    def download_match(self, title, best_video: Optional[VideoData], score: float, dest_dir: Optional[str] = None):
+        """
+        Downloads the audio of a selected match and moves it if needed.
+
+        :return: Final path of the audio file, or None if download fails.
+        """
+        if not best_video:
+            self.logger.error(f"No matching video found for title: {title}")
+            return None
+
+        return self._download_job(DownloadJob(title=title, dest_dir=dest_dir), best_video, score).path
+
+def download_video_by_id(_id: str, downloader: VideoDownloader, dest_dir: Optional[str] = None) -> Generator[Tuple[bool, Optional[VideoData]], None, None]:
+    result = downloader.run_job(DownloadJob(video_id=_id, dest_dir=dest_dir))
+    if result.ok:
+        logger.info(f"Downloaded: {result.path}")
     else:
-        logger.error(f"Download failed for video {video.title}")
-    yield True, video
+        logger.error(f"Download failed for video {result.job.label} ({result.stage})")
+    yield result.ok, result.video
 
-def process_playlist_into_ids(_id: str) -> Generator[VideoData, None, None]:
-    entries = parse_playlist(_id)
+def process_playlist_into_ids(_id: str, sessions: Optional[YoutubeDLSessions] = None) -> Generator[VideoData, None, None]:
+    entries = parse_playlist(_id, sessions=sessions)
     if not entries or not isinstance(entries, list):
             logger.error("No entries found in the playlist.")
     else:
@@ -329,6 +499,36 @@ def process_playlist_into_ids(_id: str) -> Generator[VideoData, None, None]:
                 continue
             yield VideoData(id=video_id, url=helper.to_youtube_url(video_id), link=helper.to_youtube_url(video_id))
 
+def moved_log(path: str) -> Callable[[str], None]:
+    """
+    A post_move_hook that appends every moved file to `path`, one per line, for lidarr/notify.py
+    (`python notify.py < path`, or live through a FIFO) to batch the Lidarr rescans.
+    """
+    import threading
+    lock = threading.Lock()
+
+    def hook(moved: str) -> None:
+        with lock, open(path, "a") as fp:
+            fp.write(moved + "\n")
+    return hook
+
+def read_jobs(lines: Iterable[str], dest_dir: Optional[str] = None) -> Generator[DownloadJob, None, None]:
+    """
+    Download jobs from JSON lines such as the ones lidarr/webhook.py writes: {"title", "expected_duration",
+    "tags": {"title", "artist", "album"}}. Lines are read as they arrive, so `lines` may be a FIFO.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping a malformed job line: {e}")
+            continue
+        tags = data.get('tags')
+        yield DownloadJob(title=data['title'], dest_dir=dest_dir, expected_duration=data.get('expected_duration'),
+                          tags=TrackTags(**tags) if tags else None)
+
 if __name__ == "__main__":
     from cli import interactive_prompt
     dotenv.load_dotenv('../.env')
@@ -340,12 +540,32 @@ if __name__ == "__main__":
     parser.add_argument("--audio_quality", default=320, help="Audio quality preset (320,192,128) for extraction")
     parser.add_argument("--interactive", action="store_true", help="Run interactive CLI mode")
     parser.add_argument("--identify", action="store_true", default=True, help="Attempt to correct tags and identify the song (default: True)")
+    parser.add_argument("--output_format", choices=["mp3", "native"], default=environ.get('YT_OUTPUT_FORMAT', 'mp3'),
+                        help="mp3 re-encodes, native keeps the Opus/AAC stream (default: YT_OUTPUT_FORMAT or mp3)")
+    parser.add_argument("--workers", type=int, default=int(environ.get('YT_DOWNLOAD_WORKERS', 4)), help="Parallel downloads in playlist mode (default: YT_DOWNLOAD_WORKERS or 4)")
     parser.add_argument("--mode", type=str, 
                         choices=["Video Search", "Video ID", "Playlist Link"],
                         default="Search by Title", 
                         help="Mode to run the downloader in")
+    parser.add_argument("--moved_log", default=None,
+                        help="Append the library path of every moved file to this file or FIFO, e.g. read by lidarr/notify.py to batch rescans")
+    parser.add_argument("--jobs", default=None,
+                        help="Run the download jobs in this JSONL file or FIFO, e.g. the one lidarr/webhook.py serve writes, on the worker pool")
     args = parser.parse_args()
 
+    if args.jobs:
+        dest_dir = os.path.realpath(args.dest_dir)
+        downloader = VideoDownloader(tmp_dir=args.tmp_dir, dest_dir=dest_dir, bitrate=int(args.audio_quality), try_identify=args.identify,
+                                     output_format=args.output_format, post_move_hook=moved_log(args.moved_log) if args.moved_log else None)
+        with open(args.jobs, encoding="utf-8") as jobs_file:
+            for result in downloader.run_jobs(read_jobs(jobs_file, dest_dir), workers=args.workers):
+                if result.ok:
+                    logger.info(f"Downloaded {result.job.label}: {result.path}")
+                else:
+                    logger.warning(f"Error {result.job.label} failed at {result.stage}...skip")
+        downloader.close()
+        os._exit(0)
+
     if args.interactive or not args.title:
         user_input, audio_quality, tmp_dir, dest_dir, identify, mode = interactive_prompt()
     else:
@@ -358,7 +578,8 @@ if __name__ == "__main__":
 
     value = helper.strip_utf8(user_input.replace("\n", "").strip())
 
-    downloader = VideoDownloader(tmp_dir=tmp_dir, dest_dir=dest_dir, try_identify=bool(identify))
+    downloader = VideoDownloader(tmp_dir=tmp_dir, dest_dir=dest_dir, bitrate=int(audio_quality), try_identify=bool(identify),
+                                 output_format=args.output_format, post_move_hook=moved_log(args.moved_log) if args.moved_log else None)
 
     if mode == "Search Title":
         downloader.process(value)
@@ -373,7 +594,7 @@ if __name__ == "__main__":
         else:
             _id = value
         data: Optional[VideoData] = VideoData(id=_id, title=_id, link=value)
-        for x in download_video_by_id(value):
+        for x in download_video_by_id(_id, downloader, dest_dir):
             data = x[1]
         if data:
             logger.info(f"Video {data.title}@{data.link} has been downloaded")
@@ -381,11 +602,13 @@ if __name__ == "__main__":
             logger.error("No video data was received")
             os._exit(1)
 
-    elif mode == "Playlist ID":
-        # First parse the playlist to retrieve its entries
-        for video in process_playlist_into_ids(value):
-            for success, videoData in download_video_by_id(video.id):
-                if not success:
-                    logger.warning(f"Error {video.title} is invalid...skip")
-                    continue
+    elif mode in ("Playlist ID", "Playlist Link"):
+        # First parse the playlist to retrieve its entries, then download them on the worker pool.
+        jobs = (DownloadJob(video_id=video.id, dest_dir=dest_dir) for video in process_playlist_into_ids(value, downloader.ydl_sessions))
+        for result in downloader.run_jobs(jobs, workers=args.workers):
+            if result.ok:
+                logger.info(f"Downloaded {result.job.label}: {result.path}")
+            else:
+                logger.warning(f"Error {result.job.label} failed at {result.stage}...skip")
+    downloader.close()
     os._exit(0)
\ No newline at end of file
@@ -5,10 +5,18 @@ from typing import Optional, Dict
 YOUTUBE_PLAYLIST_REGEX = re.compile(r"(?P<schema>http(s)?)\:\/\/(?P<subdomain>www|music)\.(?P<domain>youtube|yt)\.(?P<tld>com|be)\/playlist\?list\=(?P<playlist_id>\w+)(&si=(?P<some_id>\w+)|$)")
 YOUTUBE_EXTRACT_INDEX = re.compile(r"(?P<schema>\w+):\/\/(?P<subdomain>www)?\.(?P<domain>youtube|yt)\.(?P<tld>com|be)\/watch\?v\=(?P<id>\w+)$")
 
-def to_seconds(input: str) -> int:
-    return (int(input.split(':')[0]) * 60) + int(input.split(':')[1])
+def to_seconds(input: Optional[str]) -> int:
+    """Seconds of a "m:ss" or "h:mm:ss" duration; 0 when the duration is unknown (None or empty)."""
+    if not input:
+        return 0
+    seconds = 0
+    for part in input.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
 
-def fix_viewers(input: str) -> int:
+def fix_viewers(input: Optional[str]) -> int:
+    if not input:
+        return 0
     try:
         return int(input.split(' ')[0].replace(',', ''))
     except ValueError:
@@ -57,6 +65,136 @@ def parse_youtube_playlist_url_to_id(url: str) -> Optional[str]:
         return None
     return regex_result['playlist_id']
 
+def _kernel_copy(src_fd: int, dest_fd: int, size: int) -> None:
+    """
+    Copies `size` bytes between two file descriptors without passing the data through Python:
+    copy_file_range (reflinks or in-kernel copy), then sendfile, then a plain buffered copy.
+    """
+    import os
+    import shutil
+
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(src_fd, dest_fd, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            # EXDEV on kernels before 5.3, ENOSYS/EINVAL on filesystems that do not support it.
+            pass
+    if copied < size and hasattr(os, "sendfile"):
+        try:
+            while copied < size:
+                sent = os.sendfile(dest_fd, src_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            pass
+    if copied < size:
+        os.lseek(src_fd, copied, os.SEEK_SET)
+        os.lseek(dest_fd, copied, os.SEEK_SET)
+        with open(src_fd, 'rb', closefd=False) as rfp, open(dest_fd, 'wb', closefd=False) as wfp:
+            shutil.copyfileobj(rfp, wfp, 1 << 20)
+            copied = size
+
+
+def _same_content(a: str, b: str, chunk_size: int = 1 << 20) -> bool:
+    """Compares two files chunk by chunk, reading each once and stopping at the first difference."""
+    import os
+
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, 'rb') as afp, open(b, 'rb') as bfp:
+        while True:
+            chunk = afp.read(chunk_size)
+            if chunk != bfp.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+def copy_into_place(src: str, dest: str, verify: bool = False) -> None:
+    """
+    Copies `src` to `dest` through a temporary file in the destination directory: kernel-side copy,
+    fsync, optional verification, then an atomic rename. `dest` is either the old file or the complete
+    new one, never a partial copy, and gets the permission bits of `src` (not mkstemp's 0600). The
+    source is left in place.
+
+    :raises OSError: If the copy fails or does not verify; the temporary file is removed.
+    """
+    import os
+    import stat
+    import tempfile
+
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    fd, partial = tempfile.mkstemp(prefix=f".{os.path.basename(dest)}.", suffix=".partial", dir=dest_dir)
+    try:
+        with open(src, 'rb') as rfp:
+            src_stat = os.fstat(rfp.fileno())
+            _kernel_copy(rfp.fileno(), fd, src_stat.st_size)
+        os.fchmod(fd, stat.S_IMODE(src_stat.st_mode))
+        os.fsync(fd)
+        os.close(fd)
+        fd = -1
+        if verify and not _same_content(src, partial):
+            raise OSError(f"Verification of the copy of {src} failed")
+        os.replace(partial, dest)
+    except BaseException:
+        if fd >= 0:
+            os.close(fd)
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+    _fsync_dir(dest_dir)
+
+
+def _fsync_dir(path: str) -> None:
+    """Persists a rename by syncing the directory entry (a no-op where directories cannot be opened)."""
+    import os
+
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def finalize_file(src: str, dest: str, verify: bool = False) -> str:
+    """
+    Moves a finished file to its final path.
+
+    On the same filesystem this is a single atomic os.replace, no data is copied. Across filesystems the
+    file is copied with copy_into_place (kernel-side, fsynced, atomically renamed) and the source is
+    removed afterwards.
+
+    :param verify: Compare the copy with the source before it replaces `dest`; only applies to cross-device moves.
+    :return: "rename" or "copy", whichever was used.
+    """
+    import errno
+    import os
+
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    if os.stat(src).st_dev == os.stat(dest_dir).st_dev:
+        try:
+            os.replace(src, dest)
+            return "rename"
+        except OSError as e:
+            # Bind mounts of the same device still refuse renames between them.
+            if e.errno != errno.EXDEV:
+                raise
+    copy_into_place(src, dest, verify=verify)
+    os.unlink(src)
+    return "copy"
+
+
 def safe_copy(src: str, dest: str, chunk_size: int = 65536) -> bool:
     """
     Copies a file from 'src' to 'dest' in chunks, computing a CRC32 for the source data.
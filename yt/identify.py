@@ -3,9 +3,7 @@ import json
 import requests
 import logging
 from typing import Optional
-from mutagen.id3 import ID3
-from mutagen.id3._util import error
-from mutagen.id3._frames import TIT2, TPE1, TALB, TDRC, TCON, TXXX, APIC
+from postprocess import TrackTags, resolve_audio_path, write_tags
 
 logging.basicConfig(level=logging.INFO, format="[%(name)s] | %(asctime)s.%(msecs)03d - %(levelname)s - %(message)s", datefmt='%H:%M:%S')
 logger = logging.getLogger("identify")
@@ -13,16 +11,37 @@ logger = logging.getLogger("identify")
 
 def detect_and_update_tags(file_path: str, thumbnail_path: Optional[str] = None, logger: logging.Logger = logger, **kwargs) -> bool:
     """
-    Detects song metadata using ShazamIO and updates the MP3 file's ID3 tags.
-    Standard tags (Title, Artist, Album, etc.) are updated to ensure compatibility with
+    Detects song metadata using ShazamIO and updates the file's tags (ID3 for MP3, Vorbis comments
+    for Ogg, iTunes atoms for M4A). Standard tags (Title, Artist, Album, etc.) are updated to ensure compatibility with
     file managers (like Dolphin) that expect common frames. Additional metadata (like the 
     MusicBrainz ID) is stored as custom TXXX frames.
     """
-    # Ensure the file has an .mp3 extension
-    file_path = file_path if file_path.endswith(".mp3") else file_path + ".mp3"
+    # Paths without an extension refer to the download in whatever container it was saved.
+    file_path = resolve_audio_path(file_path)
+    tags = recognize_tags(file_path, thumbnail_path, logger, **kwargs)
+    if tags is None:
+        return False
+    try:
+        write_tags(file_path, tags)
+    except Exception as exc:
+        logging.critical(f"An error occurred: {exc}")
+        return False
+    logging.info(f"Updated tags for '{file_path}'")
+    return True
+
+
+def recognize_tags(file_path: str, thumbnail_path: Optional[str] = None, logger: logging.Logger = logger, **kwargs) -> Optional[TrackTags]:
+    """
+    Detects song metadata using ShazamIO and returns it as TrackTags without touching the file,
+    so it can be written together with the other tags in one save.
+
+    :param thumbnail_path: Local cover image preferred over Shazam's cover art.
+    :param kwargs: Extra metadata stored as custom TXXX frames.
+    :return: The detected tags, or None if the track was not identified.
+    """
     logger = logger.getChild("identification")
     
-    async def recognize_and_update():
+    async def recognize():
         from shazamio import Shazam  # Ensure shazamio is installed
         logger.info(f"Searching info for {file_path}...")
         shazam = Shazam()
@@ -33,7 +52,7 @@ def detect_and_update_tags(file_path: str, thumbnail_path: Optional[str] = None,
         artist = track.get("subtitle")
         if not title or not artist:
             logger.warning("Could not identify the track properly.")
-            return False
+            return None
         
         logger.info(f"Detected: Title='{title}', Artist='{artist}'")
         
@@ -64,55 +83,17 @@ def detect_and_update_tags(file_path: str, thumbnail_path: Optional[str] = None,
                     elif meta_title == "released":
                         release_date = metadata.get("text")
         
-        # Open (or create) the ID3 tag object
-        try:
-            audio = ID3(file_path)
-        except error:
-            audio = ID3()
-        
-        # Update standard tags (ensure deletion of any existing frames first)
-        audio.delall("TIT2")
-        audio.add(TIT2(encoding=3, text=title))
-        
-        audio.delall("TPE1")
-        audio.add(TPE1(encoding=3, text=artist))
-        
-        if album:
-            audio.delall("TALB")
-            audio.add(TALB(encoding=3, text=album))
-        
-        if release_date:
-            audio.delall("TDRC")
-            audio.add(TDRC(encoding=3, text=release_date))
-        
-        if genre:
-            audio.delall("TCON")
-            audio.add(TCON(encoding=3, text=genre))
+        tags = TrackTags(title=title, artist=artist, album=album, release_date=release_date, genre=genre)
         
         # Add extra metadata as TXXX (custom) frames
-        if isrc:
-            audio.delall("TXXX:ISRC")
-            audio.add(TXXX(encoding=3, desc="ISRC", text=isrc))
-        if label:
-            audio.delall("TXXX:Label")
-            audio.add(TXXX(encoding=3, desc="Label", text=label))
-        if track_url:
-            audio.delall("TXXX:Track URL")
-            audio.add(TXXX(encoding=3, desc="Track URL", text=track_url))
-        if share_text:
-            audio.delall("TXXX:Share Text")
-            audio.add(TXXX(encoding=3, desc="Share Text", text=share_text))
-        if hub:
-            audio.delall("TXXX:Hub Info")
-            audio.add(TXXX(encoding=3, desc="Hub Info", text=json.dumps(hub)))
-        if joecolor:
-            audio.delall("TXXX:JoeColor")
-            audio.add(TXXX(encoding=3, desc="JoeColor", text=joecolor))
+        for desc, value in (("ISRC", isrc), ("Label", label), ("Track URL", track_url), ("Share Text", share_text),
+                            ("Hub Info", json.dumps(hub) if hub else None), ("JoeColor", joecolor)):
+            if value:
+                tags.extra[desc] = value
         
         # Add any extra keyword arguments as custom TXXX frames
         for key, value in kwargs.items():
-            audio.delall(f"TXXX:{key}")
-            audio.add(TXXX(encoding=3, desc=key, text=str(value)))
+            tags.extra[key] = str(value)
         
         # Subfunction: Query MusicBrainz for a recording ID using the ISRC
         def fetch_musicbrainz_id(isrc_code: str) -> Optional[str]:
@@ -139,56 +120,37 @@ def detect_and_update_tags(file_path: str, thumbnail_path: Optional[str] = None,
         if isrc:
             mbid = fetch_musicbrainz_id(isrc)
             if mbid:
-                audio.delall("TXXX:MusicBrainz Track Id")
-                audio.add(TXXX(encoding=3, desc="MusicBrainz Track Id", text=mbid))
+                tags.extra["MusicBrainz Track Id"] = mbid
                 logging.info(f"Added MusicBrainz ID: {mbid}")
         
         # Add cover art: prefer the local thumbnail if provided; otherwise, download from coverart_url.
         if thumbnail_path:
             try:
                 with open(thumbnail_path, "rb") as img:
-                    img_data = img.read()
-                audio.delall("APIC")
-                audio.add(APIC(
-                    encoding=3,
-                    mime="image/jpeg",  # Adjust if you have a PNG thumbnail
-                    type=3,             # 3 is for the front cover image
-                    desc="Cover",
-                    data=img_data
-                ))
+                    tags.cover = img.read()
+                tags.cover_mime = "image/jpeg"  # Adjust if you have a PNG thumbnail
             except Exception as thumb_exc:
                 logging.error(f"Failed to add thumbnail from path: {thumb_exc}")
         elif coverart_url:
             try:
                 r = requests.get(coverart_url)
                 if r.status_code == 200:
-                    img_data = r.content
+                    tags.cover = r.content
                     # Use the Content-Type header if available; otherwise, default to image/jpeg.
-                    mime = r.headers.get("Content-Type", "image/jpeg")
-                    audio.delall("APIC")
-                    audio.add(APIC(
-                        encoding=3,
-                        mime=mime,
-                        type=3,
-                        desc="Cover",
-                        data=img_data
-                    ))
+                    tags.cover_mime = r.headers.get("Content-Type", "image/jpeg")
                 else:
                     logging.info(f"Failed to download cover art, status code {r.status_code}")
             except Exception as e:
                 logging.error(f"Failed to download cover art: {e}")
         
-        # Save all changes back to the file using ID3v2.3 for better compatibility (e.g., with Dolphin)
-        audio.save(file_path, v2_version=3)
-        logging.info(f"Updated tags for '{file_path}'")
-        return True
+        return tags
 
     try:
         # Run the async function in a synchronous context.
-        return asyncio.run(recognize_and_update())
+        return asyncio.run(recognize())
     except Exception as exc:
         logging.critical(f"An error occurred: {exc}")
-        return False
+        return None
 
 
 # Example usage:
@@ -0,0 +1,39 @@
+from typing import Any, Dict, Optional
+
+from models.video import VideoData
+
+
+class Candidate:
+    """
+    Scoring view of a search result: only the fields the scorer reads, taken straight from the raw
+    result without building the nested models. `materialize()` parses the full VideoData, which is
+    only needed for the selected video.
+
+    Exposes the same attributes the scorer uses on VideoData (id, title, duration, publishedTime,
+    view_text, channel_name).
+    """
+    __slots__ = ('id', 'title', 'duration', 'publishedTime', 'view_text', 'channel_name', 'raw')
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self.id: str = raw['id']
+        self.title: str = raw['title']
+        self.duration: str = raw['duration']
+        self.publishedTime: Optional[str] = raw.get('publishedTime')
+        view_count = raw.get('viewCount')
+        self.view_text: str = view_count['text'] if view_count else "0"
+        channel = raw.get('channel')
+        self.channel_name: Optional[str] = channel['name'] if channel else None
+
+    @classmethod
+    def from_result(cls, data: Dict[str, Any]) -> "Candidate":
+        return cls(data)
+
+    def materialize(self) -> VideoData:
+        return VideoData.parse_video_data(self.raw)
+
+    def __todict__(self) -> Dict[str, Any]:
+        return self.raw
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id!r}, title={self.title!r}, duration={self.duration!r})"
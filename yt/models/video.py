@@ -38,6 +38,17 @@ class VideoData:
             f")"
         )
         
+    @property
+    def view_text(self) -> str:
+        return self.viewCount.text if self.viewCount else "0"
+
+    @property
+    def channel_name(self) -> Optional[str]:
+        return self.channel.name if self.channel else None
+
+    def materialize(self) -> "VideoData":
+        return self
+
     def __todict__(self) -> Dict[str, Any]:
         return {
             "accessibility": self.accessibility.__todict__() if self.accessibility else None,
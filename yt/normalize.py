@@ -0,0 +1,59 @@
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple
+
+NON_ALNUM_PATTERN = re.compile(r"[^a-zA-Z0-9\s]+")
+
+
+class NormalizedText(NamedTuple):
+    text: str
+    words: Tuple[str, ...]
+
+
+class TextNormalizer:
+    """
+    Bounded LRU caches for the text normalization of the scoring path.
+
+    Popular videos come back for many related queries and every query is compared with ~20 candidates,
+    so titles and queries are normalized once and the cached result is shared. The returned values are
+    immutable and safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int = 8192):
+        self.maxsize = maxsize
+        self.title = lru_cache(maxsize=maxsize)(self._title)
+        self.query = lru_cache(maxsize=maxsize)(self._query)
+        self.words = lru_cache(maxsize=maxsize)(self._words)
+
+    @staticmethod
+    def _title(raw_title: str) -> NormalizedText:
+        """Video title: ASCII only, punctuation removed, lowercased (as compare_video does)."""
+        ascii_only = raw_title.encode("ascii", errors="ignore").decode("ascii", errors="ignore")
+        text = NON_ALNUM_PATTERN.sub("", ascii_only).lower()
+        return NormalizedText(text, tuple(text.split()))
+
+    @staticmethod
+    def _query(raw_query: str) -> NormalizedText:
+        """Query title: lowercased only, punctuation is kept."""
+        text = raw_query.lower()
+        return NormalizedText(text, tuple(text.split()))
+
+    @staticmethod
+    def _words(text: str) -> Tuple[str, ...]:
+        return tuple(text.split())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hits, misses and size of every cache."""
+        return {
+            name: {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize or 0}
+            for name, info in (("title", self.title.cache_info()), ("query", self.query.cache_info()), ("words", self.words.cache_info()))
+        }
+
+    def clear(self) -> None:
+        self.title.cache_clear()
+        self.query.cache_clear()
+        self.words.cache_clear()
+
+
+# Shared by every ScoringEngine that is not given its own normalizer.
+default_normalizer = TextNormalizer()
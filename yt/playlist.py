@@ -1,71 +1,63 @@
 import logging
 import yt_dlp
-import subprocess
-from typing import Iterable, List, Dict, Any
+from typing import Iterable, List, Dict, Any, Optional
 from helper import parse_youtube_playlist_url_to_id, to_youtube_playlist_url
+from ytdl_session import YoutubeDLSessions
 
 logger = logging.getLogger("yt.playlist")
 logger.setLevel(logging.DEBUG)
 logging.basicConfig(format="[%(name)s] %(levelname)s: %(message)s", level=logging.DEBUG)
 
 
-def get_playlist_ids(playlist_url: str):
+# Flat extraction only reads the playlist pages; the videos themselves are not resolved.
+PLAYLIST_OPTS: Dict[str, Any] = {
+    'quiet': True,
+    'skip_download': True,
+    'ignoreerrors': True,
+    'extract_flat': 'in_playlist',
+}
+
+
+def get_playlist_ids(playlist_url: str, sessions: Optional[YoutubeDLSessions] = None) -> List[str]:
     """
-    Uses yt-dlp in flat-playlist mode to extract video IDs.
-    
-    Each line of the output corresponds to one video ID.
+    Uses yt-dlp in flat-playlist mode to extract video IDs, in-process.
+
+    With `sessions`, the calling thread's long-lived YoutubeDL is reused instead of building a new one.
     """
-    command = [
-        "yt-dlp",
-        playlist_url,
-        "--flat-playlist",
-        "-O", "%(id)s"
-    ]
-    
     try:
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error executing yt-dlp: {e.stderr}")
+        if sessions is not None:
+            info = sessions.extract_info(playlist_url, key="playlist", opts=PLAYLIST_OPTS, download=False)
+        else:
+            with yt_dlp.YoutubeDL(PLAYLIST_OPTS) as ydl:
+                info = ydl.extract_info(playlist_url, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        logger.error(f"Error executing yt-dlp: {e}")
         return []
-    
-    # Each line in stdout is a video ID.
-    return result.stdout.splitlines()
 
-def parse_playlist(playlist_url: str) -> Iterable:
+    entries = (info or {}).get('entries') or []
+    return [entry['id'] for entry in entries if entry and entry.get('id')]
+
+def parse_playlist(playlist_url: str, sessions: Optional[YoutubeDLSessions] = None) -> Iterable:
     """
     Extracts and parses a YouTube playlist using yt-dlp in flat mode.
 
     Args:
         playlist_url (str): The URL or ID of the YouTube playlist.
+        sessions (YoutubeDLSessions): Optional long-lived YoutubeDL instances to extract with.
     
     Returns:
-        List[Dict[str, Any]]: A list of playlist entries with minimal metadata.
-                              Each entry typically contains an 'id' and optionally a 'title'.
+        List[str]: The video IDs of the playlist entries, in playlist order.
     """
-    ydl_opts = {
-        'quiet': False,
-        'skip_download': True,
-        'ignore-errors': True,
-        'flat-playlist': True
-    }
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        try:
-            playlist_id = parse_youtube_playlist_url_to_id(playlist_url)
-            if playlist_id is None:
-                return []
-            playlist_url = to_youtube_playlist_url(playlist_id)
-            result = get_playlist_ids(playlist_url)
-        except Exception as e:
-            logger.error(f"Error extracting playlist info: {e}")
+    try:
+        playlist_id = parse_youtube_playlist_url_to_id(playlist_url)
+        if playlist_id is None:
             return []
-        logger.info(f"Found {len(result)} in {playlist_url}")
+        playlist_url = to_youtube_playlist_url(playlist_id)
+        result = get_playlist_ids(playlist_url, sessions=sessions)
+    except Exception as e:
+        logger.error(f"Error extracting playlist info: {e}")
+        return []
+    logger.info(f"Found {len(result)} in {playlist_url}")
 
     if not isinstance(result, list):
         logger.error("No playlist info found.")
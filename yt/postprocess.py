@@ -0,0 +1,207 @@
+import base64
+import logging
+import os
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
+
+from mutagen.id3 import ID3
+from mutagen.id3._util import error
+from mutagen.id3._frames import APIC, COMM, TALB, TCON, TDRC, TIT2, TPE1, TXXX
+
+logger = logging.getLogger("postprocess")
+
+# Containers the downloader produces and can tag: MP3 (re-encoded), and Opus in Ogg or AAC in M4A (passthrough).
+AUDIO_EXTENSIONS: Tuple[str, ...] = (".mp3", ".opus", ".ogg", ".m4a")
+
+
+def audio_extension(path: str) -> Optional[str]:
+    """The file's extension if it is one of AUDIO_EXTENSIONS."""
+    ext = os.path.splitext(path)[1].lower()
+    return ext if ext in AUDIO_EXTENSIONS else None
+
+
+def resolve_audio_path(path: str) -> str:
+    """
+    `path` itself when it names an audio file, otherwise the existing `path + ext` for the first known
+    extension (download paths are often passed without one), falling back to `path + ".mp3"`.
+    """
+    if audio_extension(path):
+        return path
+    for ext in AUDIO_EXTENSIONS:
+        if os.path.exists(path + ext):
+            return path + ext
+    return path + ".mp3"
+
+
+@dataclass
+class TrackTags:
+    """
+    Everything written into a finished file, gathered in memory from the download (source comment,
+    cover art), identification and the caller, and written with a single save.
+    """
+    title: Optional[str] = None
+    artist: Optional[str] = None
+    album: Optional[str] = None
+    release_date: Optional[str] = None
+    genre: Optional[str] = None
+    comment: Optional[str] = None
+    cover: Optional[bytes] = field(default=None, repr=False)
+    cover_mime: str = "image/jpeg"
+    # Custom TXXX frames by description, e.g. {"ISRC": ...}.
+    extra: Dict[str, str] = field(default_factory=dict)
+
+    def merge(self, other: Optional["TrackTags"]) -> "TrackTags":
+        """
+        A copy of these tags with every field that is set on `other` taken from it.
+
+        :param other: Tags that win, e.g. identification results over the download's defaults.
+        """
+        if other is None:
+            return self
+        merged = TrackTags(**{f.name: getattr(self, f.name) for f in fields(self)})
+        for f in fields(other):
+            value = getattr(other, f.name)
+            if f.name == "extra":
+                merged.extra = {**self.extra, **other.extra}
+            elif f.name == "cover_mime":
+                continue
+            elif value:
+                setattr(merged, f.name, value)
+        if other.cover:
+            merged.cover_mime = other.cover_mime
+        return merged
+
+
+TEXT_FRAMES = (
+    ("TIT2", TIT2, "title"),
+    ("TPE1", TPE1, "artist"),
+    ("TALB", TALB, "album"),
+    ("TDRC", TDRC, "release_date"),
+    ("TCON", TCON, "genre"),
+)
+
+
+# Vorbis comment and MP4 atom names of the text fields.
+VORBIS_FIELDS = (("title", "title"), ("artist", "artist"), ("album", "album"), ("release_date", "date"),
+                 ("genre", "genre"), ("comment", "comment"))
+MP4_FIELDS = (("title", "\xa9nam"), ("artist", "\xa9ART"), ("album", "\xa9alb"), ("release_date", "\xa9day"),
+              ("genre", "\xa9gen"), ("comment", "\xa9cmt"))
+MP4_FREEFORM = "----:com.apple.iTunes:"
+
+
+def write_tags(file_path: str, tags: TrackTags, logger: logging.Logger = logger) -> None:
+    """
+    Write all tags into the file in place with one save, in the container's own tag format:
+    ID3 for MP3, Vorbis comments for Ogg Opus/Vorbis, iTunes atoms for M4A.
+    """
+    ext = audio_extension(file_path)
+    if ext in (".opus", ".ogg"):
+        _write_vorbis(file_path, tags)
+    elif ext == ".m4a":
+        _write_mp4(file_path, tags)
+    else:
+        _write_id3(file_path, tags)
+    logger.debug(f"Wrote tags to {file_path}")
+
+
+def _write_id3(file_path: str, tags: TrackTags) -> None:
+    """
+    Write all tags into an MP3 in place with one ID3 save.
+
+    Only the tag block at the start of the file is rewritten, the audio frames are untouched (mutagen
+    pads the tag, so later edits usually fit without moving the audio at all). Saved as ID3v2.3 for
+    file managers like Dolphin that do not read v2.4.
+    """
+    try:
+        audio = ID3(file_path)
+    except error:
+        audio = ID3()
+
+    for frame_id, frame, name in TEXT_FRAMES:
+        value = getattr(tags, name)
+        if value:
+            audio.delall(frame_id)
+            audio.add(frame(encoding=3, text=value))
+    if tags.comment:
+        audio.delall("COMM")
+        audio.add(COMM(encoding=3, lang="eng", desc="", text=tags.comment))
+    for desc, value in tags.extra.items():
+        audio.delall(f"TXXX:{desc}")
+        audio.add(TXXX(encoding=3, desc=desc, text=str(value)))
+    if tags.cover:
+        audio.delall("APIC")
+        audio.add(APIC(encoding=3, mime=tags.cover_mime, type=3, desc="Cover", data=tags.cover))
+
+    audio.save(file_path, v2_version=3)
+
+
+def _write_vorbis(file_path: str, tags: TrackTags) -> None:
+    """Vorbis comments; the cover goes into METADATA_BLOCK_PICTURE as a base64 FLAC picture block."""
+    from mutagen import File as MutagenFile
+    from mutagen.flac import Picture
+
+    audio = MutagenFile(file_path)
+    if audio is None:
+        raise ValueError(f"Unsupported Ogg stream: {file_path}")
+    if audio.tags is None:
+        audio.add_tags()
+    for name, key in VORBIS_FIELDS:
+        value = getattr(tags, name)
+        if value:
+            audio[key] = [value]
+    for desc, value in tags.extra.items():
+        audio[desc.upper().replace(" ", "_")] = [str(value)]
+    if tags.cover:
+        picture = Picture()
+        picture.type = 3
+        picture.mime = tags.cover_mime
+        picture.desc = "Cover"
+        picture.data = tags.cover
+        audio["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+    audio.save()
+
+
+def _write_mp4(file_path: str, tags: TrackTags) -> None:
+    """iTunes-style atoms; custom fields become freeform ----:com.apple.iTunes: atoms."""
+    from mutagen.mp4 import MP4, MP4Cover, MP4FreeForm
+
+    audio = MP4(file_path)
+    if audio.tags is None:
+        audio.add_tags()
+    for name, key in MP4_FIELDS:
+        value = getattr(tags, name)
+        if value:
+            audio[key] = [value]
+    for desc, value in tags.extra.items():
+        audio[MP4_FREEFORM + desc] = [MP4FreeForm(str(value).encode("utf-8"))]
+    if tags.cover:
+        image_format = MP4Cover.FORMAT_PNG if tags.cover_mime == "image/png" else MP4Cover.FORMAT_JPEG
+        audio["covr"] = [MP4Cover(tags.cover, imageformat=image_format)]
+    audio.save()
+
+
+def read_tags(file_path: str) -> TrackTags:
+    """
+    Title, artist and album of an audio file in any supported container; missing values are None.
+    """
+    from mutagen import File as MutagenFile
+
+    audio = MutagenFile(file_path)
+    tags = TrackTags()
+    if not audio or not getattr(audio, "tags", None):
+        return tags
+
+    def first(*keys: str) -> Optional[str]:
+        for key in keys:
+            if key not in audio.tags:
+                continue
+            value = audio.tags[key]
+            values: List = getattr(value, "text", None) or (value if isinstance(value, list) else [value])
+            if values and values[0]:
+                return str(values[0])
+        return None
+
+    tags.artist = first("TPE1", "artist", "\xa9ART")
+    tags.album = first("TALB", "album", "\xa9alb")
+    tags.title = first("TIT2", "title", "\xa9nam")
+    return tags
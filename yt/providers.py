@@ -0,0 +1,383 @@
+import abc
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple, TypeVar
+
+import httpx
+from youtubesearchpython import VideosSearch # pyright: ignore[reportMissingImports]
+
+from models.video import VideoData
+
+logger = logging.getLogger("providers")
+
+T = TypeVar("T")
+
+# Monkey-patch httpx to remove the 'proxies' argument, fixing the error in youtubesearchpython.
+_original_post = httpx.post
+def _patched_post(*args, **kwargs):
+    kwargs.pop('proxies', None)
+    return _original_post(*args, **kwargs)
+httpx.post = _patched_post
+
+
+class SearchProvider(abc.ABC):
+    """
+    A search backend. `search` returns a payload shaped like youtubesearchpython's VideosSearch
+    result ({"result": [...]}) so it can be cached as is and parsed with VideoData.parse_video_data.
+    """
+    name: str = "provider"
+
+    @abc.abstractmethod
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Search and return up to `max_results` results as {"result": [...]}."""
+
+    def search_videos(self, query: str, max_results: int) -> List[VideoData]:
+        return [VideoData.parse_video_data(result) for result in self.search(query, max_results).get('result', [])]
+
+    def search_pages(self, query: str, page_size: int) -> Generator[Dict[str, Any], None, None]:
+        """
+        Result pages of a search, each {"result": [...]} and fetched with one request when the consumer asks
+        for it. Backends without a continuation only have the first page.
+        """
+        yield self.search(query, page_size)
+
+    def close(self) -> None:
+        """Release whatever the provider holds (threads, sessions); most hold nothing."""
+
+    def __enter__(self) -> "SearchProvider":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class YoutubeSearchPythonProvider(SearchProvider):
+    name = "youtubesearchpython"
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        result = VideosSearch(query, limit=max_results).result()
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result
+
+    def search_pages(self, query: str, page_size: int) -> Generator[Dict[str, Any], None, None]:
+        """Follows the search's continuation with VideosSearch.next()."""
+        # Constructing VideosSearch performs the first request.
+        videos_search = VideosSearch(query, limit=page_size)
+        while True:
+            result = videos_search.result()
+            yield json.loads(result) if isinstance(result, str) else result
+            if not videos_search.next():
+                return
+
+
+def format_duration(seconds: Optional[float]) -> Optional[str]:
+    """Seconds as YouTube shows them, "m:ss" or "h:mm:ss"; None when unknown (e.g. live streams)."""
+    if seconds is None:
+        return None
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def spoken_duration(seconds: Optional[float]) -> Optional[str]:
+    """Seconds as in YouTube's accessibility label, e.g. "4 minutes, 10 seconds"; None when unknown."""
+    if seconds is None:
+        return None
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    parts = [(hours, "hour"), (minutes, "minute"), (seconds, "second")]
+    return ", ".join(f"{value} {unit}{'' if value == 1 else 's'}" for value, unit in parts if value) or "0 seconds"
+
+
+def format_views(views: Optional[int]) -> Dict[str, Optional[str]]:
+    """A view count as youtubesearchpython's {"text": "1,234,567 views", "short": "1.2M views"}; None values when unknown."""
+    if views is None:
+        return {'text': None, 'short': None}
+    short = str(views)
+    for threshold, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "K")):
+        if views >= threshold:
+            short = f"{views / threshold:.1f}".rstrip("0").rstrip(".") + suffix
+            break
+    return {'text': f"{views:,} view{'' if views == 1 else 's'}", 'short': f"{short} view{'' if views == 1 else 's'}"}
+
+
+def published_time(entry: Dict[str, Any], now: Optional[datetime] = None) -> Optional[str]:
+    """
+    The upload age as YouTube's relative text ("3 years ago"), which is what the age boost reads, from
+    the entry's timestamp or upload_date; None when yt-dlp did not report either (usual in flat mode).
+    """
+    now = now or datetime.now(timezone.utc)
+    timestamp = entry.get('timestamp') or entry.get('release_timestamp')
+    if timestamp:
+        published = datetime.fromtimestamp(timestamp, timezone.utc)
+    elif entry.get('upload_date'):
+        try:
+            published = datetime.strptime(entry['upload_date'], "%Y%m%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    else:
+        return None
+    seconds = max(0, int((now - published).total_seconds()))
+    for unit, length in (("year", 365 * 86400), ("month", 30 * 86400), ("week", 7 * 86400), ("day", 86400),
+                         ("hour", 3600), ("minute", 60)):
+        if seconds >= length:
+            count = seconds // length
+            return f"{count} {unit}{'' if count == 1 else 's'} ago"
+    return f"{seconds} second{'' if seconds == 1 else 's'} ago"
+
+
+def ytdlp_entry_to_result(entry: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Map a flat yt-dlp search entry onto the youtubesearchpython result shape. Fields yt-dlp did not
+    report stay None, as youtubesearchpython leaves them, instead of being filled with made-up values.
+    """
+    video_id = entry.get('id') or ''
+    title = entry.get('title') or ''
+    duration = format_duration(entry.get('duration'))
+    link = entry.get('webpage_url') or entry.get('url') or f"https://www.youtube.com/watch?v={video_id}"
+    channel_id = entry.get('channel_id') or entry.get('uploader_id') or ''
+    return {
+        'type': 'video',
+        'id': video_id,
+        'title': title,
+        'publishedTime': published_time(entry, now),
+        'duration': duration,
+        'viewCount': format_views(entry.get('view_count')),
+        'thumbnails': [
+            {'url': thumb.get('url', ''), 'width': thumb.get('width') or 0, 'height': thumb.get('height') or 0}
+            for thumb in entry.get('thumbnails') or []
+        ],
+        'richThumbnail': None,
+        'descriptionSnippet': [{'text': entry['description']}] if entry.get('description') else None,
+        'channel': {
+            'name': entry.get('channel') or entry.get('uploader'),
+            'id': channel_id,
+            'thumbnails': [],
+            'link': entry.get('channel_url') or entry.get('uploader_url') or (f"https://www.youtube.com/channel/{channel_id}" if channel_id else None),
+        },
+        'accessibility': {'title': title, 'duration': spoken_duration(entry.get('duration'))},
+        'link': link,
+        'shelfTitle': None,
+    }
+
+
+class YtDlpSearchProvider(SearchProvider):
+    """Searches with yt-dlp's `ytsearchN:` in flat mode: one request, no per-video extraction."""
+    name = "yt-dlp"
+
+    def __init__(self, ydl_opts: Optional[Dict[str, Any]] = None):
+        self.ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'extract_flat': 'in_playlist', **(ydl_opts or {})}
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
+            info = ydl.extract_info(f"ytsearch{max_results}:{query}", download=False) or {}
+        return {'result': [ytdlp_entry_to_result(entry) for entry in info.get('entries') or [] if entry]}
+
+
+class StaticSearchProvider(SearchProvider):
+    """
+    Local fake for tests and benchmarks: answers from recorded payloads (query -> payload, or a callable),
+    with optional artificial latency and failure rate.
+    """
+
+    def __init__(self, payloads: Dict[str, Dict[str, Any]] | Callable[[str, int], Dict[str, Any]], name: str = "static",
+                 latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.payloads = payloads
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name}: simulated failure")
+        if callable(self.payloads):
+            payload = self.payloads(query, max_results)
+        else:
+            payload = self.payloads.get(query, {'result': []})
+        return {'result': list(payload.get('result', []))[:max_results]}
+
+
+@dataclass
+class ProviderStats:
+    """Exponentially weighted latency and error rate of one provider."""
+    calls: int = 0
+    errors: int = 0
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+    alpha: float = field(default=0.2, repr=False)
+
+    def record(self, seconds: float, error: Optional[Exception] = None) -> None:
+        self.calls += 1
+        failed = 1.0 if error is not None else 0.0
+        self.error_rate += self.alpha * (failed - self.error_rate)
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+            self.last_error_at = time.monotonic()
+        else:
+            self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+
+
+class FailoverSearch(SearchProvider):
+    """
+    Tries providers in order of health and speed, and fails over to the next one when a search raises.
+
+    Healthy providers are ranked by their smoothed latency; one that has not answered yet counts as
+    fastest so that it gets measured, and ties keep the configured order.
+
+    With `hedge_after` set, a second provider is started when the first has not answered after that
+    many seconds, and whichever succeeds first is used. search_pages fails over (and hedges) on the
+    first page and then follows the continuation of the provider that served it. A provider whose smoothed error rate is above
+    `max_error_rate` is moved behind the healthy ones for `cooldown` seconds after its last error.
+    """
+    name = "failover"
+
+    def __init__(self, providers: Sequence[SearchProvider], hedge_after: Optional[float] = None, max_error_rate: float = 0.5,
+                 cooldown: float = 60.0, max_workers: int = 16, logger: logging.Logger = logger):
+        if not providers:
+            raise ValueError("At least one search provider is required")
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.logger = logger
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in self.providers}
+        self._lock = threading.Lock()
+        # Shared by all callers (e.g. every SearchStage thread), so it needs room for several searches at once.
+        self._executor = ThreadPoolExecutor(max_workers=max(2, max_workers), thread_name_prefix="hedge") if hedge_after is not None else None
+
+    def ranked(self) -> List[SearchProvider]:
+        """Healthy providers first, fastest first, then those cooling down after errors."""
+        now = time.monotonic()
+        with self._lock:
+            def rank(provider: SearchProvider) -> Tuple[bool, float]:
+                stats = self.stats[provider.name]
+                cooling = stats.error_rate > self.max_error_rate and stats.last_error_at is not None and now - stats.last_error_at < self.cooldown
+                return cooling, stats.latency or 0.0
+            return sorted(self.providers, key=rank)
+
+    def _call(self, provider: SearchProvider, request: Callable[[SearchProvider], T]) -> T:
+        start = time.perf_counter()
+        try:
+            result = request(provider)
+        except Exception as e:
+            with self._lock:
+                self.stats[provider.name].record(time.perf_counter() - start, e)
+            raise
+        with self._lock:
+            self.stats[provider.name].record(time.perf_counter() - start)
+        return result
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        return self._first_success(query, lambda provider: provider.search(query, max_results))
+
+    def search_pages(self, query: str, page_size: int) -> Generator[Dict[str, Any], None, None]:
+        def first_page(provider: SearchProvider) -> Tuple[Generator[Dict[str, Any], None, None], Dict[str, Any]]:
+            pages = provider.search_pages(query, page_size)
+            return pages, next(pages, {'result': []})
+
+        pages, first = self._first_success(query, first_page)
+        try:
+            yield first
+            yield from pages
+        finally:
+            pages.close()
+
+    def _first_success(self, query: str, request: Callable[[SearchProvider], T]) -> T:
+        """`request` on the providers in ranked order (hedged when enabled) until one succeeds."""
+        providers = self.ranked()
+        executor = self._executor
+        if executor is not None and len(providers) > 1:
+            return self._hedged(executor, providers, query, request)
+        last_error: Optional[Exception] = None
+        for provider in providers:
+            try:
+                return self._call(provider, request)
+            except Exception as e:
+                self.logger.warning(f"Search provider {provider.name} failed for {query!r}: {e}")
+                last_error = e
+        raise RuntimeError(f"All search providers failed for {query!r}") from last_error
+
+    def _hedged(self, executor: ThreadPoolExecutor, providers: List[SearchProvider], query: str, request: Callable[[SearchProvider], T]) -> T:
+        remaining = list(providers)
+        running: Dict[Future, SearchProvider] = {}
+        last_error: Optional[Exception] = None
+
+        def start_next() -> None:
+            provider = remaining.pop(0)
+            running[executor.submit(self._call, provider, request)] = provider
+
+        start_next()
+        while running:
+            # Wait for the hedge delay only while another provider could still be started.
+            done, _ = wait(list(running), timeout=self.hedge_after if remaining else None, return_when=FIRST_COMPLETED)
+            if not done:
+                self.logger.debug(f"Hedging search for {query!r} with {remaining[0].name}")
+                start_next()
+                continue
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    self.logger.warning(f"Search provider {provider.name} failed for {query!r}: {e}")
+                    last_error = e
+                    if remaining:
+                        start_next()
+        raise RuntimeError(f"All search providers failed for {query!r}") from last_error
+
+    def close(self) -> None:
+        """
+        Stop the hedge threads (searches still running are not waited for) and close the providers.
+        Later searches try the providers one after another without hedging.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for provider in self.providers:
+            provider.close()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: {'calls': stats.calls, 'errors': stats.errors, 'latency': stats.latency, 'error_rate': stats.error_rate,
+                           'last_error': stats.last_error} for name, stats in self.stats.items()}
+
+
+PROVIDERS: Dict[str, Callable[[], SearchProvider]] = {
+    YoutubeSearchPythonProvider.name: YoutubeSearchPythonProvider,
+    YtDlpSearchProvider.name: YtDlpSearchProvider,
+}
+
+
+def provider_from_names(names: str, hedge_after: Optional[float] = None) -> SearchProvider:
+    """
+    Build a provider from a comma-separated list such as "youtubesearchpython,yt-dlp"; more than one
+    name gives a FailoverSearch over them, which ranks them by health and latency.
+    """
+    providers = [PROVIDERS[name.strip()]() for name in names.split(",") if name.strip()]
+    if len(providers) == 1:
+        return providers[0]
+    return FailoverSearch(providers, hedge_after=hedge_after)
+
+
+_default_provider: Optional[SearchProvider] = None
+
+
+def default_provider() -> SearchProvider:
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = YoutubeSearchPythonProvider()
+    return _default_provider
@@ -1,15 +1,42 @@
 import logging
 import pprint
 import re
-from typing import Tuple, List, Any
-from rapidfuzz import fuzz  # pyright: ignore[reportMissingImports]
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple, List, Any, Dict, NamedTuple, Optional, Sequence, Union
+import numpy as np
+from rapidfuzz import fuzz, process  # pyright: ignore[reportMissingImports]
 
 import helper
 from models.video import VideoData
+from models.candidate import Candidate
+from normalize import TextNormalizer, default_normalizer
 
-# Configure logging at the module level if you haven't already
+# The level is left to the application; step logging is skipped entirely unless DEBUG is enabled.
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+
+# The engine reads the same fields from a full VideoData or a lightweight Candidate projection.
+ScoredVideo = Union[VideoData, Candidate]
+
+# Keyword groups used by the scoring steps; matched as whole words, case-insensitive.
+KEYWORD_GROUPS: Dict[str, List[str]] = {
+    "official": ["official"],
+    "music": ["music"],
+    "performance": ["perform", "performs", "performance", "performed", "instrumental", "live", "acoustic"],
+    "cover": ["cover", "rendition", "remake"],
+    "live": [
+        "live", "concert", "session", "acoustic", "unplugged", "multicam",
+        "livestream", "broadcast", "live-stream", "playthrough", "adaptation", "transcription"
+    ],
+    "reaction": ["reaction", "analysis", "reacts", "react", "responds", "review", "playthrough"],
+    "slowed": ["slowed", "reverb", "reverbed", "slow"],
+    "album": ["album", "albums", "ep"],
+    "lyrics": ["lyric", "lyrics"],
+    "uncensored": ["uncensored"],
+}
+
+# "Song Title - Artist (tag)" where the tag contains 'official'
+TITLE_FORMAT_PATTERN = r"^\s*(?P<song>(?:\w+\s+){1,6}\w+)\s*-\s*(?P<artist>(?:\w+\s+){0,2}\w+)\s*\((?P<tag>.*?official.*?)\)\s*$"
 
 
 def count_keywords(text: str, keywords: List[str]) -> int:
@@ -27,35 +54,18 @@ def count_keywords(text: str, keywords: List[str]) -> int:
 def compare_video(
     query_title: str,
     video: VideoData,
-    fuzzy_score_multiplier: float = 0.9,
-    view_threshold: int = 1000,
-    boost_official: int = 10,         # + when "official" is in the title (applied once)
-    boost_music: int = 5,             # + when "music" is in the title (applied once)
-    boost_duration: int = 5,          # + when in preferred duration range
-    boost_ultra_duration: int = 100,  # big penalty when duration is out of ultra bounds
-    penalty_performance: int = 10,    # - per occurrence for performance-related keywords
-    boost_viewers: int = 5,           # + when view count above threshold
-    penalty_cover: int = 30,          # - per occurrence when cover-related keywords appear (if not in query)
-    penalty_live: int = 40,           # - per occurrence when live-related keywords appear (if not in query)
-    penalty_album: int = 10,          # - per occurrence for album-related keywords
-    penalty_pointless_words: int = 10,# - per occurrence for "slowed", "reverb", etc.
-    penalty_reaction: int = 100,      # - per occurrence for reaction/analysis keywords
-    boost_lyrics: int = 10,           # + when lyric-related keywords appear (applied once)
-    boost_per_10000: float = 0.03,    # + (views / 10,000 * this)
-    boost_official_named_channel: int = 20,  # + if channel name is in the title (applied once)
-    boost_age_factor: float = 0.5,    # + per year old the video is
-    # New parameter for the title format boost:
-    boost_title_format: int = 15,
-    min_time: int = 120,
-    ultra_min_time: int = 60,
-    ultra_max_time: int = 1200,
-    max_time: int = 600,
-    debug_output_object: bool = False  # if True, return raw object (list of dicts) for debugging
+    *,
+    debug_output_object: bool = False,  # if True, return raw object (list of dicts) for debugging
+    expected_duration: Optional[float] = None,  # seconds, e.g. the Lidarr track duration
+    **weights: Any,
 ) -> Tuple[float, str, Any]:
     """
     Compare a query title with a video's title using fuzzy matching and adjust
     the score with additional boosts/penalties based on video metadata.
 
+    Scores with a ScoringEngine; `weights` are ScoreWeights fields to override (e.g. boost_official=20),
+    and one engine is kept per set of weights. With DEBUG logging enabled every step is logged.
+
     If debug_output_object is True, the third returned value is a raw Python object
     (a list of dictionaries) describing each scoring step.
 
@@ -64,60 +74,533 @@ def compare_video(
       cleaned_video_title (str),
       debug_output (object) -> raw object if debug_output_object=True, else an empty list.
     """
+    engine = _engine_for(ScoreWeights(**weights) if weights else None)
+    # Steps are only built when someone reads them: the caller or the DEBUG log below.
+    log_steps = logger.isEnabledFor(logging.DEBUG)
+    if log_steps:
+        logger.debug("Comparing query_title=%r with video_title=%r", query_title, video.title)
+        logger.debug("Raw video metadata: %s", pprint.pformat(video))
+
+    score, video_title, score_steps = engine.compare(query_title, video, debug_output_object=debug_output_object or log_steps,
+                                                     expected_duration=expected_duration)
+
+    if log_steps:
+        logger.debug("\n\n=== Score Debug Steps for: %s ===", video_title)
+        for idx, step in enumerate(score_steps, start=1):
+            logger.debug("Step %s: %s | Change: %s | Score: %.2f",
+                         idx, step["description"], step["change"], step["score"])
+        logger.debug("FINAL SCORE for '%s': %.2f", video_title, score)
 
-    # --- Preserve the original title for regex checks ---
-    raw_video_title = video.title or ""
-    original_title = raw_video_title.strip()
+    return score, video_title, score_steps if debug_output_object else []
 
-    # --- Clean the video title for general processing ---
-    # Remove punctuation except spaces and convert to lowercase.
-    ascii_only = raw_video_title.encode("ascii", errors="ignore").decode("ascii", errors="ignore")
-    video_title = re.sub(r"[^a-zA-Z0-9\s]+", "", ascii_only).lower()
+# Whole-word matching with \b is equivalent to comparing maximal runs of word characters,
+# so every keyword that only contains word characters can be counted from a single tokenization.
+WORD_PATTERN = re.compile(r"\w+")
+NON_ALNUM_PATTERN = re.compile(r"[^a-zA-Z0-9\s]+")
+OFFICIAL_PATTERN = re.compile(r"\bofficial\b", flags=re.IGNORECASE)
+MUSIC_PATTERN = re.compile(r"\bmusic\b", flags=re.IGNORECASE)
+AGE_PATTERN = re.compile(r"(\d+)\s+year")
+TITLE_FORMAT_REGEX = re.compile(TITLE_FORMAT_PATTERN, flags=re.IGNORECASE)
 
-    duration_seconds = helper.to_seconds(video.duration)
-    views = helper.fix_viewers(video.viewCount.text if video.viewCount else "0")
+# From this many candidates on, one score_batch call is faster than compare per candidate; below it,
+# e.g. for a 20 result search page, the numpy overhead dominates (see `python benchmark.py scoring`).
+BATCH_MIN_CANDIDATES = 64
 
-    score_steps: List[dict] = []
-    logger.debug("Comparing query_title=%r with video_title=%r", query_title, video_title)
-    logger.debug("Raw video metadata: %s", pprint.pformat(video))
 
+def expected_duration_tolerance(expected_duration: float, tolerance: float, tolerance_ratio: float) -> float:
+    return max(tolerance, expected_duration * tolerance_ratio)
+
+
+def expected_duration_change(delta: float, expected_duration: float, tolerance: float, tolerance_ratio: float,
+                             boost: float, penalty_per_10s: float, max_penalty: float) -> float:
+    """
+    Score change for a candidate that is `delta` seconds longer (or shorter) than expected: a flat boost
+    within the tolerance, otherwise a penalty growing with the excess up to `max_penalty`.
+    """
+    allowed = expected_duration_tolerance(expected_duration, tolerance, tolerance_ratio)
+    excess = abs(delta) - allowed
+    if excess <= 0:
+        return float(boost)
+    return -min(max_penalty, excess / 10.0 * penalty_per_10s)
+
+
+class KeywordMatcher:
+    """
+    Counts all keyword groups of a text in one scan, with the same results as calling
+    count_keywords once per group.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]] = KEYWORD_GROUPS):
+        self.groups: Tuple[str, ...] = tuple(groups)
+        # lowercase keyword -> the groups it belongs to (repeated when a group lists it twice)
+        self._word_groups: Dict[str, Tuple[str, ...]] = {}
+        # Keywords containing non-word characters (e.g. "live-stream") keep their own pattern.
+        self._phrases: List[Tuple[str, "re.Pattern[str]"]] = []
+        self._unicode_patterns: List[Tuple[str, "re.Pattern[str]"]] = []
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                if WORD_PATTERN.fullmatch(keyword) and keyword.isascii():
+                    self._word_groups[keyword.lower()] = self._word_groups.get(keyword.lower(), ()) + (group,)
+                else:
+                    self._phrases.append((group, re.compile(r'\b' + re.escape(keyword) + r'\b', flags=re.IGNORECASE)))
+        # Non-ASCII tokens can still match an ASCII keyword under IGNORECASE (e.g. the Kelvin sign),
+        # so those rare tokens are checked with the regex engine itself.
+        self._unicode_patterns = [
+            (keyword, re.compile(re.escape(keyword), flags=re.IGNORECASE)) for keyword in self._word_groups
+        ]
+
+    def _groups_for_token(self, token: str) -> Tuple[str, ...]:
+        if token.isascii():
+            return self._word_groups.get(token.lower(), ())
+        for keyword, pattern in self._unicode_patterns:
+            if pattern.fullmatch(token):
+                return self._word_groups[keyword]
+        return ()
+
+    def count(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.groups, 0)
+        for token in WORD_PATTERN.findall(text):
+            for group in self._groups_for_token(token):
+                counts[group] += 1
+        for group, pattern in self._phrases:
+            counts[group] += len(pattern.findall(text))
+        return counts
+
+
+class TitleTerms(NamedTuple):
+    counts: Dict[str, int]
+    cleaned_title: str
+    words: Tuple[str, ...]
+
+
+class ScoreStep(NamedTuple):
+    """One applied boost or penalty, as reported in the debug output of compare."""
+    key: str
+    step: str
+    description: str
+    change: str
+    value: float
+
+
+# Steps are reported in this order, whether they depend on the query or only on the candidate.
+STEP_ORDER: Dict[str, int] = {key: index for index, key in enumerate((
+    "official", "music", "fuzzy", "same_order", "performance", "cover", "live", "reaction", "slowed", "album",
+    "lyrics", "uncensored", "channel", "duration", "behind_the_scenes", "ultra_duration", "expected_duration",
+    "viewers", "per_10k_views", "age", "title_format",
+))}
+
+
+def step_records(steps: Sequence[ScoreStep]) -> List[dict]:
+    """The debug output of compare: steps in STEP_ORDER with the running score after each."""
+    records: List[dict] = []
     score = 0.0
+    for step in sorted(steps, key=lambda step: STEP_ORDER[step.key]):
+        score += step.value
+        records.append({"step": step.step, "description": step.description, "change": step.change, "score": score})
+    return records
+
+
+class CandidateFeatures(NamedTuple):
+    """
+    Query-independent part of a candidate's score: the steps that only depend on the video, summed
+    into base_score, and what the query-dependent steps need.
+    """
+    cleaned_title: str
+    words: Sequence[str]
+    base_score: float
+    cover_penalty: float
+    live_penalty: float
+    duration_seconds: int
+    counts: Dict[str, int]
+    steps: Tuple[ScoreStep, ...] = ()
+
+
+@dataclass
+class BatchScores:
+    scores: np.ndarray       # (queries, candidates) score matrix
+    best_index: np.ndarray   # argmax per query
+    best_score: np.ndarray   # max per query
+
+    def best(self, candidates: Sequence[ScoredVideo]) -> List[Tuple[Optional[ScoredVideo], float]]:
+        """
+        Best candidate per query, or None when no candidate scored above zero (like find_best_match).
+        """
+        return [
+            (candidates[int(index)] if score > 0 else None, float(score))
+            for index, score in zip(self.best_index, self.best_score)
+        ]
+
+
+@dataclass(frozen=True)
+class ScoreWeights:
+    """Weights and thresholds of the scoring steps; compare_video accepts the same names as overrides."""
+    fuzzy_score_multiplier: float = 0.9
+    view_threshold: int = 1000
+    boost_official: int = 10
+    boost_music: int = 5
+    boost_duration: int = 5
+    boost_ultra_duration: int = 100
+    penalty_performance: int = 10
+    boost_viewers: int = 5
+    penalty_cover: int = 30
+    penalty_live: int = 40
+    penalty_album: int = 10
+    penalty_pointless_words: int = 10
+    penalty_reaction: int = 100
+    boost_lyrics: int = 10
+    boost_per_10000: float = 0.03
+    boost_official_named_channel: int = 20
+    boost_age_factor: float = 0.5
+    boost_title_format: int = 15
+    min_time: int = 120
+    ultra_min_time: int = 60
+    ultra_max_time: int = 1200
+    max_time: int = 600
+    duration_tolerance: int = 10
+    duration_tolerance_ratio: float = 0.05
+    boost_expected_duration: int = 25
+    penalty_duration_per_10s: int = 10
+    max_duration_penalty: int = 60
+    # Candidates further than this from the expected duration are rejected outright (see MatchResult).
+    max_duration_delta: int = 60
+    max_duration_delta_ratio: float = 0.25
+
+
+@dataclass
+class MatchResult:
+    video: Optional[VideoData]
+    score: float
+    # Candidate duration minus the expected duration, in seconds; None without an expected duration.
+    duration_delta: Optional[float] = None
+    rejected: int = 0  # candidates dropped for being too far from the expected duration
+
+    def __iter__(self):
+        # Unpacks like the (best_video, best_score) tuple of find_best_match.
+        return iter((self.video, self.score))
+
+
+class ScoringEngine:
+    """
+    The scoring rules: all keyword groups are counted in a single scan, the cleanup patterns are
+    compiled once, and score steps are only built when requested. The query-independent rules live in
+    candidate_features and are shared by compare and score_batch; compare_video wraps an engine.
+    """
 
-    # --- Boosts applied only once (then remove the term) ---
-    if count_keywords(video_title, ["official"]) > 0:
-        score += boost_official
-        score_steps.append({
-            "step": "Official boost",
-            "description": "Found 'official' in title",
-            "change": f"+ {boost_official}",
-            "score": score,
-        })
-        video_title = re.sub(r"\bofficial\b", "", video_title, flags=re.IGNORECASE)
-
-    if count_keywords(video_title, ["music"]) > 0:
-        score += boost_music
-        score_steps.append({
-            "step": "Music boost",
-            "description": "Found 'music' in title",
-            "change": f"+ {boost_music}",
-            "score": score,
-        })
-        video_title = re.sub(r"\bmusic\b", "", video_title, flags=re.IGNORECASE)
-
-    # --- Initial fuzzy matching score ---
-    raw_fuzz = fuzz.ratio(query_title.lower(), video_title)
-    initial_score = raw_fuzz * fuzzy_score_multiplier
-    score += initial_score
-    score_steps.append({
-        "step": "Initial fuzzy score",
-        "description": f"Fuzzy ratio * multiplier ({fuzzy_score_multiplier})",
-        "change": f"+ {initial_score:.2f}",
-        "score": score,
-    })
-
-    # --- Same-order partial match bonus ---
-    query_words = query_title.lower().split()
-    vid_words = video_title.split()
+    def __init__(self, weights: ScoreWeights = ScoreWeights(), keyword_groups: Dict[str, List[str]] = KEYWORD_GROUPS,
+                 normalizer: TextNormalizer = default_normalizer):
+        self.weights = weights
+        self.matcher = KeywordMatcher(keyword_groups)
+        self.normalizer = normalizer
+        self._title_terms = lru_cache(maxsize=normalizer.maxsize)(self._compute_title_terms)
+        # Keyword counts of query titles, for the cover/live checks.
+        self._query_counts = lru_cache(maxsize=normalizer.maxsize)(self.matcher.count)
+
+    def _compute_title_terms(self, raw_video_title: str) -> "TitleTerms":
+        video_title = self.normalizer.title(raw_video_title).text
+        # Removing "official"/"music" leaves every other word intact, so one count covers all groups.
+        counts = self.matcher.count(video_title)
+        if counts["official"] > 0:
+            video_title = OFFICIAL_PATTERN.sub("", video_title)
+        if counts["music"] > 0:
+            video_title = MUSIC_PATTERN.sub("", video_title)
+        return TitleTerms(counts, video_title, self.normalizer.words(video_title))
+
+    def title_terms(self, raw_video_title: str) -> "TitleTerms":
+        """
+        Keyword counts of a normalized video title, and the title and its words with "official"/"music" removed.
+        Cached per title; the returned counts must not be modified.
+        """
+        return self._title_terms(raw_video_title)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            **self.normalizer.stats(),
+            **{name: {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize or 0}
+               for name, info in (("title_terms", self._title_terms.cache_info()), ("query_counts", self._query_counts.cache_info()))},
+        }
+
+    def candidate_features(self, video: ScoredVideo, describe: bool = False) -> CandidateFeatures:
+        """
+        The query-independent scoring rules applied to one candidate. compare and score_batch add the
+        query-dependent steps on top; callers that rank candidates themselves can use it the same way.
+
+        :param describe: Also record every applied rule as a ScoreStep.
+        """
+        w = self.weights
+        raw_video_title = video.title or ""
+        duration_seconds = helper.to_seconds(video.duration)
+        views = helper.fix_viewers(video.view_text)
+        counts, video_title, words = self.title_terms(raw_video_title)
+        steps: Optional[List[ScoreStep]] = [] if describe else None
+
+        base = 0.0
+        if counts["official"] > 0:
+            base += w.boost_official
+            if steps is not None:
+                steps.append(ScoreStep("official", "Official boost", "Found 'official' in title", f"+ {w.boost_official}", w.boost_official))
+
+        if counts["music"] > 0:
+            base += w.boost_music
+            if steps is not None:
+                steps.append(ScoreStep("music", "Music boost", "Found 'music' in title", f"+ {w.boost_music}", w.boost_music))
+
+        if counts["performance"]:
+            penalty = w.penalty_performance * counts["performance"]
+            base -= penalty
+            if steps is not None:
+                steps.append(ScoreStep("performance", "Performance penalty", f"Found performance-related keywords {counts['performance']} time(s)",
+                                       f"- {w.penalty_performance} * {counts['performance']} = -{penalty}", -penalty))
+
+        if counts["reaction"]:
+            penalty = w.penalty_reaction * counts["reaction"]
+            base -= penalty
+            if steps is not None:
+                steps.append(ScoreStep("reaction", "Reaction penalty", f"Found reaction/analysis keywords {counts['reaction']} time(s)",
+                                       f"- {w.penalty_reaction} * {counts['reaction']} = -{penalty}", -penalty))
+
+        if counts["slowed"]:
+            penalty = w.penalty_pointless_words * counts["slowed"]
+            base -= penalty
+            if steps is not None:
+                steps.append(ScoreStep("slowed", "Slowed/Reverb penalty", f"Found slowed/reverb keywords {counts['slowed']} time(s)",
+                                       f"- {w.penalty_pointless_words} * {counts['slowed']} = -{penalty}", -penalty))
+
+        if counts["album"]:
+            penalty = w.penalty_album * counts["album"]
+            base -= penalty
+            if steps is not None:
+                steps.append(ScoreStep("album", "Album penalty", f"Found album-related keywords {counts['album']} time(s)",
+                                       f"- {w.penalty_album} * {counts['album']} = -{penalty}", -penalty))
+
+        if counts["lyrics"] > 0:
+            base += w.boost_lyrics
+            if steps is not None:
+                steps.append(ScoreStep("lyrics", "Lyrics boost", "Found lyric/lyrics keyword in title", f"+ {w.boost_lyrics}", w.boost_lyrics))
+
+        if counts["uncensored"] > 0:
+            base += w.boost_lyrics
+            if steps is not None:
+                steps.append(ScoreStep("uncensored", "Uncensored boost", "Found 'uncensored' in title", f"+ {w.boost_lyrics}", w.boost_lyrics))
+
+        if video.channel_name is not None:
+            channel_name = video.channel_name.lower()
+            if any(word.lower() in channel_name for word in words):
+                base += w.boost_official_named_channel
+                if steps is not None:
+                    steps.append(ScoreStep("channel", "Channel boost", "Channel name found in title",
+                                           f"+ {w.boost_official_named_channel}", w.boost_official_named_channel))
+
+        if w.min_time <= duration_seconds <= w.max_time:
+            base += w.boost_duration
+            if steps is not None:
+                steps.append(ScoreStep("duration", "Duration boost", f"Duration in {w.min_time}-{w.max_time}s", f"+ {w.boost_duration}", w.boost_duration))
+
+        if "behind the scenes" in video_title:
+            base -= w.penalty_cover
+            if steps is not None:
+                steps.append(ScoreStep("behind_the_scenes", "Behind the Scenes penalty", "Found 'behind the scenes' in title",
+                                       f"- {w.penalty_cover}", -w.penalty_cover))
+
+        if duration_seconds < w.ultra_min_time or duration_seconds > w.ultra_max_time:
+            base -= w.boost_ultra_duration
+            if steps is not None:
+                steps.append(ScoreStep("ultra_duration", "Ultra duration penalty", f"Duration < {w.ultra_min_time}s or > {w.ultra_max_time}s",
+                                       f"- {w.boost_ultra_duration}", -w.boost_ultra_duration))
+
+        if views > w.view_threshold:
+            base += w.boost_viewers
+            if steps is not None:
+                steps.append(ScoreStep("viewers", "Viewers boost", f"View count ({views}) > threshold ({w.view_threshold})",
+                                       f"+ {w.boost_viewers}", w.boost_viewers))
+
+        if views > 0:
+            extra_boost = (views / 10000.0) * w.boost_per_10000
+            add_val = min(extra_boost, 10)
+            base += add_val
+            if steps is not None:
+                steps.append(ScoreStep("per_10k_views", "Per 10k views boost", f"Boost per 10k views: {extra_boost:.2f} (capped at 10)",
+                                       f"+ {add_val:.2f}", add_val))
+
+        if video.publishedTime:
+            match = AGE_PATTERN.search(video.publishedTime.lower())
+            video_age_years = int(match.group(1)) if match else 0
+            if video_age_years > 0:
+                age_boost = video_age_years * w.boost_age_factor
+                base += age_boost
+                if steps is not None:
+                    steps.append(ScoreStep("age", "Age boost", f"Video age: {video_age_years} year(s)", f"+ {age_boost:.2f}", age_boost))
+
+        if TITLE_FORMAT_REGEX.match(raw_video_title.strip()):
+            base += w.boost_title_format
+            if steps is not None:
+                steps.append(ScoreStep("title_format", "Title format boost",
+                                       "Title matches 'Song Title - Artist (tag)' pattern with 'official' in tag",
+                                       f"+ {w.boost_title_format}", w.boost_title_format))
+
+        return CandidateFeatures(
+            cleaned_title=video_title,
+            words=words,
+            base_score=base,
+            cover_penalty=float(w.penalty_cover * counts["cover"]),
+            live_penalty=float(w.penalty_live * counts["live"]),
+            duration_seconds=duration_seconds,
+            counts=counts,
+            steps=tuple(steps) if steps is not None else (),
+        )
+
+    def compare(self, query_title: str, video: ScoredVideo, debug_output_object: bool = False,
+                expected_duration: Optional[float] = None) -> Tuple[float, str, Any]:
+        """
+        Score a video against a query title.
+
+        :param debug_output_object: Also return every applied step as a list of dicts (otherwise an empty list).
+        :param expected_duration: Expected length in seconds; candidates close to it are boosted, others penalized.
+        :return: (final_score, cleaned_video_title, debug_output)
+        """
+        w = self.weights
+        features = self.candidate_features(video, describe=debug_output_object)
+        steps: Optional[List[ScoreStep]] = list(features.steps) if debug_output_object else None
+        counts = features.counts
+        score = features.base_score
+
+        query_lower, query_words = self.normalizer.query(query_title)
+        initial_score = fuzz.ratio(query_lower, features.cleaned_title) * w.fuzzy_score_multiplier
+        score += initial_score
+        if steps is not None:
+            steps.append(ScoreStep("fuzzy", "Initial fuzzy score", f"Fuzzy ratio * multiplier ({w.fuzzy_score_multiplier})",
+                                   f"+ {initial_score:.2f}", initial_score))
+
+        if same_order_bonus(query_words, features.words):
+            score += 1
+            if steps is not None:
+                steps.append(ScoreStep("same_order", "Same-order bonus", ">=50% words match in order with reasonable length ratio", "+ 1", 1))
+
+        # Cover/live penalties only apply when the query itself does not mention them.
+        if counts["cover"] or counts["live"]:
+            query_counts = self._query_counts(query_title)
+            if counts["cover"] and query_counts["cover"] == 0:
+                score -= features.cover_penalty
+                if steps is not None:
+                    steps.append(ScoreStep("cover", "Cover penalty", f"Found cover-related keywords {counts['cover']} time(s) (not in query)",
+                                           f"- {w.penalty_cover} * {counts['cover']} = -{w.penalty_cover * counts['cover']}", -features.cover_penalty))
+            if counts["live"] and query_counts["live"] == 0:
+                score -= features.live_penalty
+                if steps is not None:
+                    steps.append(ScoreStep("live", "Live penalty", f"Found live-related keywords {counts['live']} time(s) (not in query)",
+                                           f"- {w.penalty_live} * {counts['live']} = -{w.penalty_live * counts['live']}", -features.live_penalty))
+
+        if expected_duration is not None:
+            delta = features.duration_seconds - expected_duration
+            change = self.expected_duration_change(delta, expected_duration)
+            score += change
+            if steps is not None:
+                steps.append(ScoreStep("expected_duration", "Expected duration " + ("boost" if change > 0 else "penalty"),
+                                       f"Duration {features.duration_seconds}s vs expected {expected_duration:.0f}s ({delta:+.0f}s)",
+                                       f"{'+' if change > 0 else '-'} {abs(change):.2f}", change))
+
+        logger.debug("FINAL SCORE for '%s': %.2f", features.cleaned_title, score)
+        return score, features.cleaned_title, step_records(steps) if steps is not None else []
+
+    def expected_duration_change(self, delta: float, expected_duration: float) -> float:
+        w = self.weights
+        return expected_duration_change(delta, expected_duration, w.duration_tolerance, w.duration_tolerance_ratio,
+                                        w.boost_expected_duration, w.penalty_duration_per_10s, w.max_duration_penalty)
+
+    def duration_rejected(self, delta: float, expected_duration: float) -> bool:
+        """Whether a candidate is so far from the expected duration that it is never worth downloading."""
+        w = self.weights
+        return abs(delta) > max(w.max_duration_delta, expected_duration * w.max_duration_delta_ratio)
+
+    def reject_by_duration(self, candidates: Sequence[ScoredVideo], expected_duration: Optional[float]) -> Tuple[List[ScoredVideo], int]:
+        """
+        Drop the candidates that duration_rejected() rules out.
+
+        :return: The remaining candidates and the number of rejected ones.
+        """
+        if expected_duration is None:
+            return list(candidates), 0
+        kept = [video for video in candidates
+                if not self.duration_rejected(helper.to_seconds(video.duration) - expected_duration, expected_duration)]
+        return kept, len(candidates) - len(kept)
+
+    def score_batch(self, queries: str | Sequence[str], candidates: Sequence[ScoredVideo],
+                    expected_duration: Optional[float] = None) -> BatchScores:
+        """
+        Score every query against every candidate in one call.
+
+        Fuzzy ratios come from rapidfuzz's cdist; the query-independent boosts and penalties are
+        computed once per candidate and combined with the query-dependent terms as array operations.
+        Scores equal compare() up to floating point summation order.
+
+        :param queries: One query title or a sequence of them.
+        :param candidates: Candidate videos shared by all queries.
+        :param expected_duration: Expected length in seconds, applied to every query.
+        :return: The (queries, candidates) score matrix and the best candidate per query.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        w = self.weights
+        if not candidates:
+            empty = np.zeros((len(queries), 0))
+            return BatchScores(scores=empty, best_index=np.zeros(len(queries), dtype=np.intp), best_score=np.zeros(len(queries)))
+
+        features = [self.candidate_features(video) for video in candidates]
+        normalized_queries = [self.normalizer.query(query) for query in queries]
+        queries_lower = [query.text for query in normalized_queries]
+
+        # Spreading cdist over threads only pays off for large matrices, not a single search page.
+        workers = -1 if len(queries) * len(candidates) >= 10000 else 1
+        fuzzy = process.cdist(queries_lower, [f.cleaned_title for f in features], scorer=fuzz.ratio, dtype=np.float64, workers=workers)
+        scores = fuzzy * w.fuzzy_score_multiplier
+        scores += np.array([f.base_score for f in features])[None, :]
+        if expected_duration is not None:
+            scores += np.array([self.expected_duration_change(f.duration_seconds - expected_duration, expected_duration)
+                                for f in features])[None, :]
+
+        # Cover/live penalties only apply when the query itself does not mention them.
+        query_counts = [self._query_counts(query) for query in queries]
+        no_cover = np.array([counts["cover"] == 0 for counts in query_counts], dtype=np.float64)
+        no_live = np.array([counts["live"] == 0 for counts in query_counts], dtype=np.float64)
+        scores -= no_cover[:, None] * np.array([f.cover_penalty for f in features])[None, :]
+        scores -= no_live[:, None] * np.array([f.live_penalty for f in features])[None, :]
+
+        # The same-order bonus needs a word walk, but only for pairs whose word counts are within 30%.
+        query_words = [query.words for query in normalized_queries]
+        query_lengths = np.array([len(words) for words in query_words], dtype=np.float64)
+        vid_lengths = np.array([len(f.words) for f in features], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(query_lengths[:, None] > 0, vid_lengths[None, :] / query_lengths[:, None], 1.0)
+        eligible = (ratios >= 0.7) & (ratios <= 1.3) & (query_lengths[:, None] > 0)
+        for q, c in zip(*np.nonzero(eligible)):
+            if same_order_bonus(query_words[q], features[c].words):
+                scores[q, c] += 1
+
+        best_index = np.argmax(scores, axis=1)
+        return BatchScores(scores=scores, best_index=best_index, best_score=scores[np.arange(len(queries)), best_index])
+
+    def best_match(self, query: str, candidates: Sequence[ScoredVideo],
+                   expected_duration: Optional[float] = None) -> Tuple[Optional[ScoredVideo], float]:
+        """
+        The best candidate for one query, or None when no candidate scored above zero (like BatchScores.best).
+
+        Uses score_batch from BATCH_MIN_CANDIDATES candidates on and compare below that, whichever is faster;
+        both rank identically.
+        """
+        if len(candidates) >= BATCH_MIN_CANDIDATES:
+            return self.score_batch(query, candidates, expected_duration=expected_duration).best(candidates)[0]
+        if not candidates:
+            return None, 0.0
+        scores = [self.compare(query, video, expected_duration=expected_duration)[0] for video in candidates]
+        # The first of equal scores wins, like np.argmax.
+        index = max(range(len(scores)), key=scores.__getitem__)
+        return (candidates[index] if scores[index] > 0 else None), scores[index]
+
+
+def same_order_bonus(query_words: Sequence[str], vid_words: Sequence[str]) -> bool:
+    """
+    Whether at least half of the query words appear in order in the video title and the
+    word counts are within 30% of each other.
+    """
     matched_in_order = 0
     i, j = 0, 0
     while i < len(query_words) and j < len(vid_words):
@@ -127,221 +610,12 @@ def compare_video(
             j += 1
         else:
             j += 1
-    if query_words:
-        fraction_matched = matched_in_order / len(query_words)
-    else:
-        fraction_matched = 0.0
+    fraction_matched = matched_in_order / len(query_words) if query_words else 0.0
     length_ratio = (len(vid_words) / len(query_words)) if query_words else 1.0
-    if fraction_matched >= 0.5 and 0.7 <= length_ratio <= 1.3:
-        score += 1
-        score_steps.append({
-            "step": "Same-order bonus",
-            "description": ">=50% words match in order with reasonable length ratio",
-            "change": "+ 1",
-            "score": score,
-        })
-
-    # --- Penalty: Performance-related keywords (repeat penalty) ---
-    performance_keywords = ["perform", "performs", "performance", "performed", "instrumental", "live", "acoustic"]
-    performance_count = count_keywords(video_title, performance_keywords)
-    if performance_count:
-        penalty = penalty_performance * performance_count
-        score -= penalty
-        score_steps.append({
-            "step": "Performance penalty",
-            "description": f"Found performance-related keywords {performance_count} time(s)",
-            "change": f"- {penalty_performance} * {performance_count} = -{penalty}",
-            "score": score,
-        })
-
-    # --- Penalty: Cover-related keywords (apply only if not in query) ---
-    cover_synonyms = ["cover", "rendition", "remake"]
-    if count_keywords(query_title, cover_synonyms) == 0:
-        cover_count = count_keywords(video_title, cover_synonyms)
-        if cover_count:
-            penalty = penalty_cover * cover_count
-            score -= penalty
-            score_steps.append({
-                "step": "Cover penalty",
-                "description": f"Found cover-related keywords {cover_count} time(s) (not in query)",
-                "change": f"- {penalty_cover} * {cover_count} = -{penalty}",
-                "score": score,
-            })
-
-    # --- Penalty: Live-related keywords (apply only if not in query) ---
-    live_synonyms = [
-        "live", "concert", "session", "acoustic", "unplugged", "multicam",
-        "livestream", "broadcast", "live-stream", "playthrough", "adaptation", "transcription"
-    ]
-    if count_keywords(query_title, live_synonyms) == 0:
-        live_count = count_keywords(video_title, live_synonyms)
-        if live_count:
-            penalty = penalty_live * live_count
-            score -= penalty
-            score_steps.append({
-                "step": "Live penalty",
-                "description": f"Found live-related keywords {live_count} time(s) (not in query)",
-                "change": f"- {penalty_live} * {live_count} = -{penalty}",
-                "score": score,
-            })
-
-    # --- Penalty: Reaction/analysis keywords ---
-    reaction_synonyms = ["reaction", "analysis", "reacts", "react", "responds", "review", "playthrough"]
-    reaction_count = count_keywords(video_title, reaction_synonyms)
-    if reaction_count:
-        penalty = penalty_reaction * reaction_count
-        score -= penalty
-        score_steps.append({
-            "step": "Reaction penalty",
-            "description": f"Found reaction/analysis keywords {reaction_count} time(s)",
-            "change": f"- {penalty_reaction} * {reaction_count} = -{penalty}",
-            "score": score,
-        })
-
-    # --- Penalty: Slowed/reverb keywords ---
-    slowed_synonyms = ["slowed", "reverb", "reverbed", "slow"]
-    slowed_count = count_keywords(video_title, slowed_synonyms)
-    if slowed_count:
-        penalty = penalty_pointless_words * slowed_count
-        score -= penalty
-        score_steps.append({
-            "step": "Slowed/Reverb penalty",
-            "description": f"Found slowed/reverb keywords {slowed_count} time(s)",
-            "change": f"- {penalty_pointless_words} * {slowed_count} = -{penalty}",
-            "score": score,
-        })
-
-    # --- Penalty: Album-related keywords ---
-    album_synonyms = ["album", "albums", "ep"]
-    album_count = count_keywords(video_title, album_synonyms)
-    if album_count:
-        penalty = penalty_album * album_count
-        score -= penalty
-        score_steps.append({
-            "step": "Album penalty",
-            "description": f"Found album-related keywords {album_count} time(s)",
-            "change": f"- {penalty_album} * {album_count} = -{penalty}",
-            "score": score,
-        })
-
-    # --- Boost: Lyrics keywords (applied once) ---
-    if count_keywords(video_title, ["lyric", "lyrics"]) > 0:
-        score += boost_lyrics
-        score_steps.append({
-            "step": "Lyrics boost",
-            "description": "Found lyric/lyrics keyword in title",
-            "change": f"+ {boost_lyrics}",
-            "score": score,
-        })
-
-    # --- Boost: Uncensored keyword (applied once) ---
-    if count_keywords(video_title, ["uncensored"]) > 0:
-        score += boost_lyrics
-        score_steps.append({
-            "step": "Uncensored boost",
-            "description": "Found 'uncensored' in title",
-            "change": f"+ {boost_lyrics}",
-            "score": score,
-        })
-
-    # --- Boost: Channel name in title ---
-    if video.channel and any(word.lower() in video.channel.name.lower() for word in video_title.split()):
-        score += boost_official_named_channel
-        score_steps.append({
-            "step": "Channel boost",
-            "description": "Channel name found in title",
-            "change": f"+ {boost_official_named_channel}",
-            "score": score,
-        })
-
-    # --- Duration-based boost/penalty ---
-    if min_time <= duration_seconds <= max_time:
-        score += boost_duration
-        score_steps.append({
-            "step": "Duration boost",
-            "description": f"Duration in {min_time}-{max_time}s",
-            "change": f"+ {boost_duration}",
-            "score": score,
-        })
-
-    if "behind the scenes" in video_title:
-        score -= penalty_cover
-        score_steps.append({
-            "step": "Behind the Scenes penalty",
-            "description": "Found 'behind the scenes' in title",
-            "change": f"- {penalty_cover}",
-            "score": score,
-        })
-
-    if duration_seconds < ultra_min_time or duration_seconds > ultra_max_time:
-        score -= boost_ultra_duration
-        score_steps.append({
-            "step": "Ultra duration penalty",
-            "description": f"Duration < {ultra_min_time}s or > {ultra_max_time}s",
-            "change": f"- {boost_ultra_duration}",
-            "score": score,
-        })
-
-    # --- View count boosts ---
-    if views > view_threshold:
-        score += boost_viewers
-        score_steps.append({
-            "step": "Viewers boost",
-            "description": f"View count ({views}) > threshold ({view_threshold})",
-            "change": f"+ {boost_viewers}",
-            "score": score,
-        })
-
-    if views > 0:
-        extra_boost = (views / 10000.0) * boost_per_10000
-        add_val = min(extra_boost, 10)
-        score += add_val
-        score_steps.append({
-            "step": "Per 10k views boost",
-            "description": f"Boost per 10k views: {extra_boost:.2f} (capped at 10)",
-            "change": f"+ {add_val:.2f}",
-            "score": score,
-        })
-
-    # --- Age-based scoring ---
-    video_age_years = 0
-    if video.publishedTime:
-        match = re.search(r"(\d+)\s+year", video.publishedTime.lower())
-        if match:
-            video_age_years = int(match.group(1))
-    if video_age_years > 0:
-        age_boost = video_age_years * boost_age_factor
-        score += age_boost
-        score_steps.append({
-            "step": "Age boost",
-            "description": f"Video age: {video_age_years} year(s)",
-            "change": f"+ {age_boost:.2f}",
-            "score": score,
-        })
-
-    # --- Title Format Boost ---
-    # This regex checks for titles that match the pattern:
-    # "Song Title - Artist (tag)" where the tag contains 'official'
-    format_pattern = re.compile(
-        r"^\s*(?P<song>(?:\w+\s+){1,6}\w+)\s*-\s*(?P<artist>(?:\w+\s+){0,2}\w+)\s*\((?P<tag>.*?official.*?)\)\s*$",
-        flags=re.IGNORECASE
-    )
-    if format_pattern.match(original_title):
-        score += boost_title_format
-        score_steps.append({
-            "step": "Title format boost",
-            "description": "Title matches 'Song Title - Artist (tag)' pattern with 'official' in tag",
-            "change": f"+ {boost_title_format}",
-            "score": score,
-        })
-
-    # --- Final logging ---
-    logger.debug("\n\n=== Score Debug Steps for: %s ===", video_title)
-    for idx, step in enumerate(score_steps, start=1):
-        logger.debug("Step %s: %s | Change: %s | Score: %.2f",
-                     idx, step["description"], step["change"], step["score"])
-    logger.debug("FINAL SCORE for '%s': %.2f", video_title, score)
-
-    debug_output = score_steps if debug_output_object else []
-
-    return score, video_title, debug_output
\ No newline at end of file
+    return fraction_matched >= 0.5 and 0.7 <= length_ratio <= 1.3
+
+
+@lru_cache(maxsize=8)
+def _engine_for(weights: Optional[ScoreWeights]) -> ScoringEngine:
+    """The engine compare_video scores with, one per set of weights; None is the default weights."""
+    return ScoringEngine(weights or ScoreWeights())
@@ -0,0 +1,53 @@
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ScoreTracer:
+    """
+    Appends the score steps of a sampled fraction of searches to a JSONL file.
+
+    One line per traced search: the query, the selected video and every candidate with its steps.
+    Rendering happens offline (`python debug.py render <trace.jsonl>`), so a search that is not
+    sampled pays nothing beyond one random draw.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0, seed: Optional[int] = None):
+        """
+        :param path: JSONL file the traces are appended to.
+        :param sample_rate: Fraction of searches that are traced, 0.0 disables tracing.
+        :param seed: Seed for the sampling, for reproducible runs.
+        """
+        self.path = path
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> bool:
+        """Decide whether the next search is traced."""
+        if self.sample_rate <= 0.0:
+            return False
+        return self.sample_rate >= 1.0 or self._random.random() < self.sample_rate
+
+    def record(self, query: str, candidates: List[Dict[str, Any]], best_video_id: Optional[str], best_score: float) -> None:
+        """
+        :param candidates: {"video_id", "score", "video_data", "debug"} entries, as collected by find_best_match.
+        """
+        line = json.dumps({
+            "ts": time.time(),
+            "query": query,
+            "best_video_id": best_video_id,
+            "best_score": best_score,
+            "candidates": candidates,
+        }, separators=(",", ":"), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fp:
+            fp.write(line + "\n")
+
+
+def read_traces(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
@@ -1,6 +1,74 @@
-from typing import Dict
-from youtubesearchpython import VideosSearch # pyright: ignore[reportMissingImports]
+import json
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+from providers import SearchProvider, default_provider
+from search_cache import SearchCache
 
-def search_youtube_unofficial(query, max_results=10) -> str | Dict:
-    videosSearch = VideosSearch(query, limit=max_results)
-    return videosSearch.result()
\ No newline at end of file
+def search_youtube_unofficial(query, max_results=10, cache: Optional[SearchCache] = None, bypass_cache: bool = False,
+                              provider: Optional[SearchProvider] = None) -> str | Dict:
+    """
+    :param cache: Optional on-disk cache consulted before searching and filled afterwards.
+    :param bypass_cache: Always search live; the fresh result still replaces the cached one.
+    :param provider: Search backend, youtubesearchpython by default.
+    """
+    if cache is not None and not bypass_cache:
+        cached = cache.get(query, max_results)
+        if cached is not None:
+            return cached
+
+    result = (provider or default_provider()).search(query, max_results)
+    if cache is not None:
+        payload = json.loads(result) if isinstance(result, str) else result
+        # Empty results are usually a throttled or failed search, don't pin them for the whole TTL.
+        if payload.get('result'):
+            cache.put(query, max_results, payload)
+    return result
+
+
+def iter_search_pages(query, page_size=20, max_pages=3, cache: Optional[SearchCache] = None, bypass_cache: bool = False,
+                      before_request: Optional[Callable[[], Any]] = None,
+                      provider: Optional[SearchProvider] = None) -> Generator[Tuple[List[Dict[str, Any]], int], None, None]:
+    """
+    Yields the result pages of a search as (results, live requests made for the page).
+
+    Pages are only requested when the consumer asks for them, so stopping early saves the requests.
+    `before_request` is called before every live request, e.g. a SearchStage's TokenBucket.acquire.
+    The first page comes from the cache or from `provider` (with its failover and hedging); later pages
+    follow the continuation of the provider that served it (SearchProvider.search_pages), which only
+    youtubesearchpython has.
+
+    :param provider: Search backend, youtubesearchpython by default.
+    """
+    first = None
+    if cache is not None and not bypass_cache:
+        first = cache.get(query, page_size)
+    if first is not None:
+        yield first.get('result', []), 0
+        if max_pages <= 1:
+            return
+
+    # Resumed only when the consumer asks for the next page. After a cache hit the continuation still
+    # needs a live first page, so the search is only started once page 2 is actually wanted.
+    if before_request is not None:
+        before_request()
+    pages = (provider or default_provider()).search_pages(query, page_size)
+    try:
+        payload = next(pages, None) or {'result': []}
+        requests = 1
+        if first is None:
+            if cache is not None and payload.get('result'):
+                cache.put(query, page_size, payload)
+            yield payload.get('result', []), requests
+            requests = 0
+        fetched = 1
+        while fetched < max_pages:
+            if before_request is not None:
+                before_request()
+            payload = next(pages, None)
+            if payload is None:
+                return
+            requests += 1
+            fetched += 1
+            yield payload.get('result', []), requests
+            requests = 0
+    finally:
+        pages.close()
@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (query, max_results)
+);
+CREATE INDEX IF NOT EXISTS searches_last_used ON searches (last_used);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace differences do not change what YouTube returns, so they share a cache entry."""
+    return " ".join(query.casefold().split())
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SearchCache:
+    """
+    On-disk cache of raw search result payloads, keyed by normalized query and result limit.
+
+    Entries older than `ttl` seconds count as misses and are dropped. When more than `max_entries`
+    are stored, the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        """
+        :param db_path: SQLite file holding the cache, ':memory:' for a throwaway cache.
+        :param ttl: Seconds a stored result stays valid.
+        :param max_entries: Number of stored searches before least recently used ones are evicted.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.stats = CacheStats()
+        # Searches can run on worker threads; one connection guarded by a lock keeps writes serialized.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'SearchCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+
+    def get(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """
+        :return: The stored payload, or None on a miss or an expired entry.
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload, created_at FROM searches WHERE query = ? AND max_results = ?", (key, max_results)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl:
+                self.conn.execute("DELETE FROM searches WHERE query = ? AND max_results = ?", (key, max_results))
+                self.conn.commit()
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self.conn.execute("UPDATE searches SET last_used = ? WHERE query = ? AND max_results = ?", (now, key, max_results))
+            self.conn.commit()
+            self.stats.hits += 1
+        return json.loads(payload)
+
+    def put(self, query: str, max_results: int, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO searches (query, max_results, payload, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), max_results, json.dumps(payload), now, now),
+            )
+            overflow = self.conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM searches WHERE rowid IN (SELECT rowid FROM searches ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self.stats.evicted += overflow
+            self.conn.commit()
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        with self._lock:
+            removed = self.conn.execute("DELETE FROM searches WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            self.conn.commit()
+        return removed
@@ -0,0 +1,213 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
+
+from search import search_youtube_unofficial
+from search_cache import SearchCache
+
+logger = logging.getLogger("search_stage")
+
+
+def query_variants(title: str, artist: Optional[str] = None) -> List[str]:
+    """
+    Query variants that tend to surface the official upload when the plain title does not.
+
+    Without an artist, a "Title - Artist" query (like WantedTrack.query) is split on its last " - ".
+    The plain title always comes first.
+    """
+    if artist is None and " - " in title:
+        title, artist = (part.strip() for part in title.rsplit(" - ", 1))
+        variants = [f"{title} - {artist}"]
+    else:
+        variants = [title]
+    if artist:
+        variants += [f"{artist} - {title}", f"{title} {artist} official audio", f"{title} {artist} topic"]
+    else:
+        variants += [f"{title} official audio", f"{title} topic"]
+    # Keep the order, drop duplicates.
+    return list(dict.fromkeys(variants))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to `capacity` requests and `rate` requests per second on average.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until `tokens` are available.
+
+        :return: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class SearchOutcome:
+    title: str
+    results: Optional[Dict[str, Any]]
+    error: Optional[Exception] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class SearchStage:
+    """
+    Runs the searches for many titles on a thread pool and yields every outcome as soon as it completes.
+
+    All workers share one token bucket, so the request rate towards YouTube stays capped no matter how
+    many searches are in flight. Cached searches do not take a token. fan_out runs on a pool of
+    `concurrency` threads that the stage keeps until close().
+    """
+
+    def __init__(self, concurrency: int = 8, rate: float = 5.0, burst: Optional[float] = None, max_results: int = 20,
+                 cache: Optional[SearchCache] = None, bypass_cache: bool = False,
+                 search: Callable[..., Any] = search_youtube_unofficial, logger: logging.Logger = logger):
+        """
+        :param concurrency: Number of searches in flight.
+        :param rate: Live searches per second across all workers.
+        :param burst: Token bucket capacity, defaults to `rate`.
+        :param max_results: Results requested per search.
+        :param cache: Optional search cache; hits are served without waiting for the limiter.
+        :param search: Search function with the signature of search_youtube_unofficial.
+        """
+        self.concurrency = max(1, concurrency)
+        self.limiter = TokenBucket(rate, burst)
+        self.max_results = max_results
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.search = search
+        self.logger = logger
+        self._fan_out_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _search(self, title: str, bypass_cache: bool) -> SearchOutcome:
+        start = time.perf_counter()
+        try:
+            results = self.cache.get(title, self.max_results) if self.cache is not None and not bypass_cache else None
+            if results is None:
+                self.limiter.acquire()
+                results = self.search(title, self.max_results, cache=self.cache, bypass_cache=True)
+            if isinstance(results, str):
+                results = json.loads(results)
+            return SearchOutcome(title=title, results=results, seconds=time.perf_counter() - start)
+        except Exception as e:
+            self.logger.warning(f"Search for {title!r} failed: {e}")
+            return SearchOutcome(title=title, results=None, error=e, seconds=time.perf_counter() - start)
+
+    def search_one(self, title: str, bypass_cache: Optional[bool] = None) -> SearchOutcome:
+        """Search a single title on the calling thread, under the same rate limit as `run`."""
+        return self._search(title, self.bypass_cache if bypass_cache is None else bypass_cache)
+
+    def fan_out(self, queries: Iterable[str], bypass_cache: Optional[bool] = None) -> SearchOutcome:
+        """
+        Search all query variants concurrently and merge their results.
+
+        The variants of every call share the stage's fan-out threads, so download workers fanning out at
+        the same time do not each start threads of their own. Results are de-duplicated by video id,
+        keeping the first occurrence in query order, so every unique candidate is scored once and the
+        primary query's ranking wins ties.
+
+        :return: Outcome for the first query with the merged payload, shaped like search_youtube_unofficial's
+                 {"result": [...]}; failed only when every variant failed.
+        """
+        queries = list(queries)
+        bypass = self.bypass_cache if bypass_cache is None else bypass_cache
+        start = time.perf_counter()
+        executor = self._executor()
+        outcomes = [future.result() for future in [executor.submit(self._search, query, bypass) for query in queries]]
+        title = queries[0] if queries else ""
+        errors = [outcome.error for outcome in outcomes if not outcome.ok]
+        if queries and len(errors) == len(queries):
+            error = RuntimeError(f"All {len(queries)} query variant(s) failed for {title!r}")
+            error.__cause__ = errors[-1]
+            return SearchOutcome(title=title, results=None, error=error, seconds=time.perf_counter() - start)
+        merged: Dict[str, Dict[str, Any]] = {}
+        for outcome in outcomes:
+            if not outcome.ok or not outcome.results:
+                continue
+            for result in outcome.results.get('result', []):
+                merged.setdefault(result.get('id'), result)
+        return SearchOutcome(title=title, results={'result': list(merged.values())}, seconds=time.perf_counter() - start)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._fan_out_executor is None:
+                self._fan_out_executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fanout")
+            return self._fan_out_executor
+
+    def close(self) -> None:
+        """Stop the fan-out threads; a later fan_out starts new ones."""
+        with self._executor_lock:
+            executor, self._fan_out_executor = self._fan_out_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> "SearchStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def run(self, titles: Iterable[str], bypass_cache: Optional[bool] = None) -> Generator[SearchOutcome, None, None]:
+        """
+        Search every title, yielding outcomes in completion order.
+
+        Titles are pulled lazily, so at most `concurrency * 2` searches are submitted ahead of the consumer.
+        """
+        bypass = self.bypass_cache if bypass_cache is None else bypass_cache
+        titles = iter(titles)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="search") as executor:
+            running: set[Future] = set()
+
+            def submit_next() -> bool:
+                for title in titles:
+                    running.add(executor.submit(self._search, title, bypass))
+                    return True
+                return False
+
+            while len(running) < self.concurrency * 2 and submit_next():
+                pass
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    submit_next()
+                    yield future.result()
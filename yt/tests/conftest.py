@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The yt modules import each other by their bare names (`import helper`), like when the
+# scripts are run from this directory. lidarr/ uses the same module names (models, helper, benchmark),
+# so the two suites run in separate processes: `python -m pytest yt/tests` and `python -m pytest lidarr/tests`.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'models' in sys.modules and not os.path.abspath(getattr(sys.modules['models'], '__file__', '') or '').startswith(ROOT):
+    raise RuntimeError("yt/tests and lidarr/tests must be run in separate pytest processes")
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
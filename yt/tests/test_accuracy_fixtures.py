@@ -0,0 +1,18 @@
+from benchmark import DEFAULT_FIXTURES, bench_accuracy, load_fixtures
+
+
+def test_default_fixtures_are_labeled():
+    fixtures = load_fixtures([DEFAULT_FIXTURES])
+
+    assert len(fixtures) >= 10
+    for fixture in fixtures:
+        ids = {result["id"] for result in fixture["result"]}
+        assert fixture["expected"] and set(fixture["expected"]) <= ids, fixture["query"]
+        assert fixture["source"] in ("recorded", "curated")
+
+
+def test_scoring_paths_agree_on_the_fixtures():
+    result = bench_accuracy(load_fixtures([DEFAULT_FIXTURES]), repeat=1)
+    accuracy = {name: (scores["top1"], scores["top3"]) for name, scores in result["scorers"].items()}
+
+    assert len(set(accuracy.values())) == 1
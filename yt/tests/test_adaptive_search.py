@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from adaptive_search import AdaptiveMatcher
+from benchmark import raw_result
+
+
+def page(*titles, duration="3:50"):
+    return [raw_result(f"{index:011d}", title, duration, "Architects", 1000000, "3 years ago") for index, title in enumerate(titles)]
+
+
+def pages_of(*result_pages):
+    """Page source with the signature of search.iter_search_pages, one live request per page."""
+    def pages(query, page_size=20, max_pages=3, cache=None, bypass_cache=False, before_request=None):
+        for results in result_pages[:max_pages]:
+            if before_request is not None:
+                before_request()
+            yield results, 1
+    return pages
+
+
+def test_confident_lookup_is_charged_against_a_single_page_baseline():
+    matcher = AdaptiveMatcher(page_size=20, max_pages=3, pages=pages_of(page("Architects - Whiplash (Official Video)", *["unrelated clip"] * 19)))
+    video, score = matcher.find("Architects - Whiplash")
+
+    assert video is not None and video.title == "Architects - Whiplash (Official Video)"
+    stats = matcher.stats
+    assert (stats.requests, stats.baseline_requests, stats.saved_requests) == (1, 1, 0)
+    assert stats.baseline_scored == 20
+    assert stats.scored == 5 and stats.saved_scoring_calls == 15
+    assert stats.early_exits == 1
+
+
+def test_hard_lookup_costs_more_requests_than_the_baseline():
+    unrelated = page(*["Architects - Whiplash reaction"] * 20)
+    matcher = AdaptiveMatcher(page_size=20, max_pages=3, pages=pages_of(unrelated, unrelated, unrelated))
+    matcher.find("Architects - Whiplash")
+
+    stats = matcher.stats
+    assert (stats.requests, stats.extra_pages, stats.baseline_requests) == (3, 2, 1)
+    assert stats.saved_requests == -2
+    assert stats.scored == 60 and stats.saved_scoring_calls == -40
+
+
+def test_concurrent_lookups_count_every_lookup():
+    matcher = AdaptiveMatcher(page_size=20, max_pages=1, pages=pages_of(page(*["Architects - Whiplash reaction"] * 20)))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: matcher.find("Architects - Whiplash"), range(400)))
+
+    stats = matcher.stats
+    assert (stats.lookups, stats.requests, stats.baseline_requests) == (400, 400, 400)
+    assert stats.scored == stats.baseline_scored == 400 * 20
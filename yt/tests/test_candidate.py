@@ -0,0 +1,44 @@
+import copy
+
+import pytest
+
+from benchmark import DEFAULT_FIXTURES, load_fixtures, raw_result
+from models.candidate import Candidate
+from models.video import VideoData
+from score import ScoringEngine
+
+
+@pytest.fixture(scope="module")
+def fixtures():
+    return load_fixtures([DEFAULT_FIXTURES])
+
+
+def test_materialize_equals_a_full_parse(fixtures):
+    for fixture in fixtures:
+        for raw in fixture["result"]:
+            assert Candidate.from_result(copy.deepcopy(raw)).materialize() == VideoData.parse_video_data(copy.deepcopy(raw))
+
+
+def test_projection_reads_the_fields_a_full_parse_scores(fixtures):
+    for fixture in fixtures:
+        for raw in fixture["result"]:
+            candidate, video = Candidate.from_result(raw), VideoData.parse_video_data(copy.deepcopy(raw))
+            for field in ("id", "title", "duration", "publishedTime", "view_text", "channel_name"):
+                assert getattr(candidate, field) == getattr(video, field), (raw["id"], field)
+
+
+def test_candidates_score_like_parsed_videos(fixtures):
+    engine = ScoringEngine()
+    for fixture in fixtures:
+        for raw in fixture["result"]:
+            assert engine.compare(fixture["query"], Candidate.from_result(raw), expected_duration=240) == \
+                   engine.compare(fixture["query"], VideoData.parse_video_data(copy.deepcopy(raw)), expected_duration=240)
+
+
+def test_missing_view_count_and_channel():
+    raw = raw_result("00000000001", "Whiplash", "3:50", "Architects", 1000, "1 year ago")
+    raw["viewCount"], raw["channel"] = None, None
+    candidate = Candidate.from_result(raw)
+
+    assert (candidate.view_text, candidate.channel_name) == ("0", None)
+    assert candidate.__todict__() is raw
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+
+import pytest
+
+from adaptive_search import AdaptiveMatcher
+from benchmark import raw_result
+from conftest import FIXTURES
+from download_pool import DownloadJob, JobResult
+from downloader import VideoDownloader, read_jobs
+from postprocess import TrackTags
+from providers import StaticSearchProvider
+from search_cache import SearchCache
+
+
+class SearchOnly(VideoDownloader):
+    """Runs the search and match of every job but never downloads."""
+
+    def _download_job(self, job, video, score):
+        return JobResult(job=job, video=video, score=score)
+
+
+class RecordedPages:
+    """Page source with the signature of search.iter_search_pages that records when each live request is made."""
+
+    def __init__(self):
+        self.times = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query, page_size=20, max_pages=3, cache=None, bypass_cache=False, before_request=None):
+        if before_request is not None:
+            before_request()
+        with self._lock:
+            self.times.append(time.monotonic())
+        yield [raw_result("00000000001", f"{query} (Official Audio)", "3:50", "Architects", 1000000, "3 years ago")], 1
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    pages = RecordedPages()
+    cache = SearchCache(":memory:")
+    downloader = SearchOnly(tmp_dir=str(tmp_path / "progress"), try_identify=False, search_cache=cache,
+                            adaptive=AdaptiveMatcher(cache=cache, pages=pages), provider=StaticSearchProvider({}))
+    yield downloader, pages
+    downloader.close()
+    cache.close()
+
+
+def test_adaptive_lookups_in_a_pool_take_tokens_from_the_stage(downloader):
+    downloader, pages = downloader
+    rate, titles = 40.0, [f"Architects - Song {index}" for index in range(60)]
+
+    start = time.monotonic()
+    results = list(downloader.process_many(titles, concurrency=8, rate=rate))
+    elapsed = time.monotonic() - start
+
+    assert len(results) == len(pages.times) == len(titles)
+    # The bucket starts with `rate` tokens; every request after that waits for a refill.
+    assert elapsed >= (len(titles) - rate) / rate * 0.9
+    assert downloader.adaptive.stats.lookups == len(titles)
+
+
+def test_read_jobs_parses_the_webhook_handoff(tmp_path):
+    with open(os.path.join(FIXTURES, "webhook_jobs.jsonl")) as fp:
+        jobs = list(read_jobs(fp, dest_dir=str(tmp_path)))
+
+    assert [(job.title, job.expected_duration, job.dest_dir) for job in jobs] == [
+        ("Bodysnatchers - Radiohead", 242, str(tmp_path)), ("Nude - Radiohead", 255, str(tmp_path))]
+    assert jobs[1].tags == TrackTags(title="Nude", artist="Radiohead", album="In Rainbows")
+
+
+def test_read_jobs_skips_blank_and_malformed_lines():
+    jobs = list(read_jobs(['{"title": "Whiplash - Architects"}\n', "\n", "not json\n"]))
+
+    assert [(job.title, job.expected_duration, job.tags) for job in jobs] == [("Whiplash - Architects", None, None)]
+
+
+def test_webhook_jobs_run_on_the_pool(downloader, tmp_path):
+    downloader, _ = downloader
+    with open(os.path.join(FIXTURES, "webhook_jobs.jsonl")) as fp:
+        results = list(downloader.run_jobs(read_jobs(fp, dest_dir=str(tmp_path)), workers=2))
+
+    assert sorted((result.job.title, result.video.title) for result in results) == [
+        ("Bodysnatchers - Radiohead", "Bodysnatchers - Radiohead (Official Audio)"),
+        ("Nude - Radiohead", "Nude - Radiohead (Official Audio)")]
+
+
+def test_failed_fan_out_is_reported_as_a_search_failure(tmp_path):
+    with SearchCache(":memory:") as cache:
+        downloader = SearchOnly(tmp_dir=str(tmp_path / "progress"), try_identify=False, search_cache=cache, fan_out=True,
+                                provider=StaticSearchProvider({}, failure_rate=1.0))
+        try:
+            results = list(downloader.run_jobs([DownloadJob(title="Whiplash - Architects")], workers=1))
+        finally:
+            downloader.close()
+
+    assert [(result.stage, result.ok) for result in results] == [("search", False)]
+    assert "query variant(s) failed" in str(results[0].error)
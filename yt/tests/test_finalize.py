@@ -0,0 +1,62 @@
+import os
+import stat
+import tempfile
+
+import pytest
+
+from helper import copy_into_place, finalize_file
+
+DATA = os.urandom(256 * 1024)
+# tmpfs on most Linux systems, so usually a different device than pytest's tmp_path.
+OTHER_DEVICE = "/dev/shm"
+
+
+def write_source(path, mode=0o644) -> str:
+    with open(path, "wb") as fp:
+        fp.write(DATA)
+    os.chmod(path, mode)
+    return str(path)
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+@pytest.fixture
+def other_device_dir(tmp_path):
+    if not os.path.isdir(OTHER_DEVICE) or not os.access(OTHER_DEVICE, os.W_OK):
+        pytest.skip(f"{OTHER_DEVICE} is not available")
+    if os.stat(OTHER_DEVICE).st_dev == os.stat(tmp_path).st_dev:
+        pytest.skip(f"{OTHER_DEVICE} is on the same device as {tmp_path}")
+    with tempfile.TemporaryDirectory(dir=OTHER_DEVICE) as path:
+        yield path
+
+
+def test_same_device_is_a_rename(tmp_path):
+    src = write_source(tmp_path / "audio.mp3")
+    dest = str(tmp_path / "final.mp3")
+    assert finalize_file(src, dest) == "rename"
+    assert read(dest) == DATA
+    assert not os.path.exists(src)
+
+
+def test_cross_device_copies_and_keeps_the_mode(tmp_path, other_device_dir):
+    src = write_source(tmp_path / "audio.mp3", mode=0o644)
+    dest = os.path.join(other_device_dir, "final.mp3")
+    assert finalize_file(src, dest, verify=True) == "copy"
+    assert read(dest) == DATA
+    assert stat.S_IMODE(os.stat(dest).st_mode) == 0o644
+    assert not os.path.exists(src)
+    assert os.listdir(other_device_dir) == ["final.mp3"]
+
+
+def test_copy_into_place_replaces_and_keeps_the_source(tmp_path):
+    src = write_source(tmp_path / "audio.mp3", mode=0o640)
+    dest = tmp_path / "final.mp3"
+    dest.write_bytes(b"old")
+    copy_into_place(src, str(dest))
+    assert read(dest) == DATA
+    assert stat.S_IMODE(os.stat(dest).st_mode) == 0o640
+    assert os.path.exists(src)
+    assert sorted(os.listdir(tmp_path)) == ["audio.mp3", "final.mp3"]
@@ -0,0 +1,46 @@
+from benchmark import synthetic_samples
+from normalize import NormalizedText, TextNormalizer
+from score import ScoringEngine
+
+
+def test_title_keeps_ascii_letters_digits_and_spaces_lowercased():
+    normalizer = TextNormalizer()
+
+    assert normalizer.title("Sigur Rós – Hoppípolla (Official Video) [4K]") == NormalizedText(
+        "sigur rs  hopppolla official video 4k", ("sigur", "rs", "hopppolla", "official", "video", "4k"))
+
+
+def test_query_is_only_lowercased():
+    normalizer = TextNormalizer()
+
+    assert normalizer.query("Whiplash - Architects (Live)") == NormalizedText(
+        "whiplash - architects (live)", ("whiplash", "-", "architects", "(live)"))
+
+
+def test_results_are_cached_and_shared():
+    normalizer = TextNormalizer()
+    first = normalizer.title("Architects - Whiplash (Official Audio)")
+
+    assert normalizer.title("Architects - Whiplash (Official Audio)") is first
+    assert normalizer.stats()["title"] == {"hits": 1, "misses": 1, "size": 1, "maxsize": 8192}
+
+
+def test_caches_are_bounded_and_can_be_cleared():
+    normalizer = TextNormalizer(maxsize=2)
+    for title in ("a", "b", "c", "a"):
+        normalizer.query(title)
+
+    # "a" was evicted by "c", so the last lookup is a miss again.
+    assert normalizer.stats()["query"] == {"hits": 0, "misses": 4, "size": 2, "maxsize": 2}
+    normalizer.clear()
+    assert all(cache["size"] == 0 for cache in normalizer.stats().values())
+
+
+def test_an_engine_scores_the_same_with_its_own_normalizer():
+    samples = synthetic_samples(100, seed=5)
+    normalizer = TextNormalizer(maxsize=256)
+    shared, own = ScoringEngine(), ScoringEngine(normalizer=normalizer)
+
+    assert [own.compare(query, video)[0] for query, video in samples] == [shared.compare(query, video)[0] for query, video in samples]
+    # Every distinct query went through the engine's own normalizer, once.
+    assert normalizer.stats()["query"]["misses"] == len({query for query, _ in samples})
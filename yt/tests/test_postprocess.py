@@ -0,0 +1,145 @@
+import base64
+import struct
+
+import pytest
+from mutagen import File as MutagenFile
+from mutagen.flac import Picture
+from mutagen.id3 import ID3
+from mutagen.ogg import OggPage
+
+from postprocess import MP4_FREEFORM, TrackTags, read_tags, resolve_audio_path, write_tags
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, no padding: 417 bytes per frame. ffmpeg is not needed for
+# tagging, so the tests write silent frames and minimal containers by hand.
+MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(417 - 4)
+
+
+def write_mp3(path, frames=10):
+    with open(path, "wb") as fp:
+        fp.write(MP3_FRAME * frames)
+    return str(path)
+
+
+def write_opus(path):
+    """Ogg Opus with the two header packets and one 20 ms packet (RFC 7845)."""
+    vendor = b"tests"
+    packets = [
+        b"OpusHead" + struct.pack("<BBHIhB", 1, 2, 312, 48000, 0, 0),
+        b"OpusTags" + struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", 0),
+        b"\xfc\xff\xfe",
+    ]
+    pages = []
+    for sequence, packet in enumerate(packets):
+        page = OggPage()
+        page.serial, page.sequence, page.packets = 1, sequence, [packet]
+        page.position = 960 if sequence == 2 else 0
+        page.first, page.last = sequence == 0, sequence == len(packets) - 1
+        pages.append(page.write())
+    with open(path, "wb") as fp:
+        fp.write(b"".join(pages))
+    return str(path)
+
+
+def atom(name, payload=b""):
+    return struct.pack(">I", 8 + len(payload)) + name + payload
+
+
+def write_m4a(path):
+    """ftyp, a moov with one sound track and an mdat; enough for mutagen to read and write the ilst."""
+    media = atom(b"mdhd", bytes(4) + struct.pack(">IIII", 0, 0, 44100, 44100) + bytes(4)) + \
+        atom(b"hdlr", bytes(8) + b"soun" + bytes(13))
+    moov = atom(b"mvhd", bytes(4) + struct.pack(">IIII", 0, 0, 1000, 1000) + bytes(80)) + atom(b"trak", atom(b"mdia", media))
+    with open(path, "wb") as fp:
+        fp.write(atom(b"ftyp", b"M4A " + bytes(4) + b"M4A mp42isom") + atom(b"moov", moov) + atom(b"mdat", bytes(16)))
+    return str(path)
+
+
+WRITERS = {".mp3": write_mp3, ".opus": write_opus, ".m4a": write_m4a}
+
+
+TAGS = TrackTags(title="Nude", artist="Radiohead", album="In Rainbows", release_date="2007", genre="Alternative",
+                 comment="https://www.youtube.com/watch?v=00000000001", cover=b"\xff\xd8\xff\xe0cover", extra={"ISRC": "GBAYE0700002"})
+
+
+def test_mp3_tags_round_trip_without_touching_the_audio(tmp_path):
+    path = write_mp3(tmp_path / "nude.mp3")
+    write_tags(path, TAGS)
+
+    assert read_tags(path) == TrackTags(title="Nude", artist="Radiohead", album="In Rainbows")
+    id3 = ID3(path)
+    assert id3.version == (2, 3, 0)
+    assert (str(id3["TDRC"]), str(id3["TCON"]), str(id3["TXXX:ISRC"])) == ("2007", "Alternative", "GBAYE0700002")
+    assert id3.getall("COMM")[0].text == [TAGS.comment] and id3.getall("APIC")[0].data == TAGS.cover
+    with open(path, "rb") as fp:
+        assert fp.read().endswith(MP3_FRAME * 10)
+
+
+def test_writing_again_replaces_frames_instead_of_adding_them(tmp_path):
+    path = write_mp3(tmp_path / "nude.mp3")
+    write_tags(path, TAGS)
+    write_tags(path, TrackTags(title="Nude (Remastered)", extra={"ISRC": "GBAYE0700003"}))
+
+    id3 = ID3(path)
+    assert [len(id3.getall(frame)) for frame in ("TIT2", "TPE1", "APIC", "TXXX:ISRC")] == [1, 1, 1, 1]
+    assert read_tags(path) == TrackTags(title="Nude (Remastered)", artist="Radiohead", album="In Rainbows")
+    assert str(id3["TXXX:ISRC"]) == "GBAYE0700003"
+
+
+def test_read_tags_of_an_untagged_file(tmp_path):
+    assert read_tags(write_mp3(tmp_path / "untagged.mp3")) == TrackTags()
+
+
+def test_merge_takes_every_field_set_on_the_other_tags():
+    download = TrackTags(title="Nude - Radiohead", comment="https://youtu.be/x", cover=b"thumbnail", extra={"ISRC": "a", "source": "yt"})
+    identified = TrackTags(title="Nude", artist="Radiohead", cover=b"png cover", cover_mime="image/png", extra={"ISRC": "b"})
+
+    merged = download.merge(identified)
+    assert (merged.title, merged.artist, merged.comment) == ("Nude", "Radiohead", "https://youtu.be/x")
+    assert (merged.cover, merged.cover_mime) == (b"png cover", "image/png")
+    assert merged.extra == {"ISRC": "b", "source": "yt"}
+    # Neither side is modified.
+    assert download.title == "Nude - Radiohead" and download.extra == {"ISRC": "a", "source": "yt"}
+
+
+def test_merge_keeps_values_the_other_tags_leave_unset():
+    download = TrackTags(title="Nude", cover=b"thumbnail", cover_mime="image/webp")
+
+    assert download.merge(TrackTags(title="", cover_mime="image/png")) == download
+    assert download.merge(None) is download
+
+
+@pytest.mark.parametrize("ext", list(WRITERS))
+def test_tags_round_trip_in_every_container(tmp_path, ext):
+    path = WRITERS[ext](tmp_path / f"nude{ext}")
+    write_tags(path, TAGS)
+    write_tags(path, TrackTags(title="Nude (Remastered)"))
+
+    assert read_tags(path) == TrackTags(title="Nude (Remastered)", artist="Radiohead", album="In Rainbows")
+
+
+def test_opus_tags_are_vorbis_comments(tmp_path):
+    path = write_opus(tmp_path / "nude.opus")
+    write_tags(path, TAGS)
+
+    tags = MutagenFile(path).tags
+    assert (tags["date"], tags["genre"], tags["comment"], tags["isrc"]) == (["2007"], ["Alternative"], [TAGS.comment], ["GBAYE0700002"])
+    picture = Picture(base64.b64decode(tags["metadata_block_picture"][0]))
+    assert (picture.type, picture.mime, picture.data) == (3, "image/jpeg", TAGS.cover)
+
+
+def test_m4a_tags_are_itunes_atoms(tmp_path):
+    path = write_m4a(tmp_path / "nude.m4a")
+    write_tags(path, TAGS)
+
+    tags = MutagenFile(path).tags
+    assert (tags["\xa9day"], tags["\xa9gen"], tags["\xa9cmt"]) == (["2007"], ["Alternative"], [TAGS.comment])
+    assert bytes(tags[MP4_FREEFORM + "ISRC"][0]) == b"GBAYE0700002"
+    assert bytes(tags["covr"][0]) == TAGS.cover
+
+
+def test_resolve_audio_path_finds_the_downloaded_container(tmp_path):
+    base = str(tmp_path / "nude")
+    assert resolve_audio_path(base) == base + ".mp3"
+    write_opus(base + ".opus")
+    assert resolve_audio_path(base) == base + ".opus"
+    assert resolve_audio_path(base + ".m4a") == base + ".m4a"
@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmark import raw_result
+from models.video import VideoData
+from providers import FailoverSearch, SearchProvider, StaticSearchProvider, ytdlp_entry_to_result
+from score import ScoringEngine
+
+PAYLOAD = {'result': [raw_result("dQw4w9WgXcQ", "Rick Astley - Never Gonna Give You Up (Official Music Video)", "3:33",
+                                 "Rick Astley", 1500000000, "15 years ago")]}
+
+
+def static(name, **kwargs):
+    return StaticSearchProvider({"never gonna give you up": PAYLOAD}, name=name, **kwargs)
+
+
+class BlockingProvider(SearchProvider):
+    """Answers only once released, to stand in for a provider that hangs."""
+
+    def __init__(self, name):
+        self.name = name
+        self.release = threading.Event()
+
+    def search(self, query, max_results):
+        self.release.wait(timeout=5)
+        return {'result': []}
+
+
+def test_search_provider_is_abstract():
+    with pytest.raises(TypeError):
+        SearchProvider()
+
+
+def test_failover_uses_the_next_provider_and_tracks_errors():
+    with FailoverSearch([static("primary", failure_rate=1.0), static("secondary")]) as search:
+        assert search.search("never gonna give you up", 5) == PAYLOAD
+        report = search.report()
+
+    assert report["primary"]["errors"] == 1 and "simulated failure" in report["primary"]["last_error"]
+    assert report["secondary"]["calls"] == 1 and report["secondary"]["errors"] == 0
+
+
+def test_unhealthy_provider_is_ranked_last_during_cooldown():
+    with FailoverSearch([static("primary", failure_rate=1.0), static("secondary")], max_error_rate=0.1, cooldown=60) as search:
+        search.search("never gonna give you up", 5)
+        assert [provider.name for provider in search.ranked()] == ["secondary", "primary"]
+        search.search("never gonna give you up", 5)
+
+    assert search.report()["primary"]["calls"] == 1
+
+
+def test_healthy_providers_are_ranked_by_latency():
+    with FailoverSearch([static("slow", latency=0.05), static("fast")]) as search:
+        assert [provider.name for provider in search.ranked()] == ["slow", "fast"]
+        search.search("never gonna give you up", 5)
+        # "fast" has not answered yet, so it is tried next and measured.
+        assert [provider.name for provider in search.ranked()] == ["fast", "slow"]
+        search.search("never gonna give you up", 5)
+        assert [provider.name for provider in search.ranked()] == ["fast", "slow"]
+        report = search.report()
+
+    assert report["slow"]["calls"] == report["fast"]["calls"] == 1
+    assert report["fast"]["latency"] < report["slow"]["latency"]
+
+
+def test_all_providers_failing_raises():
+    with FailoverSearch([static("primary", failure_rate=1.0), static("secondary", failure_rate=1.0)]) as search:
+        with pytest.raises(RuntimeError, match="All search providers failed"):
+            search.search("never gonna give you up", 5)
+
+
+def test_hedge_answers_from_the_second_provider_when_the_first_is_slow():
+    slow = BlockingProvider("slow")
+    search = FailoverSearch([slow, static("fast")], hedge_after=0.05)
+    try:
+        start = time.perf_counter()
+        assert search.search("never gonna give you up", 5) == PAYLOAD
+        assert time.perf_counter() - start < 2
+    finally:
+        slow.release.set()
+        search.close()
+
+
+def test_close_stops_hedging():
+    search = FailoverSearch([static("primary"), static("secondary")], hedge_after=0.05)
+    executor = search._executor
+    search.close()
+
+    assert search._executor is None and executor._shutdown
+    assert search.search("never gonna give you up", 5) == PAYLOAD
+
+
+def test_ytdlp_entries_keep_unknown_fields_unset():
+    result = ytdlp_entry_to_result({'id': 'abcdefghijk', 'title': 'Some livestream', 'url': 'https://www.youtube.com/watch?v=abcdefghijk'})
+
+    assert result['duration'] is None and result['publishedTime'] is None
+    assert result['viewCount'] == {'text': None, 'short': None}
+    assert result['channel']['name'] is None
+    video = VideoData.parse_video_data(result)
+    ScoringEngine().compare("some livestream", video)
+
+
+def test_ytdlp_entries_map_every_known_field():
+    now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    result = ytdlp_entry_to_result({
+        'id': 'dQw4w9WgXcQ', 'title': 'Never Gonna Give You Up', 'duration': 3723.0, 'view_count': 1534000,
+        'channel': 'Rick Astley', 'channel_id': 'UCuAXFkgsw1L7xaCfnd5JJOw', 'upload_date': '20091025',
+        'thumbnails': [{'url': 'https://i.ytimg.com/vi/dQw4w9WgXcQ/hq720.jpg', 'width': 720, 'height': 404}],
+    }, now=now)
+
+    assert result['duration'] == "1:02:03"
+    assert result['accessibility']['duration'] == "1 hour, 2 minutes, 3 seconds"
+    assert result['viewCount'] == {'text': "1,534,000 views", 'short': "1.5M views"}
+    assert result['publishedTime'] == "14 years ago"
+    assert result['channel']['link'] == "https://www.youtube.com/channel/UCuAXFkgsw1L7xaCfnd5JJOw"
+    assert VideoData.parse_video_data(result).duration == "1:02:03"
@@ -0,0 +1,109 @@
+import logging
+
+import pytest
+
+from benchmark import synthetic_samples, verify_batch_parity, verify_engine_parity
+from legacy_score import legacy_compare_video
+from models.channel import Channel
+from models.video import VideoData
+from models.viewcount import ViewCount
+from score import BATCH_MIN_CANDIDATES, STEP_ORDER, ScoreWeights, ScoringEngine, compare_video
+
+
+def video(title, duration="3:45", views=250000, channel="Architects", published="6 years ago"):
+    return VideoData(
+        id="dQw4w9WgXcQ", title=title, duration=duration, publishedTime=published,
+        viewCount=ViewCount(short="", text=f"{views:,} views"),
+        channel=Channel(id="channel", link="", name=channel, thumbnails=[]),
+    )
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return synthetic_samples(500, seed=3)
+
+
+@pytest.fixture(autouse=True)
+def quiet_legacy_logger():
+    # The reference implementation logs every step at DEBUG; pytest would capture all of it.
+    legacy_logger = logging.getLogger("legacy_score")
+    level = legacy_logger.level
+    legacy_logger.setLevel(logging.WARNING)
+    yield
+    legacy_logger.setLevel(level)
+
+
+def test_engine_matches_the_legacy_implementation(samples):
+    assert verify_engine_parity(samples, ScoringEngine()) == []
+
+
+def test_legacy_weights_match_score_weights(samples):
+    engine = ScoringEngine(ScoreWeights(penalty_live=5, boost_official=20))
+    for query, candidate in samples[:100]:
+        assert legacy_compare_video(query, candidate, penalty_live=5, boost_official=20)[0] == \
+            pytest.approx(engine.compare(query, candidate)[0], abs=1e-9)
+
+
+def test_compare_video_wraps_the_default_engine(samples):
+    engine = ScoringEngine()
+    for query, candidate in samples[:100]:
+        assert compare_video(query, candidate, debug_output_object=True) == engine.compare(query, candidate, debug_output_object=True)
+
+
+def test_compare_video_weights_override_score_weights(samples):
+    engine = ScoringEngine(ScoreWeights(penalty_live=5, boost_expected_duration=50))
+    for query, candidate in samples[:100]:
+        assert compare_video(query, candidate, expected_duration=200, penalty_live=5, boost_expected_duration=50) == \
+            engine.compare(query, candidate, expected_duration=200)
+    with pytest.raises(TypeError):
+        compare_video("whiplash", samples[0][1], not_a_weight=1)
+
+
+def test_steps_sum_to_the_score_in_report_order():
+    candidate = video("Architects - Whiplash (Official Music Video) LIVE")
+    score, title, steps = ScoringEngine().compare("Whiplash Architects", candidate, debug_output_object=True, expected_duration=230)
+
+    assert title.split() == ["architects", "whiplash", "video", "live"]
+    names = [step["step"] for step in steps]
+    assert names[:3] == ["Official boost", "Music boost", "Initial fuzzy score"]
+    assert "Live penalty" in names and "Expected duration boost" in names
+    assert steps[-1]["score"] == pytest.approx(score)
+    assert len(STEP_ORDER) == len(set(STEP_ORDER.values()))
+
+
+def test_query_mentions_lift_cover_and_live_penalties():
+    engine = ScoringEngine()
+    candidate = video("Whiplash live acoustic cover")
+    penalized = engine.compare("Whiplash", candidate)[0]
+    assert engine.compare("Whiplash live cover", candidate)[0] > penalized + ScoreWeights().penalty_live
+
+
+@pytest.mark.parametrize("expected_duration", [None, 240])
+def test_score_batch_matches_compare(samples, expected_duration):
+    engine = ScoringEngine()
+    assert verify_batch_parity(samples, engine, expected_duration=expected_duration) == []
+
+
+@pytest.mark.parametrize("count", [20, BATCH_MIN_CANDIDATES])
+def test_best_match_picks_the_same_candidate_on_both_paths(samples, count):
+    engine = ScoringEngine()
+    for start in range(0, len(samples) - count, count):
+        query, candidates = samples[start][0], [video for _, video in samples[start:start + count]]
+        scores = [engine.compare(query, candidate)[0] for candidate in candidates]
+        best_video, best_score = engine.best_match(query, candidates)
+
+        assert best_score == pytest.approx(max(scores))
+        assert best_video is (candidates[scores.index(max(scores))] if max(scores) > 0 else None)
+
+
+def test_candidate_features_are_the_query_independent_steps():
+    engine = ScoringEngine()
+    candidate = video("Whiplash (Official Lyric Video)")
+    features = engine.candidate_features(candidate, describe=True)
+
+    assert features.base_score == pytest.approx(sum(step.value for step in features.steps))
+    assert {step.key for step in features.steps} >= {"official", "lyrics", "viewers", "age"}
+    assert engine.candidate_features(candidate).steps == ()
+    score, title, _ = engine.compare("Whiplash", candidate)
+    assert title == features.cleaned_title
+    assert score > features.base_score
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmark import raw_result
+from downloader import VideoDownloader
+from providers import StaticSearchProvider
+from search_cache import SearchCache
+from score_trace import ScoreTracer, read_traces
+
+QUERY = "Whiplash - Architects"
+RESULTS = {'result': [
+    raw_result("00000000001", "Architects - Whiplash (Official Audio)", "3:50", "Architects - Topic", 1000000, "3 years ago"),
+    raw_result("00000000002", "Whiplash (Live at Wembley)", "6:12", "Architects Fans", 5000, "1 year ago"),
+]}
+
+
+@pytest.mark.parametrize("rate, traced", [(0.0, 0), (-1.0, 0), (1.0, 100), (5.0, 100)])
+def test_sample_rate_bounds(tmp_path, rate, traced):
+    tracer = ScoreTracer(str(tmp_path / "trace.jsonl"), sample_rate=rate)
+    assert sum(tracer.sample() for _ in range(100)) == traced
+
+
+def test_partial_sampling_is_reproducible_with_a_seed(tmp_path):
+    first, second = (ScoreTracer(str(tmp_path / "trace.jsonl"), sample_rate=0.3, seed=7) for _ in range(2))
+
+    sampled = [first.sample() for _ in range(1000)]
+    assert sampled == [second.sample() for _ in range(1000)]
+    assert 200 < sum(sampled) < 400
+
+
+@pytest.mark.parametrize("rate, lines", [(0.0, 0), (1.0, 3)])
+def test_select_best_match_traces_sampled_searches(tmp_path, rate, lines):
+    path = tmp_path / "trace.jsonl"
+    with SearchCache(":memory:") as cache:
+        downloader = VideoDownloader(tmp_dir=str(tmp_path / "progress"), try_identify=False, search_cache=cache,
+                                     provider=StaticSearchProvider({}), tracer=ScoreTracer(str(path), sample_rate=rate))
+        try:
+            matches = [downloader.select_best_match(QUERY, RESULTS) for _ in range(3)]
+        finally:
+            downloader.close()
+
+    assert {match.video.id for match in matches} == {"00000000001"}
+    traces = list(read_traces(str(path))) if path.exists() else []
+    assert len(traces) == lines
+    for trace in traces:
+        assert (trace["query"], trace["best_video_id"]) == (QUERY, "00000000001")
+        assert trace["best_score"] == pytest.approx(matches[0].score)
+        assert [candidate["video_id"] for candidate in trace["candidates"]] == ["00000000001", "00000000002"]
+        assert all(candidate["debug"] for candidate in trace["candidates"])
@@ -0,0 +1,84 @@
+import pytest
+
+from benchmark import raw_result
+from providers import FailoverSearch, SearchProvider, StaticSearchProvider
+from search import iter_search_pages
+from search_cache import SearchCache
+
+QUERY = "whiplash - architects"
+
+
+def results(prefix, count=3):
+    return [raw_result(f"{prefix}{index:010d}", f"{prefix} result {index}", "3:50", "Architects", 1000, "1 year ago")
+            for index in range(count)]
+
+
+class PagedProvider(SearchProvider):
+    """Serves fixed pages with a continuation, like youtubesearchpython, and counts the requests."""
+
+    def __init__(self, name, pages, fail=False):
+        self.name = name
+        self.pages = pages
+        self.fail = fail
+        self.requests = 0
+
+    def search(self, query, max_results):
+        return next(self.search_pages(query, max_results))
+
+    def search_pages(self, query, page_size):
+        for page in self.pages:
+            self.requests += 1
+            if self.fail:
+                raise RuntimeError(f"{self.name} unavailable")
+            yield {'result': page}
+
+
+@pytest.fixture
+def cache():
+    with SearchCache(":memory:") as cache:
+        yield cache
+
+
+def test_pages_come_from_the_configured_provider(cache):
+    provider = PagedProvider("paged", [results("a"), results("b"), results("c")])
+    tokens = []
+    pages = list(iter_search_pages(QUERY, page_size=3, max_pages=3, cache=cache, provider=provider,
+                                   before_request=lambda: tokens.append(1)))
+
+    assert [(page[0]['title'], requests) for page, requests in pages] == [("a result 0", 1), ("b result 0", 1), ("c result 0", 1)]
+    assert provider.requests == len(tokens) == 3
+    assert cache.get(QUERY, 3) == {'result': results("a")}
+
+
+def test_failover_serves_the_first_page_and_its_continuation():
+    broken = PagedProvider("broken", [results("x")], fail=True)
+    backup = PagedProvider("backup", [results("a"), results("b")])
+    with FailoverSearch([broken, backup]) as search:
+        pages = [page for page, _ in iter_search_pages(QUERY, page_size=3, max_pages=3, provider=search)]
+
+    assert [page[0]['title'] for page in pages] == ["a result 0", "b result 0"]
+    assert broken.requests == 1 and search.report()["broken"]["errors"] == 1
+
+
+def test_a_provider_without_continuation_has_one_page():
+    static = StaticSearchProvider({QUERY: {'result': results("s")}})
+    pages = list(iter_search_pages(QUERY, page_size=3, max_pages=3, provider=static))
+
+    assert [(page[0]['title'], requests) for page, requests in pages] == [("s result 0", 1)]
+
+
+def test_cache_hit_starts_no_live_search_until_page_two_is_wanted(cache):
+    cache.put(QUERY, 3, {'result': results("cached")})
+    provider = PagedProvider("paged", [results("a"), results("b")])
+
+    pages = iter_search_pages(QUERY, page_size=3, max_pages=3, cache=cache, provider=provider)
+    first, requests = next(pages)
+    assert (first[0]['title'], requests, provider.requests) == ("cached result 0", 0, 0)
+    pages.close()
+    assert provider.requests == 0
+
+    pages = iter_search_pages(QUERY, page_size=3, max_pages=3, cache=cache, provider=provider)
+    next(pages)
+    second, requests = next(pages)
+    # The continuation needs the first page again, so page two costs two requests.
+    assert (second[0]['title'], requests, provider.requests) == ("b result 0", 2, 2)
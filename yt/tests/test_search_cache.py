@@ -0,0 +1,82 @@
+import pytest
+
+import search_cache
+from search_cache import SearchCache
+
+
+class Clock:
+    """Stands in for time.time so entries can be aged without sleeping."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache.time, "time", clock)
+    return clock
+
+
+def payload(name):
+    return {'result': [{'id': name}]}
+
+
+def test_queries_differing_in_case_and_spacing_share_an_entry(clock):
+    with SearchCache(":memory:") as cache:
+        cache.put("Whiplash  - Architects", 20, payload("a"))
+
+        assert cache.get("whiplash - ARCHITECTS ", 20) == payload("a")
+        assert cache.get("whiplash - architects", 10) is None
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    with SearchCache(":memory:", ttl=60) as cache:
+        cache.put("whiplash", 20, payload("a"))
+        clock.now += 60
+        assert cache.get("whiplash", 20) == payload("a")
+
+        clock.now += 1
+        assert cache.get("whiplash", 20) is None
+        assert (cache.stats.expired, len(cache)) == (1, 0)
+
+
+def test_a_hit_does_not_extend_the_ttl(clock):
+    with SearchCache(":memory:", ttl=60) as cache:
+        cache.put("whiplash", 20, payload("a"))
+        clock.now += 50
+        cache.get("whiplash", 20)
+        clock.now += 20
+
+        assert cache.get("whiplash", 20) is None
+
+
+def test_purge_expired_drops_only_old_entries(clock):
+    with SearchCache(":memory:", ttl=60) as cache:
+        cache.put("old", 20, payload("old"))
+        clock.now += 30
+        cache.put("new", 20, payload("new"))
+        clock.now += 40
+
+        assert cache.purge_expired() == 1
+        assert cache.get("new", 20) == payload("new")
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    with SearchCache(":memory:", max_entries=2) as cache:
+        cache.put("a", 20, payload("a"))
+        clock.now += 1
+        cache.put("b", 20, payload("b"))
+        clock.now += 1
+        # Using "a" makes "b" the least recently used entry.
+        cache.get("a", 20)
+        clock.now += 1
+        cache.put("c", 20, payload("c"))
+
+        assert (len(cache), cache.stats.evicted) == (2, 1)
+        assert cache.get("b", 20) is None
+        assert cache.get("a", 20) == payload("a") and cache.get("c", 20) == payload("c")
@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmark import raw_result
+from search_cache import SearchCache
+from search_stage import SearchStage, TokenBucket, query_variants
+
+
+def result(video_id):
+    return raw_result(video_id, f"Video {video_id}", "3:50", "Architects", 1000, "1 year ago")
+
+
+def search_from(payloads, failing=()):
+    """A search function with the signature of search_youtube_unofficial that answers from `payloads`."""
+    def search(query, max_results=10, cache=None, bypass_cache=False):
+        if query in failing:
+            raise RuntimeError(f"search for {query} failed")
+        return {'result': [result(video_id) for video_id in payloads.get(query, [])]}
+    return search
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    bucket = TokenBucket(rate=50, capacity=5)
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+
+    start = time.monotonic()
+    waited = sum(bucket.acquire() for _ in range(10))
+    elapsed = time.monotonic() - start
+    assert elapsed >= 10 / 50 * 0.9 and waited >= 10 / 50 * 0.9
+
+
+def test_token_bucket_rejects_a_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_run_shares_one_rate_limit_across_workers():
+    titles = [f"title {index}" for index in range(30)]
+    stage = SearchStage(concurrency=8, rate=100, burst=10, search=search_from({title: ["1"] for title in titles}))
+
+    start = time.monotonic()
+    outcomes = list(stage.run(titles))
+    elapsed = time.monotonic() - start
+
+    assert sorted(outcome.title for outcome in outcomes) == sorted(titles)
+    # The burst is free; the other 20 searches wait for tokens at 100 per second.
+    assert elapsed >= 20 / 100 * 0.9
+
+
+def test_a_failed_search_is_an_outcome_not_an_exception():
+    stage = SearchStage(rate=1000, search=search_from({"a": ["1"], "c": ["3"]}, failing={"b"}))
+    outcomes = {outcome.title: outcome for outcome in stage.run(["a", "b", "c"])}
+
+    assert outcomes["a"].ok and outcomes["c"].ok
+    failed = outcomes["b"]
+    assert not failed.ok and failed.results is None
+    assert str(failed.error) == "search for b failed"
+
+
+def test_cached_searches_take_no_token():
+    with SearchCache(":memory:") as cache:
+        cache.put("a", 20, {'result': [result("1")]})
+        stage = SearchStage(rate=1, burst=1, cache=cache, search=search_from({"b": ["2"]}))
+        stage.limiter.try_acquire()
+
+        start = time.monotonic()
+        outcome = stage.search_one("a")
+        assert time.monotonic() - start < 0.5
+        assert outcome.ok and outcome.results['result'][0]['id'] == "1"
+
+
+def test_fan_out_merges_variants_in_query_order():
+    stage = SearchStage(rate=1000, search=search_from({"a": ["1", "2"], "b": ["2", "3"], "c": ["4"]}, failing={"c"}))
+    with stage:
+        outcome = stage.fan_out(["a", "b", "c"])
+
+    assert outcome.ok and outcome.title == "a"
+    assert [item['id'] for item in outcome.results['result']] == ["1", "2", "3"]
+
+
+def test_fan_out_fails_when_every_variant_fails():
+    with SearchStage(rate=1000, search=search_from({}, failing={"a", "b"})) as stage:
+        outcome = stage.fan_out(["a", "b"])
+
+    assert not outcome.ok and outcome.results is None
+    assert "All 2 query variant(s) failed" in str(outcome.error)
+    assert isinstance(outcome.error.__cause__, RuntimeError)
+
+
+def test_concurrent_fan_outs_share_the_stage_threads():
+    variants = query_variants("Whiplash - Architects")
+    stage = SearchStage(concurrency=3, rate=1000, search=search_from({query: ["1"] for query in variants}))
+    seen = set()
+    lock = threading.Lock()
+    search = stage.search
+
+    def recording(query, *args, **kwargs):
+        with lock:
+            seen.add(threading.current_thread().name)
+        return search(query, *args, **kwargs)
+
+    stage.search = recording
+    with ThreadPoolExecutor(max_workers=8) as workers:
+        outcomes = list(workers.map(lambda _: stage.fan_out(variants), range(40)))
+    stage.close()
+
+    assert all(outcome.ok for outcome in outcomes)
+    assert len(seen) <= 3 and all(name.startswith("fanout") for name in seen)
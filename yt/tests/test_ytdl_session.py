@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ytdl_session import YoutubeDLSessions
+
+OPTS = {"quiet": True, "no_warnings": True}
+
+
+def run_pool(sessions: YoutubeDLSessions, workers: int = 3, tasks: int = 12) -> None:
+    # Like DownloadPool.run: a fresh executor per run, shut down (threads joined) when it is done.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda _: sessions.get("default", OPTS), range(tasks)))
+
+
+def test_one_session_per_thread_and_key():
+    with YoutubeDLSessions() as sessions:
+        first = sessions.get("default", OPTS)
+        assert sessions.get("default", OPTS) is first
+        assert sessions.get("other", OPTS) is not first
+        assert sessions.created == 2
+
+
+def test_prune_closes_sessions_of_finished_threads():
+    with YoutubeDLSessions() as sessions:
+        mine = sessions.get("default", OPTS)
+        run_pool(sessions)
+        assert sessions.open_sessions > 1
+        assert sessions.prune() == sessions.created - 1
+        assert sessions.open_sessions == 1
+        assert sessions.get("default", OPTS) is mine
+
+
+def test_sessions_stay_bounded_across_pools():
+    sessions = YoutubeDLSessions()
+    for _ in range(5):
+        run_pool(sessions, workers=3)
+        sessions.prune()
+        assert sessions.open_sessions == 0
+    assert sessions.created >= 5
+    sessions.close()
+
+
+def test_new_session_prunes_dead_threads():
+    with YoutubeDLSessions() as sessions:
+        worker = threading.Thread(target=sessions.get, args=("default", OPTS))
+        worker.start()
+        worker.join()
+        assert sessions.open_sessions == 1
+        sessions.get("default", OPTS)
+        assert sessions.open_sessions == 1
@@ -17,6 +17,48 @@ class ThumbnailDownloader:
         self.tmp_dir: str = tmp_dir
         self.logging: logging.Logger = logger
     
+    def cover_art(self, video: VideoData, image_source: Optional[str] = None) -> Optional[bytes]:
+        """
+        Cover art for a video as JPEG bytes, kept in memory so it is written together with the other
+        tags instead of remuxing the audio file with ffmpeg.
+
+        :param image_source: Local image preferred over the video's thumbnail.
+        :return: JPEG data, or None when no image could be obtained.
+        """
+        logging = self.logging.getChild("cover_art")
+        if image_source is not None:
+            try:
+                with open(image_source, "rb") as fp:
+                    return self.to_jpeg(fp.read())
+            except Exception as e:
+                logging.warning(f"Could not read image source {image_source}: {e}")
+
+        thumbnail_url = None
+        if hasattr(video, 'richThumbnail') and video.richThumbnail and hasattr(video.richThumbnail, 'url'):
+            thumbnail_url = video.richThumbnail.url
+        elif hasattr(video, 'thumbnails') and video.thumbnails:
+            thumbnail_url = getattr(video.thumbnails[0], 'url', None)
+        if not thumbnail_url:
+            return None
+
+        try:
+            response = requests.get(thumbnail_url, timeout=30)
+            response.raise_for_status()
+            return self.to_jpeg(response.content)
+        except Exception as e:
+            logging.info(f"Failed to obtain a valid image from the thumbnail: {e}")
+            return None
+
+    @staticmethod
+    def to_jpeg(image_data: bytes) -> bytes:
+        """Re-encode an image as RGB JPEG, which every player accepts as cover art."""
+        image = Image.open(BytesIO(image_data))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        out = BytesIO()
+        image.save(out, 'JPEG')
+        return out.getvalue()
+
     def download_thumbnail(self, video: VideoData, output_path: str, image_source: Optional[str] = None) -> Optional[str]:
         logging = self.logging.getChild("download")
         # If no image_source is provided, try to use the video's thumbnail.
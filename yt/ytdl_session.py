@@ -0,0 +1,103 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import yt_dlp
+
+logger = logging.getLogger("ytdl_session")
+
+
+class YoutubeDLSessions:
+    """
+    Long-lived YoutubeDL instances, one per thread and option set.
+
+    Building a YoutubeDL loads and instantiates the extractors, sets up the cookie jar and HTTP
+    handlers, and throws away whatever an extractor cached (player JS, signature functions). A worker
+    that downloads many videos keeps its instance instead and only swaps the output template per call.
+    Instances are never shared between threads, since YoutubeDL is not thread-safe.
+
+    Sessions of threads that have exited (e.g. the workers of a finished download pool) are closed by
+    prune(), which also runs whenever a new session is created, so they do not pile up across pools.
+    """
+
+    def __init__(self, base_opts: Optional[Dict[str, Any]] = None, logger: logging.Logger = logger):
+        """
+        :param base_opts: Options every session starts from; per-session options are merged on top.
+        """
+        self.base_opts: Dict[str, Any] = dict(base_opts or {})
+        self.logger = logger
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Every open session with the thread that owns it.
+        self._all: List[Tuple[threading.Thread, yt_dlp.YoutubeDL]] = []
+        self.created = 0
+
+    def get(self, key: str = "default", opts: Optional[Dict[str, Any]] = None) -> yt_dlp.YoutubeDL:
+        """
+        The calling thread's session for `key`, created from `opts` the first time it is asked for.
+
+        :param key: Names the option set, e.g. the audio quality; options of an existing session are not compared.
+        """
+        sessions: Dict[str, yt_dlp.YoutubeDL] = getattr(self._local, "sessions", None) or {}
+        self._local.sessions = sessions
+        ydl = sessions.get(key)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL({**self.base_opts, **(opts or {})})
+            sessions[key] = ydl
+            with self._lock:
+                self._all.append((threading.current_thread(), ydl))
+                self.created += 1
+            self.logger.debug(f"Created YoutubeDL session {key!r} on {threading.current_thread().name}")
+            self.prune()
+        return ydl
+
+    @property
+    def open_sessions(self) -> int:
+        with self._lock:
+            return len(self._all)
+
+    def download(self, url: str, outtmpl: str, key: str = "default", opts: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Download `url` to `outtmpl` with the calling thread's session.
+
+        :return: yt-dlp's return code, 0 on success.
+        """
+        ydl = self.get(key, opts)
+        # The template was normalized to a dict when the session was built; only the default entry changes per call.
+        ydl.params['outtmpl'] = {**ydl.params.get('outtmpl', {}), 'default': outtmpl}
+        return ydl.download([url])
+
+    def extract_info(self, url: str, key: str = "default", opts: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        return self.get(key, opts).extract_info(url, **kwargs)
+
+    def prune(self) -> int:
+        """
+        Close the sessions of threads that are no longer alive.
+
+        :return: The number of closed sessions.
+        """
+        with self._lock:
+            dead = [ydl for thread, ydl in self._all if not thread.is_alive()]
+            self._all = [(thread, ydl) for thread, ydl in self._all if thread.is_alive()]
+        self._close_all(dead)
+        return len(dead)
+
+    def close(self) -> None:
+        """Close every session of every thread; later calls build new ones."""
+        with self._lock:
+            sessions, self._all = [ydl for _, ydl in self._all], []
+        self._close_all(sessions)
+        self._local = threading.local()
+
+    def _close_all(self, sessions: List[yt_dlp.YoutubeDL]) -> None:
+        for ydl in sessions:
+            try:
+                ydl.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing YoutubeDL session: {e}")
+
+    def __enter__(self) -> "YoutubeDLSessions":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()